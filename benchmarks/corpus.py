@@ -0,0 +1,79 @@
+"""
+Realistic Twitch IRC lines for benchmarks.
+
+SAMPLES are lines in the shape Twitch sends them (ids and names
+anonymized).  generate() builds a larger corpus by varying users,
+channels and text over those shapes.
+"""
+import random
+
+SAMPLES = [
+    b'@badge-info=subscriber/14;badges=subscriber/12,bits/1000;client-nonce=9b3f5a1e;color=#1E90FF;'
+    b'display-name=Some_Viewer;emotes=25:0-4,12-16/1902:6-10;first-msg=0;flags=;'
+    b'id=b34ccfc7-4977-403a-8a94-33c6bac34fb8;mod=0;returning-chatter=0;room-id=36026978;subscriber=1;'
+    b'tmi-sent-ts=1533676810932;turbo=0;user-id=244083199;user-type= '
+    b':some_viewer!some_viewer@some_viewer.tmi.twitch.tv PRIVMSG #test_room :Kappa Keepo Kappa\r\n',
+    b'@badge-info=;badges=;color=;display-name=lurker42;emotes=;first-msg=0;flags=;'
+    b'id=1f2b8e04-3c55-4a7e-9a4c-2d1d5b9e77c1;mod=0;returning-chatter=0;room-id=36026978;subscriber=0;'
+    b'tmi-sent-ts=1533676811004;turbo=0;user-id=51234567;user-type= '
+    b':lurker42!lurker42@lurker42.tmi.twitch.tv PRIVMSG #test_room :anyone know what song this is?\r\n',
+    b'@badge-info=;badges=moderator/1,partner/1;bits=100;color=#FF4500;display-name=Cheer_Bot;'
+    b'emotes=;first-msg=0;flags=;id=7c2e0b1f-6a3d-4d2c-8f4e-0a1b2c3d4e5f;mod=1;returning-chatter=0;'
+    b'room-id=36026978;subscriber=0;tmi-sent-ts=1533676811230;turbo=0;user-id=87654321;user-type=mod '
+    b':cheer_bot!cheer_bot@cheer_bot.tmi.twitch.tv PRIVMSG #test_room :cheer100 let\'s go \xf0\x9f\x8e\x89\r\n',
+    b'@badge-info=subscriber/6;badges=subscriber/6,premium/1;color=#008000;display-name=Resub_Fan;'
+    b'emotes=;flags=;id=db25007f-7a18-43eb-9379-80131e44d633;login=resub_fan;mod=0;msg-id=resub;'
+    b'msg-param-cumulative-months=6;msg-param-months=0;msg-param-should-share-streak=0;'
+    b'msg-param-sub-plan-name=Channel\\sSubscription\\s(test_room);msg-param-sub-plan=1000;'
+    b'room-id=36026978;subscriber=1;system-msg=Resub_Fan\\ssubscribed\\sat\\sTier\\s1.\\sThey\'ve\\s'
+    b'subscribed\\sfor\\s6\\smonths!;tmi-sent-ts=1533676812001;user-id=13405587;user-type= '
+    b':tmi.twitch.tv USERNOTICE #test_room :Great stream -- keep it up!\r\n',
+    b'@badge-info=;badges=;color=;display-name=Gifter;emotes=;flags=;'
+    b'id=e9176cd8-5e22-4684-ad40-ce53c2561c5e;login=gifter;mod=0;msg-id=subgift;msg-param-months=1;'
+    b'msg-param-recipient-display-name=Lucky_One;msg-param-recipient-id=55554444;'
+    b'msg-param-recipient-user-name=lucky_one;msg-param-sub-plan-name=Channel\\sSubscription\\s(test_room);'
+    b'msg-param-sub-plan=1000;room-id=36026978;subscriber=0;system-msg=Gifter\\sgifted\\sa\\sTier\\s1\\ssub\\s'
+    b'to\\sLucky_One!;tmi-sent-ts=1533676812450;user-id=19264788;user-type= '
+    b':tmi.twitch.tv USERNOTICE #test_room\r\n',
+    b'@ban-duration=600;room-id=36026978;target-user-id=244083199;tmi-sent-ts=1533676813100 '
+    b':tmi.twitch.tv CLEARCHAT #test_room :spammer_99\r\n',
+    b'@room-id=36026978;tmi-sent-ts=1533676813200 :tmi.twitch.tv CLEARCHAT #test_room\r\n',
+    b'@emote-only=0;followers-only=-1;r9k=0;room-id=36026978;slow=0;subs-only=0 '
+    b':tmi.twitch.tv ROOMSTATE #test_room\r\n',
+    b'@room-id=36026978;slow=10 :tmi.twitch.tv ROOMSTATE #test_room\r\n',
+    b':tmi.twitch.tv HOSTTARGET #test_room :other_streamer 42\r\n',
+    b'@badge-info=;badges=moderator/1;color=#0000FF;display-name=MyBot;emote-sets=0,300374282;mod=1;'
+    b'subscriber=0;user-type=mod :tmi.twitch.tv USERSTATE #test_room\r\n',
+    b'@msg-id=slow_on :tmi.twitch.tv NOTICE #test_room :This room is now in slow mode. '
+    b'You may send messages every 10 seconds.\r\n',
+]
+
+# Relative frequency of each sample, roughly matching a busy channel
+WEIGHTS = [40, 30, 5, 3, 2, 2, 1, 1, 1, 1, 1, 1]
+
+WORDS = [
+    'Kappa', 'PogChamp', 'LUL', 'gg', 'wp', 'lol', 'what', 'is', 'this', 'song', 'hype', 'nice',
+    'play', 'again', 'chat', 'when', 'stream', 'tomorrow', 'KEKW', 'monkaS', 'no', 'way',
+]
+
+
+def generate(count, channels=50, users=5000, seed=1):
+    """
+    Returns a list of count lines spread over channels and users
+    """
+    rng = random.Random(seed)
+    lines = []
+
+    for sample in rng.choices(SAMPLES, WEIGHTS, k=count):
+        channel = f"channel_{rng.randrange(channels)}".encode()
+        user = f"viewer_{rng.randrange(users)}".encode()
+        line = sample.replace(b'test_room', channel)
+
+        if b' PRIVMSG ' in line:
+            head, _, _ = line.rpartition(b' :')
+            text = ' '.join(rng.choices(WORDS, k=rng.randint(1, 12))).encode()
+            line = head.replace(b'some_viewer', user).replace(b'lurker42', user) + b' :' + text + b'\r\n'
+
+        lines.append(line)
+
+    return lines
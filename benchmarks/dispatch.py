@@ -0,0 +1,76 @@
+"""
+Micro-benchmark for TwitchIrc._on_handle_twitch.
+
+Runs a fixed mix of pre-parsed messages through the dispatcher and
+reports messages/sec.  Usage: python benchmarks/dispatch.py [count] [--watchdog]
+
+--watchdog runs with TwitchIrc.WATCHDOG_THRESHOLD set, timing every
+callback and watching the loop from its side thread.
+"""
+import sys
+import time
+
+from python_twitch_irc import TwitchIrc
+
+
+class Message:
+    def __init__(self, command, params, tags, source=None):
+        self.command = command
+        self.params = params
+        self.tags = tags
+        self.source = source
+
+
+MESSAGES = [
+    Message(
+        'PRIVMSG',
+        ['#test-room', 'Kappa Keepo Kappa'],
+        {
+            'badges': 'subscriber/12,bits/100',
+            'color': '#1E90FF',
+            'display-name': 'Test_User',
+            'emotes': '25:0-4,12-16/1902:6-10',
+            'id': 'b34ccfc7-4977-403a-8a94-33c6bac34fb8',
+            'room-id': '36026978',
+            'tmi-sent-ts': '1533676810932',
+            'user-id': '244083199',
+        },
+        'test_user!test_user@test_user.tmi.twitch.tv',
+    ),
+    Message(
+        'USERNOTICE',
+        ['#test-room', 'Great stream'],
+        {'msg-id': 'resub', 'msg-param-months': '6', 'tmi-sent-ts': '1533676810932'},
+    ),
+    Message('CLEARCHAT', ['#test-room', 'test_user'], {'ban-duration': '600', 'tmi-sent-ts': '1533676810932'}),
+    Message('ROOMSTATE', ['#test-room'], {'slow': '10'}),
+]
+
+
+class WatchedIrc(TwitchIrc):
+    WATCHDOG_THRESHOLD = 0.1
+
+
+def run(count, watchdog=False):
+    irc = (WatchedIrc if watchdog else TwitchIrc)('dummy', 'dummy_token')
+
+    if watchdog:
+        irc.watchdog.start()
+    handle = irc._on_handle_twitch
+    messages = (MESSAGES * (count // len(MESSAGES) + 1))[:count]
+
+    start = time.perf_counter()
+    for message in messages:
+        handle(message)
+    elapsed = time.perf_counter() - start
+
+    if watchdog:
+        irc.watchdog.stop()
+
+    return count / elapsed
+
+
+if __name__ == '__main__':
+    args = [arg for arg in sys.argv[1:] if arg != '--watchdog']
+    count = int(args[0]) if args else 200000
+    print(f"{run(count, '--watchdog' in sys.argv):,.0f} messages/sec")
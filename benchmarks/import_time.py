@@ -0,0 +1,47 @@
+"""
+Measures the time to import python_twitch_irc in a fresh interpreter
+(python -X importtime) and which heavy dependencies it pulls in.
+
+Usage: python benchmarks/import_time.py [runs]
+"""
+import statistics
+import subprocess
+import sys
+
+MODULE = 'python_twitch_irc'
+
+# Dependencies worth reporting when imported
+WATCH = ('pydle', 'pendulum')
+
+
+def run():
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {MODULE}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+
+    return times
+
+
+if __name__ == '__main__':
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    results = [run() for _ in range(runs)]
+
+    for name in (MODULE,) + WATCH:
+        samples = [times[name] for times in results if name in times]
+
+        if samples:
+            print(f"{name:>20}: {statistics.median(samples) / 1000:8.1f} ms (median of {len(samples)})")
+        else:
+            print(f"{name:>20}: not imported")
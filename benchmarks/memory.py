@@ -0,0 +1,75 @@
+"""
+Memory held by buffered messages, with and without string interning and
+the chatter identity cache (TwitchIrc.INTERN_STRINGS).
+
+Every PRIVMSG/USERNOTICE delivered to the callbacks is kept, with its
+tags read once as a consumer would, and the traced memory is reported
+per message and scaled to 1M messages.
+
+Usage: python benchmarks/memory.py [--count N] [--fast-parser]
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from python_twitch_irc import TwitchIrc  # noqa: E402
+
+from corpus import generate  # noqa: E402
+from replay import replay  # noqa: E402
+
+
+class Buffering(TwitchIrc):
+    def on_message(self, timestamp, tags, channel, user, message):
+        tags.get('display-name')
+        self.buffer.append((timestamp, tags, channel, user, message))
+
+    def on_usernotice(self, timestamp, tags, channel, message):
+        tags.get('msg-id')
+        self.buffer.append((timestamp, tags, channel, None, message))
+
+
+def measure(lines, fast_parser, intern):
+    client_class = type('Client', (Buffering,), {'FAST_PARSER': fast_parser, 'INTERN_STRINGS': intern})
+    client = client_class('dummy', 'dummy_token')
+    client.encoding = 'utf-8'
+    client.buffer = []
+
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+
+    replay(client, lines)
+
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    return used / len(client.buffer), len(client.buffer)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memory per buffered message")
+    parser.add_argument('--count', type=int, default=200000, help="lines to replay")
+    parser.add_argument('--fast-parser', action='store_true', help="enable TwitchIrc.FAST_PARSER")
+    args = parser.parse_args(argv)
+
+    lines = generate(args.count)
+    results = {}
+
+    for name, intern in (('before', False), ('after', True)):
+        per_message, buffered = measure(lines, args.fast_parser, intern)
+        results[name] = per_message
+        print(
+            f"{name:>8}: {per_message:,.0f} bytes/message, "
+            f"{per_message * 1e6 / 2 ** 20:,.0f} MiB per 1M messages ({buffered:,} buffered)"
+        )
+
+    print(f"  change: {(results['after'] - results['before']) / results['before']:+.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+"""
+Compares Pydle's TaggedMessage.parse with parser.parse_line on the
+benchmark corpus.  Usage: python benchmarks/parser.py [count]
+"""
+import sys
+import time
+
+from pydle.features.ircv3.tags import TaggedMessage
+
+from python_twitch_irc.parser import parse_line
+
+from corpus import generate
+
+
+def pydle_parse(line):
+    return TaggedMessage.parse(line)
+
+
+def fast_parse(line):
+    # Same fallback as TwitchIrc._parse_message
+    return parse_line(line) or TaggedMessage.parse(line)
+
+
+def run(parse, lines):
+    start = time.perf_counter()
+    for line in lines:
+        parse(line)
+    return len(lines) / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    lines = generate(count)
+
+    for name, parse in (('pydle', pydle_parse), ('parse_line', fast_parse)):
+        print(f"{name:>12}: {run(parse, lines):,.0f} lines/sec")
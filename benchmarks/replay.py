@@ -0,0 +1,239 @@
+"""
+Replays raw Twitch lines through the full receive path (socket buffer,
+parser, dispatch, overrideable callbacks) and reports messages/sec,
+p50/p99 per-message latency and memory allocated per message.
+
+Usage:
+    python benchmarks/replay.py [--count N] [--file lines.txt | --recording dir] [--fast-parser]
+                                [--save baseline.json] [--baseline baseline.json]
+
+--file replays lines from a text file (one raw line per line) and
+--recording replays a directory written by recorder.Recorder instead of
+the synthetic corpus.  --baseline compares against a result saved with --save
+and exits non-zero when a metric regressed by more than --tolerance.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from python_twitch_irc import TwitchIrc  # noqa: E402
+from python_twitch_irc.recorder import Replayer  # noqa: E402
+
+from corpus import generate  # noqa: E402
+
+# Metrics where a higher value is better, all others are lower is better
+HIGHER_IS_BETTER = {'msgs_per_sec'}
+
+# Metrics only comparable between runs over the same number of messages
+COUNT_DEPENDENT = {'retained_bytes_per_msg'}
+
+
+class Bot(TwitchIrc):
+    """
+    Overrides every callback so each message reaches user code
+    """
+    def on_cleared_chat(self, timestamp, tags, channel):
+        pass
+
+    def on_channel_ban(self, timestamp, tags, channel, user):
+        pass
+
+    def on_hosting(self, timestamp, host, hostee, viewers):
+        pass
+
+    def on_stop_hosting(self, timestamp, host, viewers):
+        pass
+
+    def on_notice(self, timestamp, tags, channel, message):
+        pass
+
+    def on_roomstate(self, timestamp, tags, channel):
+        pass
+
+    def on_usernotice(self, timestamp, tags, channel, message):
+        pass
+
+    def on_userstate(self, timestamp, tags, channel):
+        pass
+
+    def on_message(self, timestamp, tags, channel, user, message):
+        pass
+
+
+def make_client(fast_parser):
+    client_class = type('ReplayBot', (Bot,), {'FAST_PARSER': fast_parser})
+    client = client_class('dummy', 'dummy_token')
+
+    # Normally set by Pydle on connect
+    client.encoding = 'utf-8'
+    return client
+
+
+def replay(client, lines):
+    """
+    Feeds lines into the client as if read from its socket.  Every Twitch
+    command (PRIVMSG included) ends in _on_handle_twitch; Pydle's own
+    on_raw routing is skipped as it differs between Pydle versions.
+    """
+    handle = client._on_handle_twitch
+
+    for line in lines:
+        client._receive_buffer += line
+
+        while client._has_message():
+            handle(client._parse_message())
+
+
+def throughput(client, lines):
+    start = time.perf_counter()
+    replay(client, lines)
+    return len(lines) / (time.perf_counter() - start)
+
+
+def latencies(client, lines):
+    clock = time.perf_counter_ns
+    samples = []
+
+    for line in lines:
+        start = clock()
+        replay(client, (line,))
+        samples.append(clock() - start)
+
+    samples.sort()
+    return samples
+
+
+def percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def allocations(client, lines):
+    """
+    Mean bytes allocated while handling a message (traced peak above the
+    memory in use before it) and bytes still held per message afterwards.
+    The latter is the growth over the second half of lines, leaving out
+    the fixed overhead of the first messages (caches, dispatch state).
+    """
+    tracemalloc.start()
+    peak_total = 0
+    half = len(lines) // 2
+    middle = None
+
+    for index, line in enumerate(lines):
+        if index == half:
+            middle, _ = tracemalloc.get_traced_memory()
+
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        replay(client, (line,))
+        peak_total += tracemalloc.get_traced_memory()[1] - before
+
+    retained = tracemalloc.get_traced_memory()[0] - middle
+    tracemalloc.stop()
+
+    return peak_total / len(lines), retained / (len(lines) - half)
+
+
+def run(lines, fast_parser=False):
+    # Warm up caches (dispatch tables, interned strings) before measuring
+    replay(make_client(fast_parser), lines[:1000])
+
+    samples = latencies(make_client(fast_parser), lines)
+    bytes_per_msg, retained_per_msg = allocations(make_client(fast_parser), lines[:20000])
+
+    return {
+        'messages': len(lines),
+        'fast_parser': fast_parser,
+        'msgs_per_sec': throughput(make_client(fast_parser), lines),
+        'p50_us': percentile(samples, 0.50) / 1000,
+        'p99_us': percentile(samples, 0.99) / 1000,
+        'bytes_per_msg': bytes_per_msg,
+        'retained_bytes_per_msg': retained_per_msg,
+    }
+
+
+def compare(result, baseline, tolerance):
+    """
+    Prints the change of every metric and returns the names of those which
+    regressed by more than tolerance (a fraction)
+    """
+    regressions = []
+
+    if baseline.get('fast_parser') != result['fast_parser']:
+        print("Warning: baseline was run with a different FAST_PARSER setting")
+
+    same_count = baseline.get('messages') == result['messages']
+
+    if not same_count:
+        print(f"Warning: baseline replayed {baseline.get('messages')} messages, skipping {', '.join(COUNT_DEPENDENT)}")
+
+    for name, value in result.items():
+        base = baseline.get(name)
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not base or name == 'messages':
+            continue
+
+        if name in COUNT_DEPENDENT and not same_count:
+            continue
+
+        change = (value - base) / base
+        worse = -change if name in HIGHER_IS_BETTER else change
+        flag = ''
+
+        if worse > tolerance:
+            regressions.append(name)
+            flag = '  REGRESSION'
+
+        print(f"{name:>24}: {base:>14,.2f} -> {value:>14,.2f} ({change:+.1%}){flag}")
+
+    return regressions
+
+
+def load_lines(path):
+    with open(path, 'rb') as fp:
+        return [line if line.endswith(b'\n') else line + b'\r\n' for line in fp if line.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--count', type=int, default=100000, help="synthetic lines to replay")
+    parser.add_argument('--file', help="recorded raw lines to replay instead of the synthetic corpus")
+    parser.add_argument('--recording', help="replay a recorder directory instead of the synthetic corpus")
+    parser.add_argument('--fast-parser', action='store_true', help="enable TwitchIrc.FAST_PARSER")
+    parser.add_argument('--save', help="write the result to this JSON file")
+    parser.add_argument('--baseline', help="compare against a result saved with --save")
+    parser.add_argument('--tolerance', type=float, default=0.10, help="allowed regression (default 0.10)")
+    args = parser.parse_args(argv)
+
+    if args.file:
+        lines = load_lines(args.file)
+    elif args.recording:
+        lines = [line + b'\r\n' for line in Replayer(args.recording).lines()]
+    else:
+        lines = generate(args.count)
+    result = run(lines, args.fast_parser)
+
+    for name, value in result.items():
+        print(f"{name:>24}: {value:,.2f}" if isinstance(value, float) else f"{name:>24}: {value}")
+
+    if args.save:
+        with open(args.save, 'w') as fp:
+            json.dump(result, fp, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as fp:
+            baseline = json.load(fp)
+
+        print(f"\nAgainst {args.baseline}:")
+        if compare(result, baseline, args.tolerance):
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Startup-to-ready time of a client joining many channels against a local
+fake_server.FakeTwitchServer, cold (no snapshot) and warm (restored from
+the snapshot the cold run saved on stop).
+
+Reported per run, in seconds since the client was created:
+    restored    snapshot loaded, state of every channel available
+    registered  end of MOTD received
+    ready       channel state (mod, slow, ...) available for every channel
+    joined      every channel confirmed by a live ROOMSTATE
+
+Cold runs are ready once joined, which Twitch's join limit (20 channels
+per 10 seconds) stretches out; warm runs are ready once restored and
+reconcile in the background.
+
+Usage: python benchmarks/warm_start.py [--channels N]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from pydle.features.ircv3.tags import TaggedMessage
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from python_twitch_irc import TwitchIrc  # noqa: E402
+from python_twitch_irc.fake_server import FakeTwitchServer  # noqa: E402
+
+
+class Bot(TwitchIrc):
+    """
+    Talks to the fake server over a plain asyncio connection, feeding
+    Twitch commands straight into dispatch
+    """
+    writer = None
+
+    def _send_raw(self, line):
+        self.writer.write(f"{line}\r\n".encode())
+
+
+def is_ready(irc, channels):
+    return all(irc.state.get(channel) is not None and irc.state.get(channel).room_id for channel in channels)
+
+
+async def run(server, path, channels):
+    Bot.SNAPSHOT_PATH = path
+    timings = {}
+    start = time.perf_counter()
+
+    def mark(name):
+        timings.setdefault(name, time.perf_counter() - start)
+
+    irc = Bot('bot', 'dummy_token')
+    warm = bool(irc._restored_channels)
+    mark('restored')
+
+    if is_ready(irc, channels):
+        mark('ready')
+
+    reader, irc.writer = await asyncio.open_connection(server.host, server.port)
+    irc.writer.write(b'CAP REQ :twitch.tv/tags twitch.tv/commands twitch.tv/membership\r\n')
+    irc.writer.write(b'PASS oauth:dummy_token\r\nNICK bot\r\n')
+    request = None
+
+    while request is None or not request.done:
+        line = await reader.readline()
+        message = TaggedMessage.parse(line, encoding='utf-8')
+        command = str(message.command).zfill(3)
+
+        if command == '376':
+            mark('registered')
+            request = irc._rejoin_restored() if warm else irc.join_many(channels)
+        elif command in irc._twitch_dispatch:
+            message.command = command
+            irc._on_handle_twitch(message)
+
+            if is_ready(irc, channels):
+                mark('ready')
+
+    mark('joined')
+    irc.writer.close()
+    await asyncio.sleep(0.1)
+
+    irc.snapshots.save()
+    return 'warm' if warm else 'cold', timings
+
+
+async def main(count):
+    channels = [f"#channel{index}" for index in range(count)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'snapshot.json')
+
+        async with FakeTwitchServer(rate=0, token='dummy_token') as server:
+            for _ in range(2):
+                kind, timings = await run(server, path, channels)
+                print(f"{kind}: " + '  '.join(f"{name} {seconds:.3f}s" for name, seconds in timings.items()))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--channels', type=int, default=30)
+    args = parser.parse_args()
+
+    asyncio.get_event_loop().run_until_complete(main(args.channels))
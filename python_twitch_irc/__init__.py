@@ -1,5 +1,22 @@
-# __init__.py
+from .batch import Batch
+from .events import ChatMessage, ClearChat, Notice, RoomState, UserNotice, UserState, Whisper
 from .irc import TwitchIrc
+from .moderation import ModerationBot
+from .pool import TwitchIrcPool
+from .tags import Tags
 
 
-__all__ = ['TwitchIrc']
+__all__ = [
+    'Batch',
+    'ChatMessage',
+    'ClearChat',
+    'ModerationBot',
+    'Notice',
+    'RoomState',
+    'Tags',
+    'TwitchIrc',
+    'TwitchIrcPool',
+    'UserNotice',
+    'UserState',
+    'Whisper',
+]
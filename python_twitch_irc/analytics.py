@@ -0,0 +1,363 @@
+import array
+import asyncio
+import collections
+import math
+import time
+
+from .tags import parse_emotes
+
+# Sliding windows in seconds
+WINDOWS = (60, 300, 3600)
+
+# Message counts are kept per 1/BUCKETS of a window, sketches per 1/SLICES
+BUCKETS = 60
+SLICES = 6
+
+# Seconds between applying pending messages to the sketches
+FLUSH_INTERVAL = 1.0
+
+# 2 ** HLL_PRECISION registers, ~4.6% standard error
+HLL_PRECISION = 9
+
+# Count-min sketch dimensions and emotes reported per window
+CMS_WIDTH = 128
+CMS_DEPTH = 4
+TOP_EMOTES = 10
+
+HASH_MASK = (1 << 64) - 1
+
+WindowStats = collections.namedtuple('WindowStats', 'span messages rate chatters emotes')
+
+
+class HyperLogLog:
+    """
+    Estimates the number of distinct values added, in 2 ** precision bytes
+    """
+    __slots__ = ('precision', 'registers')
+
+    def __init__(self, precision=HLL_PRECISION, registers=None):
+        self.precision = precision
+        self.registers = registers if registers is not None else bytearray(1 << precision)
+
+    def add(self, value):
+        self.add_hash(hash(value))
+
+    def add_hash(self, value):
+        self.update(register_updates((value,), self.precision))
+
+    def update(self, updates):
+        """
+        Applies {register: rank} from register_updates
+        """
+        registers = self.registers
+
+        for index, rank in updates.items():
+            if rank > registers[index]:
+                registers[index] = rank
+
+    def merge(self, other):
+        """
+        Returns a new HyperLogLog counting the values of both
+        """
+        return HyperLogLog(self.precision, bytearray(map(max, self.registers, other.registers)))
+
+    def count(self):
+        registers = self.registers
+        size = len(registers)
+        estimate = (0.7213 / (1 + 1.079 / size)) * size * size / sum(2.0 ** -rank for rank in registers)
+
+        # Small range correction
+        zeros = registers.count(0)
+        if zeros and estimate <= 2.5 * size:
+            estimate = size * math.log(size / zeros)
+
+        return int(round(estimate))
+
+
+def register_updates(values, precision=HLL_PRECISION):
+    """
+    Maps hashes to {register: highest rank}, so a batch of values can be
+    added to several HyperLogLogs of the same precision at once
+    """
+    mask = (1 << precision) - 1
+    width = 64 - precision + 1
+    updates = {}
+
+    for value in values:
+        value &= HASH_MASK
+        index = value & mask
+        rank = width - (value >> precision).bit_length()
+
+        if rank > updates.get(index, 0):
+            updates[index] = rank
+
+    return updates
+
+
+class CountMinSketch:
+    """
+    Upper bound estimates of item counts in width * depth counters
+    """
+    __slots__ = ('width', 'depth', 'rows')
+
+    def __init__(self, width=CMS_WIDTH, depth=CMS_DEPTH, rows=None):
+        self.width = width
+        self.depth = depth
+        self.rows = rows if rows is not None else [array.array('I', bytes(4 * width)) for _ in range(depth)]
+
+    def _indexes(self, item):
+        value = hash(item) & HASH_MASK
+        first, second = value & 0xFFFFFFFF, (value >> 32) | 1
+        return [(first + i * second) % self.width for i in range(self.depth)]
+
+    def add(self, item, count=1):
+        """
+        Adds count and returns the new estimate of item
+        """
+        estimate = None
+
+        for row, index in zip(self.rows, self._indexes(item)):
+            row[index] += count
+
+            if estimate is None or row[index] < estimate:
+                estimate = row[index]
+
+        return estimate
+
+    def estimate(self, item):
+        return min(row[index] for row, index in zip(self.rows, self._indexes(item)))
+
+    def merge(self, other):
+        rows = [array.array('I', map(sum, zip(mine, theirs))) for mine, theirs in zip(self.rows, other.rows)]
+        return CountMinSketch(self.width, self.depth, rows)
+
+
+class Slice:
+    """
+    Sketches of the messages in one 1/SLICES of a window
+    """
+    __slots__ = ('index', 'chatters', 'emotes', 'top')
+
+    def __init__(self, index, precision, width, depth):
+        self.index = index
+        self.chatters = HyperLogLog(precision)
+        self.emotes = CountMinSketch(width, depth)
+
+        # Candidate heavy hitters -> estimate
+        self.top = {}
+
+
+class Window:
+    """
+    Messages, distinct chatters and top emotes over the last span seconds.
+    Memory is fixed: a ring of BUCKETS message counts and at most SLICES
+    sets of sketches, which are only allocated while there is traffic.
+    """
+    def __init__(self, span, buckets=BUCKETS, slices=SLICES, precision=HLL_PRECISION,
+                 width=CMS_WIDTH, depth=CMS_DEPTH, top=TOP_EMOTES):
+        self.span = span
+        self.top = top
+
+        self._bucket_width = span / buckets
+        self._counts = [0] * buckets
+        self._bucket_indexes = [-1] * buckets
+
+        self._slice_width = span / slices
+        self._slices = [None] * slices
+        self._sketch = (precision, width, depth)
+
+    def add(self, now, messages, chatters=None, emotes=None):
+        """
+        Adds messages, register_updates() of their chatters' ids and
+        {emote: count}, all received at now
+        """
+        index = int(now // self._bucket_width)
+        pos = index % len(self._counts)
+
+        if self._bucket_indexes[pos] != index:
+            self._bucket_indexes[pos] = index
+            self._counts[pos] = 0
+
+        self._counts[pos] += messages
+
+        if not chatters and not emotes:
+            return
+
+        index = int(now // self._slice_width)
+        pos = index % len(self._slices)
+        current = self._slices[pos]
+
+        if current is None or current.index != index:
+            current = self._slices[pos] = Slice(index, *self._sketch)
+
+        if chatters:
+            current.chatters.update(chatters)
+
+        if emotes:
+            top = current.top
+
+            for emote, count in emotes.items():
+                estimate = current.emotes.add(emote, count)
+
+                if emote in top or len(top) < self.top:
+                    top[emote] = estimate
+                else:
+                    smallest = min(top, key=top.get)
+
+                    if estimate > top[smallest]:
+                        del top[smallest]
+                        top[emote] = estimate
+
+    def messages(self, now):
+        oldest = int(now // self._bucket_width) - len(self._counts)
+        return sum(count for count, index in zip(self._counts, self._bucket_indexes) if index > oldest)
+
+    def live_slices(self, now):
+        oldest = int(now // self._slice_width) - len(self._slices)
+        return [current for current in self._slices if current is not None and current.index > oldest]
+
+    def prune(self, now):
+        """
+        Frees expired sketches, returns whether the window is empty
+        """
+        live = self.live_slices(now)
+        self._slices = [current if current in live else None for current in self._slices]
+        return not live and not self.messages(now)
+
+    def snapshot(self, now):
+        messages = self.messages(now)
+        live = self.live_slices(now)
+        chatters = 0
+        emotes = []
+
+        if live:
+            merged = live[0].chatters
+            sketch = live[0].emotes
+            candidates = set(live[0].top)
+
+            for current in live[1:]:
+                merged = merged.merge(current.chatters)
+                sketch = sketch.merge(current.emotes)
+                candidates.update(current.top)
+
+            chatters = merged.count()
+            emotes = sorted(((emote, sketch.estimate(emote)) for emote in candidates), key=lambda item: -item[1])
+            emotes = emotes[:self.top]
+
+        return WindowStats(self.span, messages, messages / self.span, chatters, emotes)
+
+
+class ChatAnalytics:
+    """
+    Per channel sliding window statistics of PRIVMSGs.  add() only queues
+    the message; queued messages are grouped per channel and applied to the
+    windows every interval seconds.
+    """
+    def __init__(self, windows=WINDOWS, interval=FLUSH_INTERVAL, loop=None, **sketch):
+        self.windows = tuple(windows)
+        self.interval = interval
+
+        self._sketch = sketch
+        self._loop = loop
+        self._channels = {}
+        self._pending = []
+        self._timer = None
+
+    @property
+    def loop(self):
+        if self._loop is None:
+            self._loop = asyncio.get_event_loop()
+        return self._loop
+
+    @property
+    def channels(self):
+        return list(self._channels)
+
+    def add(self, channel, user_id, emotes, message):
+        self._pending.append((channel, user_id, emotes, message))
+
+        if self._timer is None:
+            self._timer = self.loop.call_later(self.interval, self.flush)
+
+    def flush(self, now=None):
+        """
+        Applies queued messages, received at now (time.time() if None)
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        pending, self._pending = self._pending, []
+        now = time.time() if now is None else now
+        grouped = {}
+
+        for channel, user_id, emotes, message in pending:
+            entry = grouped.get(channel)
+
+            if entry is None:
+                entry = grouped[channel] = [0, set(), collections.Counter()]
+
+            entry[0] += 1
+
+            if user_id and user_id is not True:
+                entry[1].add(hash(user_id))
+
+            if emotes and emotes is not True:
+                for _, start, end in parse_emotes(emotes):
+                    entry[2][message[start:end + 1]] += 1
+
+        precision = self._sketch.get('precision', HLL_PRECISION)
+
+        for channel, (messages, chatters, emotes) in grouped.items():
+            windows = self._channels.get(channel)
+
+            if windows is None:
+                windows = self._channels[channel] = [Window(span, **self._sketch) for span in self.windows]
+
+            chatters = register_updates(chatters, precision)
+
+            for window in windows:
+                window.add(now, messages, chatters, emotes)
+
+    def prune(self, now=None):
+        """
+        Frees expired sketches and forgets channels without traffic in any
+        window
+        """
+        now = time.time() if now is None else now
+
+        for channel, windows in list(self._channels.items()):
+            if all([window.prune(now) for window in windows]):
+                del self._channels[channel]
+
+    def snapshot(self, channel, now=None):
+        """
+        Returns {span: WindowStats} for channel, or None if it had no
+        traffic
+        """
+        windows = self._channels.get(channel)
+
+        if windows is None:
+            return None
+
+        now = time.time() if now is None else now
+        return {window.span: window.snapshot(now) for window in windows}
+
+    async def snapshot_all(self, now=None, chunk=100):
+        """
+        Returns {channel: {span: WindowStats}}, yielding to the event loop
+        every chunk channels
+        """
+        now = time.time() if now is None else now
+        snapshots = {}
+
+        for count, channel in enumerate(list(self._channels), 1):
+            snapshot = self.snapshot(channel, now)
+
+            if snapshot is not None:
+                snapshots[channel] = snapshot
+
+            if count % chunk == 0:
+                await asyncio.sleep(0)
+
+        return snapshots
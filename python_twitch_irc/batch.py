@@ -0,0 +1,101 @@
+import asyncio
+
+# Flush a batch at this many messages or this many seconds after its first
+BATCH_SIZE = 1000
+BATCH_INTERVAL = 1.0
+
+# Columns of the batch delivered for each command
+CLEARCHAT_FIELDS = ('timestamp', 'tags', 'channel', 'user')
+USERNOTICE_FIELDS = ('timestamp', 'tags', 'channel', 'message')
+WHISPER_FIELDS = ('timestamp', 'tags', 'user', 'message')
+MESSAGE_FIELDS = ('timestamp', 'tags', 'channel', 'user', 'message')
+
+
+class Batch:
+    """
+    Messages of one command in columnar form: batch.channel[i],
+    batch.user[i], ... belong to the same message.  Columns are plain lists
+    which can be handed to bulk inserts or numpy.asarray() as they are.
+    """
+    __slots__ = ('command', 'fields', 'columns', '_lists')
+
+    def __init__(self, command, fields):
+        self.command = command
+        self.fields = tuple(fields)
+        self._lists = tuple([] for _ in self.fields)
+        self.columns = dict(zip(self.fields, self._lists))
+
+    def __getattr__(self, name):
+        try:
+            return self.columns[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __len__(self):
+        return len(self._lists[0])
+
+    def __iter__(self):
+        """
+        Rows as tuples in fields order
+        """
+        return zip(*self._lists)
+
+    def __repr__(self):
+        return f"Batch({self.command}, {len(self)} messages)"
+
+    def append(self, *values):
+        for column, value in zip(self._lists, values):
+            column.append(value)
+
+
+class Batcher:
+    """
+    Collects messages per command and calls deliver(batch) once a batch
+    holds size messages or interval seconds after its first message.
+    """
+    def __init__(self, deliver, size=BATCH_SIZE, interval=BATCH_INTERVAL, loop=None):
+        self.size = size
+        self.interval = interval
+
+        self._deliver = deliver
+        self._loop = loop
+        self._batches = {}
+        self._timers = {}
+
+    @property
+    def loop(self):
+        if self._loop is None:
+            self._loop = asyncio.get_event_loop()
+        return self._loop
+
+    def pending(self, command):
+        batch = self._batches.get(command)
+        return len(batch) if batch is not None else 0
+
+    def add(self, command, fields, *values):
+        batch = self._batches.get(command)
+
+        if batch is None:
+            batch = self._batches[command] = Batch(command, fields)
+            self._timers[command] = self.loop.call_later(self.interval, self.flush, command)
+
+        batch.append(*values)
+
+        if len(batch) >= self.size:
+            self.flush(command)
+
+    def flush(self, command=None):
+        """
+        Delivers the batch of command now, or every batch if None
+        """
+        commands = [command] if command is not None else list(self._batches)
+
+        for command in commands:
+            batch = self._batches.pop(command, None)
+            timer = self._timers.pop(command, None)
+
+            if timer is not None:
+                timer.cancel()
+
+            if batch is not None and len(batch):
+                self._deliver(batch)
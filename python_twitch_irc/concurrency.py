@@ -0,0 +1,119 @@
+import asyncio
+import collections
+import logging
+
+LOGGER = logging.getLogger()
+
+# Backpressure policies used when pending handlers reach max_pending
+BLOCK = 'block'
+DROP_OLDEST = 'drop_oldest'
+DROP_NEWEST = 'drop_newest'
+
+
+class HandlerScheduler:
+    """
+    Runs coroutines returned by async overrideables with a global and a
+    per-channel concurrency limit.  With ordered=True handlers for the same
+    channel run one at a time in arrival order.
+
+    Once max_pending handlers are waiting the policy applies:
+    BLOCK calls pause() (the client stops reading from its socket) until the
+    backlog halves and resume() is called, DROP_OLDEST discards the oldest
+    waiting handler and DROP_NEWEST discards the new one.
+    """
+    def __init__(self, max_concurrency=100, channel_concurrency=10, ordered=False,
+                 max_pending=1000, policy=BLOCK, pause=None, resume=None, loop=None):
+        if policy not in (BLOCK, DROP_OLDEST, DROP_NEWEST):
+            raise ValueError(f"Unknown backpressure policy {policy}")
+
+        self.max_concurrency = max_concurrency
+        self.channel_concurrency = 1 if ordered else channel_concurrency
+        self.max_pending = max_pending
+        self.policy = policy
+        self.dropped = 0
+        self.paused = False
+
+        self._pause = pause
+        self._resume = resume
+        self._loop = loop
+        self._pending = collections.deque()
+        self._running = 0
+        self._channel_running = collections.Counter()
+
+    @property
+    def loop(self):
+        if self._loop is None:
+            self._loop = asyncio.get_event_loop()
+        return self._loop
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    @property
+    def running(self):
+        return self._running
+
+    def submit(self, channel, coro):
+        if len(self._pending) >= self.max_pending:
+            if self.policy == DROP_NEWEST:
+                self._drop(coro)
+                return
+            elif self.policy == DROP_OLDEST:
+                self._drop(self._pending.popleft()[1])
+            elif not self.paused:
+                self.paused = True
+                LOGGER.warning(f"{len(self._pending)} handlers pending, pausing reads")
+
+                if self._pause is not None:
+                    self._pause()
+
+        self._pending.append((channel, coro))
+        self._drain()
+
+    def _drop(self, coro):
+        self.dropped += 1
+        coro.close()
+
+    def _drain(self):
+        if not self._pending or self._running >= self.max_concurrency:
+            return
+
+        blocked = []
+
+        while self._pending and self._running < self.max_concurrency:
+            channel, coro = self._pending.popleft()
+
+            if self._channel_running[channel] >= self.channel_concurrency:
+                blocked.append((channel, coro))
+                continue
+
+            self._start(channel, coro)
+
+        # Keep arrival order for handlers waiting on a busy channel
+        self._pending.extendleft(reversed(blocked))
+
+        if self.paused and len(self._pending) <= self.max_pending // 2:
+            self.paused = False
+
+            if self._resume is not None:
+                self._resume()
+
+    def _start(self, channel, coro):
+        self._running += 1
+        self._channel_running[channel] += 1
+
+        task = self.loop.create_task(coro)
+        task.add_done_callback(lambda done: self._finished(channel, done))
+
+    def _finished(self, channel, task):
+        self._running -= 1
+        self._channel_running[channel] -= 1
+
+        if not self._channel_running[channel]:
+            del self._channel_running[channel]
+
+        if not task.cancelled() and task.exception() is not None:
+            LOGGER.error("Async handler failed", exc_info=task.exception())
+
+        self._drain()
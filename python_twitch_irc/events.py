@@ -0,0 +1,184 @@
+from .tags import parse_badges, parse_emotes
+
+
+class TagField:
+    """
+    Lazily converted view of a single tag.  The converted value is cached
+    in the event's '_<name>' slot on first access.
+    """
+    __slots__ = ('key', 'convert', 'default', 'slot')
+
+    def __init__(self, key, convert=str, default=None):
+        self.key = key
+        self.convert = convert
+        self.default = default
+        self.slot = None
+
+    def __set_name__(self, owner, name):
+        self.slot = getattr(owner, f"_{name}")
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+
+        try:
+            return self.slot.__get__(instance, owner)
+        except AttributeError:
+            value = instance.tags.get(self.key)
+
+            if value is None or value is True:
+                value = self.default() if callable(self.default) else self.default
+            else:
+                value = self.convert(value)
+
+            self.slot.__set__(instance, value)
+            return value
+
+
+def _flag(value):
+    return value == '1'
+
+
+def _emote_sets(value):
+    return value.split(',')
+
+
+class TwitchEvent:
+    __slots__ = ('timestamp', 'tags', 'received_at', '_id', '_room_id', '_sent_ts')
+
+    def __init__(self, timestamp, tags):
+        self.timestamp = timestamp
+        self.tags = tags
+
+        # time.monotonic() of the socket read, with TwitchIrc.RECEIVE_TIMESTAMPS
+        self.received_at = None
+
+    id = TagField('id')
+    room_id = TagField('room-id')
+    sent_ts = TagField('tmi-sent-ts', int)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.timestamp}, {getattr(self, 'channel', '')})"
+
+
+class ChatMessage(TwitchEvent):
+    __slots__ = (
+        'channel', 'user', 'message',
+        '_user_id', '_display_name', '_color', '_badges', '_emotes', '_bits', '_mod', '_subscriber',
+    )
+
+    def __init__(self, timestamp, tags, channel, user, message):
+        super().__init__(timestamp, tags)
+        self.channel = channel
+        self.user = user
+        self.message = message
+
+    user_id = TagField('user-id')
+    display_name = TagField('display-name')
+    color = TagField('color')
+    badges = TagField('badges', parse_badges, dict)
+    emotes = TagField('emotes', parse_emotes, list)
+    bits = TagField('bits', int, 0)
+    mod = TagField('mod', _flag, False)
+    subscriber = TagField('subscriber', _flag, False)
+
+
+class UserNotice(TwitchEvent):
+    __slots__ = (
+        'channel', 'message',
+        '_msg_id', '_login', '_user_id', '_display_name', '_system_msg', '_badges', '_emotes',
+    )
+
+    def __init__(self, timestamp, tags, channel, message):
+        super().__init__(timestamp, tags)
+        self.channel = channel
+        self.message = message
+
+    msg_id = TagField('msg-id')
+    login = TagField('login')
+    user_id = TagField('user-id')
+    display_name = TagField('display-name')
+    system_msg = TagField('system-msg')
+    badges = TagField('badges', parse_badges, dict)
+    emotes = TagField('emotes', parse_emotes, list)
+
+    def param(self, name, default=None):
+        """
+        Returns a msg-param-* tag, e.g. param('months')
+        """
+        value = self.tags.get(f"msg-param-{name}")
+        return default if value is None or value is True else value
+
+
+class Whisper(TwitchEvent):
+    __slots__ = (
+        'user', 'message',
+        '_message_id', '_thread_id', '_user_id', '_display_name', '_color', '_badges', '_emotes',
+    )
+
+    def __init__(self, timestamp, tags, user, message):
+        super().__init__(timestamp, tags)
+        self.user = user
+        self.message = message
+
+    message_id = TagField('message-id')
+    thread_id = TagField('thread-id')
+    user_id = TagField('user-id')
+    display_name = TagField('display-name')
+    color = TagField('color')
+    badges = TagField('badges', parse_badges, dict)
+    emotes = TagField('emotes', parse_emotes, list)
+
+
+class RoomState(TwitchEvent):
+    __slots__ = ('channel', '_slow', '_followers_only', '_subs_only', '_emote_only', '_r9k')
+
+    def __init__(self, timestamp, tags, channel):
+        super().__init__(timestamp, tags)
+        self.channel = channel
+
+    slow = TagField('slow', int)
+    followers_only = TagField('followers-only', int)
+    subs_only = TagField('subs-only', _flag)
+    emote_only = TagField('emote-only', _flag)
+    r9k = TagField('r9k', _flag)
+
+
+class UserState(TwitchEvent):
+    __slots__ = ('channel', '_display_name', '_color', '_badges', '_mod', '_emote_sets')
+
+    def __init__(self, timestamp, tags, channel):
+        super().__init__(timestamp, tags)
+        self.channel = channel
+
+    display_name = TagField('display-name')
+    color = TagField('color')
+    badges = TagField('badges', parse_badges, dict)
+    mod = TagField('mod', _flag, False)
+    emote_sets = TagField('emote-sets', _emote_sets, list)
+
+
+class Notice(TwitchEvent):
+    __slots__ = ('channel', 'message', '_msg_id')
+
+    def __init__(self, timestamp, tags, channel, message):
+        super().__init__(timestamp, tags)
+        self.channel = channel
+        self.message = message
+
+    msg_id = TagField('msg-id')
+
+
+class ClearChat(TwitchEvent):
+    """
+    user is None when the whole chat was cleared
+    """
+    __slots__ = ('channel', 'user', '_ban_duration', '_target_user_id')
+
+    def __init__(self, timestamp, tags, channel, user=None):
+        super().__init__(timestamp, tags)
+        self.channel = channel
+        self.user = user
+
+    ban_duration = TagField('ban-duration', int)
+    target_user_id = TagField('target-user-id')
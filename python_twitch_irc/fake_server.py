@@ -0,0 +1,460 @@
+import asyncio
+import collections
+import logging
+import random
+import time
+import uuid
+import zlib
+
+LOGGER = logging.getLogger()
+
+HOST = 'tmi.twitch.tv'
+
+CAPABILITIES = ('twitch.tv/tags', 'twitch.tv/commands', 'twitch.tv/membership')
+
+# Seconds between synthetic chat batches
+TICK = 0.01
+
+WORDS = (
+    'Kappa', 'PogChamp', 'LUL', 'gg', 'wp', 'lol', 'what', 'is', 'this', 'song', 'hype', 'nice',
+    'play', 'again', 'chat', 'when', 'stream', 'tomorrow', 'KEKW', 'monkaS', 'no', 'way',
+)
+
+# Emote ids for the emote words above
+EMOTES = {'Kappa': '25', 'PogChamp': '88', 'LUL': '425618', 'KEKW': '1902', 'monkaS': '56'}
+
+BADGES = ('', 'subscriber/12', 'subscriber/6,bits/100', 'moderator/1', 'vip/1', 'premium/1')
+
+COLORS = ('', '#1E90FF', '#FF4500', '#008000', '#8A2BE2', '#DAA520')
+
+
+def escape_tag_value(value):
+    return (
+        value.replace('\\', '\\\\').replace(';', '\\:').replace(' ', '\\s')
+        .replace('\r', '\\r').replace('\n', '\\n')
+    )
+
+
+def format_line(command, params=(), tags=None, source=HOST):
+    """
+    Builds a raw line (without CRLF).  The last of several params is sent
+    as trailing, as Twitch does.
+    """
+    parts = []
+
+    if tags:
+        parts.append('@' + ';'.join(f"{key}={escape_tag_value(str(value))}" for key, value in tags.items()))
+
+    parts.append(f":{source}")
+    parts.append(command)
+    parts.extend(params[:-1])
+
+    if params:
+        last = str(params[-1])
+        trailing = len(params) > 1 or not last or ' ' in last or last.startswith(':')
+        parts.append(f":{last}" if trailing else last)
+
+    return ' '.join(parts)
+
+
+def user_id(user):
+    return zlib.crc32(user.encode())
+
+
+def user_source(user):
+    return f"{user}!{user}@{user}.{HOST}"
+
+
+class ChatGenerator:
+    """
+    Builds PRIVMSG lines with realistic Twitch tags for random users
+    """
+    def __init__(self, users=1000, seed=None):
+        self.users = users
+        self._random = random.Random(seed)
+
+    def text(self):
+        return ' '.join(self._random.choices(WORDS, k=self._random.randint(1, 12)))
+
+    def emotes(self, text):
+        positions = collections.defaultdict(list)
+        offset = 0
+
+        for word in text.split(' '):
+            if word in EMOTES:
+                positions[EMOTES[word]].append(f"{offset}-{offset + len(word) - 1}")
+            offset += len(word) + 1
+
+        return '/'.join(f"{emote}:{','.join(ranges)}" for emote, ranges in positions.items())
+
+    def user(self):
+        return f"viewer_{self._random.randrange(self.users)}"
+
+    def privmsg(self, channel, room_id, user=None, text=None):
+        user = user or self.user()
+        text = text or self.text()
+        badges = self._random.choice(BADGES)
+
+        tags = {
+            'badge-info': 'subscriber/14' if 'subscriber' in badges else '',
+            'badges': badges,
+            'color': self._random.choice(COLORS),
+            'display-name': user.capitalize(),
+            'emotes': self.emotes(text),
+            'first-msg': 0,
+            'flags': '',
+            'id': uuid.uuid4(),
+            'mod': int('moderator' in badges),
+            'returning-chatter': 0,
+            'room-id': room_id,
+            'subscriber': int('subscriber' in badges),
+            'tmi-sent-ts': int(time.time() * 1000),
+            'turbo': 0,
+            'user-id': user_id(user),
+            'user-type': 'mod' if 'moderator' in badges else '',
+        }
+
+        return format_line('PRIVMSG', (channel, text), tags, user_source(user))
+
+
+class FakeConnection:
+    """
+    A client connected to FakeTwitchServer
+    """
+    def __init__(self, server, reader, writer):
+        self.server = server
+        self.nick = None
+        self.password = None
+        self.capabilities = set()
+        self.channels = set()
+        self.received = []
+
+        self._reader = reader
+        self._writer = writer
+
+    @property
+    def registered(self):
+        return self.nick is not None
+
+    def send(self, line):
+        if not self._writer.transport.is_closing():
+            self._writer.write(line.encode() + b'\r\n')
+
+    def close(self):
+        self._writer.close()
+
+    async def serve(self):
+        try:
+            while True:
+                data = await self._reader.readline()
+                if not data:
+                    break
+
+                line = data.decode('utf-8', 'replace').rstrip('\r\n')
+                if line:
+                    self.received.append(line)
+                    self.handle(line)
+        except ConnectionError:
+            pass
+        finally:
+            self.server._disconnected(self)
+            self.close()
+
+    def handle(self, line):
+        command, _, rest = line.partition(' ')
+        handler = getattr(self, f"on_{command.lower()}", None)
+
+        if handler is not None:
+            handler(rest)
+        elif self.registered:
+            self.send(format_line('421', (self.nick, command, 'Unknown command')))
+
+    def on_cap(self, rest):
+        sub, _, args = rest.partition(' ')
+        sub = sub.upper()
+
+        if sub == 'LS':
+            self.send(format_line('CAP', ('*', 'LS', ' '.join(CAPABILITIES))))
+        elif sub == 'REQ':
+            requested = args.lstrip(':').split()
+
+            if all(cap in CAPABILITIES for cap in requested):
+                self.capabilities.update(requested)
+                self.send(format_line('CAP', ('*', 'ACK', ' '.join(requested))))
+            else:
+                self.send(format_line('CAP', ('*', 'NAK', ' '.join(requested))))
+
+    def on_pass(self, rest):
+        self.password = rest.lstrip(':')
+
+    def on_nick(self, rest):
+        nick = rest.lstrip(':').lower()
+
+        if not self.server.authenticate(nick, self.password):
+            self.send(format_line('NOTICE', ('*', 'Login authentication failed')))
+            self.close()
+            return
+
+        self.nick = nick
+
+        for numeric, text in (
+            ('001', 'Welcome, GLHF!'),
+            ('002', f"Your host is {HOST}"),
+            ('003', 'This server is rather new'),
+            ('004', '-'),
+            ('375', '-'),
+            ('372', 'You are in a maze of twisty passages, all alike.'),
+            ('376', '>'),
+        ):
+            self.send(format_line(numeric, (nick, text)))
+
+    def on_user(self, rest):
+        pass
+
+    def on_ping(self, rest):
+        self.send(format_line('PONG', (HOST, rest.lstrip(':'))))
+
+    def on_join(self, rest):
+        for channel in rest.lstrip(':').split(','):
+            self.server._join(self, channel.lower())
+
+    def on_part(self, rest):
+        for channel in rest.lstrip(':').split(','):
+            self.server._part(self, channel.lower())
+
+    def on_privmsg(self, rest):
+        # Twitch does not echo chat back to its sender, only record it
+        pass
+
+    def on_quit(self, rest):
+        self.close()
+
+
+class FakeTwitchServer:
+    """
+    Asyncio stand-in for Twitch's chat server (TMI) for load and
+    integration testing.  Handles CAP/PASS/NICK registration, JOIN/PART
+    (answered with USERSTATE and ROOMSTATE) and PING, generates synthetic
+    chat in every joined channel at rate messages per second and can
+    inject RECONNECT, CLEARCHAT and USERNOTICE.
+
+        server = await FakeTwitchServer(rate=200).start()
+        client = MyBot('bot', 'token', server.host, server.port).start()
+
+    port=0 picks a free port.  token, when set, is the only accepted PASS.
+    """
+    def __init__(self, host='127.0.0.1', port=0, rate=10.0, users=1000, token=None, seed=None):
+        self.host = host
+        self.port = port
+        self.rate = rate
+        self.token = token
+        self.connections = []
+        self.sent = collections.Counter()
+
+        self._generator = ChatGenerator(users, seed)
+        self._rates = {}
+        self._room_ids = {}
+        self._members = collections.defaultdict(set)
+        self._server = None
+        self._chat = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._accept, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._chat = asyncio.ensure_future(self._run_chat())
+
+        LOGGER.debug(f"Fake Twitch server listening on {self.host}:{self.port}")
+        return self
+
+    async def stop(self):
+        if self._chat is not None:
+            self._chat.cancel()
+            self._chat = None
+
+        for connection in list(self.connections):
+            connection.close()
+
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    def authenticate(self, nick, password):
+        return self.token is None or password == f"oauth:{self.token}"
+
+    def set_rate(self, channel, rate):
+        """
+        Overrides the messages per second generated in channel
+        """
+        self._rates[channel] = rate
+
+    def members(self, channel):
+        return set(self._members.get(channel, ()))
+
+    def room_id(self, channel):
+        if channel not in self._room_ids:
+            self._room_ids[channel] = str(10000000 + len(self._room_ids))
+        return self._room_ids[channel]
+
+    # Injection
+    def broadcast(self, channel, line):
+        """
+        Sends line to every connection in channel
+        """
+        for connection in self._members.get(channel, ()):
+            connection.send(line)
+
+        self.sent[channel] += 1
+
+    def chat(self, channel, user=None, text=None):
+        self.broadcast(channel, self._generator.privmsg(channel, self.room_id(channel), user, text))
+
+    def inject_reconnect(self, connections=None):
+        for connection in connections or list(self.connections):
+            connection.send(format_line('RECONNECT'))
+
+    def inject_clearchat(self, channel, user=None, duration=None):
+        tags = {'room-id': self.room_id(channel), 'tmi-sent-ts': int(time.time() * 1000)}
+
+        if duration is not None:
+            tags['ban-duration'] = duration
+
+        if user is not None:
+            tags['target-user-id'] = user_id(user)
+
+        params = (channel, user) if user is not None else (channel,)
+        self.broadcast(channel, format_line('CLEARCHAT', params, tags))
+
+    def inject_usernotice(self, channel, msg_id='sub', user=None, message=None, **params):
+        """
+        params are sent as msg-param-<name> tags
+        """
+        user = user or self._generator.user()
+        tags = {
+            'badges': 'subscriber/0',
+            'display-name': user.capitalize(),
+            'id': uuid.uuid4(),
+            'login': user,
+            'msg-id': msg_id,
+            'room-id': self.room_id(channel),
+            'system-msg': f"{user.capitalize()} triggered {msg_id}.",
+            'tmi-sent-ts': int(time.time() * 1000),
+        }
+        tags.update({f"msg-param-{name.replace('_', '-')}": value for name, value in params.items()})
+
+        args = (channel, message) if message is not None else (channel,)
+        self.broadcast(channel, format_line('USERNOTICE', args, tags))
+
+    # Connections
+    async def _accept(self, reader, writer):
+        connection = FakeConnection(self, reader, writer)
+        self.connections.append(connection)
+        await connection.serve()
+
+    def _disconnected(self, connection):
+        if connection in self.connections:
+            self.connections.remove(connection)
+
+        for channel in list(connection.channels):
+            self._part(connection, channel, announce=False)
+
+    def _join(self, connection, channel):
+        if not connection.registered or channel in connection.channels:
+            return
+
+        connection.channels.add(channel)
+        self._members[channel].add(connection)
+
+        nick = connection.nick
+        if 'twitch.tv/membership' in connection.capabilities:
+            connection.send(format_line('JOIN', (channel,), source=user_source(nick)))
+            connection.send(format_line('353', (nick, '=', channel, nick), source=f"{nick}.{HOST}"))
+            connection.send(format_line('366', (nick, channel, 'End of /NAMES list'), source=f"{nick}.{HOST}"))
+        else:
+            connection.send(format_line('JOIN', (channel,), source=user_source(nick)))
+
+        if 'twitch.tv/tags' in connection.capabilities:
+            connection.send(format_line(
+                'USERSTATE',
+                (channel,),
+                {'badge-info': '', 'badges': '', 'color': '', 'display-name': nick, 'mod': 0, 'subscriber': 0},
+            ))
+            connection.send(format_line(
+                'ROOMSTATE',
+                (channel,),
+                {
+                    'emote-only': 0,
+                    'followers-only': -1,
+                    'r9k': 0,
+                    'room-id': self.room_id(channel),
+                    'slow': 0,
+                    'subs-only': 0,
+                },
+            ))
+
+    def _part(self, connection, channel, announce=True):
+        if channel not in connection.channels:
+            return
+
+        connection.channels.discard(channel)
+        self._members[channel].discard(connection)
+
+        if not self._members[channel]:
+            del self._members[channel]
+
+        if announce:
+            connection.send(format_line('PART', (channel,), source=user_source(connection.nick)))
+
+    async def _run_chat(self):
+        """
+        Emits rate * elapsed messages per channel every TICK, carrying the
+        fractional part so low rates are exact over time
+        """
+        owed = collections.Counter()
+        last = time.monotonic()
+
+        while True:
+            await asyncio.sleep(TICK)
+            now = time.monotonic()
+            elapsed, last = now - last, now
+
+            for channel in list(self._members):
+                owed[channel] += self._rates.get(channel, self.rate) * elapsed
+                count = int(owed[channel])
+                owed[channel] -= count
+
+                for _ in range(count):
+                    self.chat(channel)
+
+
+async def serve_forever(**kwargs):
+    server = await FakeTwitchServer(**kwargs).start()
+    print(f"Fake Twitch server listening on {server.host}:{server.port}")
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local Twitch IRC server for load testing")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=6667)
+    parser.add_argument('--rate', type=float, default=10.0, help="chat messages per second per channel")
+    parser.add_argument('--users', type=int, default=1000, help="distinct chatters per channel")
+    parser.add_argument('--token', help="only accept this oauth token")
+    args = parser.parse_args()
+
+    try:
+        asyncio.get_event_loop().run_until_complete(serve_forever(**vars(args)))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,64 @@
+import collections
+import sys
+
+# Chatters remembered by UserCache
+USER_CACHE_SIZE = 10000
+
+
+class Chatter:
+    """
+    A chatter's identity, shared by every message they send while cached
+    """
+    __slots__ = ('user_id', 'login', 'display_name', 'color')
+
+    def __init__(self, user_id, login, display_name=None, color=None):
+        self.user_id = user_id
+        self.login = login
+        self.display_name = display_name
+        self.color = color
+
+    def __repr__(self):
+        return f"Chatter({self.user_id!r}, {self.login!r}, {self.display_name!r}, {self.color!r})"
+
+
+class UserCache:
+    """
+    Bounded LRU of user-id -> Chatter.  lookup() returns the cached Chatter
+    (updated in place on a rename or colour change) so repeated messages
+    from a chatter hold the same strings.
+    """
+    def __init__(self, maxsize=USER_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._chatters = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._chatters)
+
+    def __contains__(self, user_id):
+        return user_id in self._chatters
+
+    def get(self, user_id):
+        return self._chatters.get(user_id)
+
+    def lookup(self, user_id, login, display_name=None, color=None):
+        chatter = self._chatters.get(user_id)
+
+        if chatter is None:
+            chatter = Chatter(sys.intern(user_id), sys.intern(login), display_name, color)
+            self._chatters[chatter.user_id] = chatter
+
+            if len(self._chatters) > self.maxsize:
+                self._chatters.popitem(last=False)
+
+            return chatter
+
+        self._chatters.move_to_end(user_id)
+
+        if chatter.login != login:
+            chatter.login = sys.intern(login)
+        if chatter.display_name != display_name:
+            chatter.display_name = display_name
+        if chatter.color != color:
+            chatter.color = color
+
+        return chatter
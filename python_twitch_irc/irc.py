@@ -1,7 +1,34 @@
+import asyncio
+import functools
+import inspect
 import logging
+import sys
+import time
 
-import pendulum
 import pydle
+from pydle.features.ircv3.tags import TaggedMessage
+
+from .analytics import ChatAnalytics
+from .batch import (
+    BATCH_INTERVAL, BATCH_SIZE, CLEARCHAT_FIELDS, MESSAGE_FIELDS, USERNOTICE_FIELDS, WHISPER_FIELDS, Batcher,
+)
+from .concurrency import BLOCK, HandlerScheduler
+from .events import ChatMessage, ClearChat, Notice, RoomState, UserNotice, UserState, Whisper
+from .identity import USER_CACHE_SIZE, UserCache
+from .metrics import ClientMetrics
+from .membership import JOIN_FAILURES, MembershipQueue
+from .outbox import Outbox
+from .parser import parse_line
+from .ratelimit import PRIORITY_MODERATION, PRIORITY_NORMAL, SendScheduler
+from .recorder import Recorder
+from .reconnect import ID_KEY, LINK_TIMEOUT, MessageIdCache, ZeroGapReconnect
+from .routing import Router
+from .snapshot import SNAPSHOT_INTERVAL, Snapshotter
+from .state import StateStore
+from .subscription import Subscription
+from .tags import intern_tags
+from .watchdog import SLOW_HANDLERS, Watchdog
+from .workers import THREAD, WorkerPool, WorkEvent
 
 # Create a featurized client
 BaseIrcClass = pydle.featurize(pydle.features.RFC1459Support, pydle.features.IRCv3Support)
@@ -15,14 +42,214 @@ TWITCH_IRC_PORT = 6667
 MILLI_TO_SECONDS = 1000
 TS_KEY = 'tmi-sent-ts'
 
+# Twitch commands and the raw handlers they dispatch to
+TWITCH_COMMANDS = {
+    'CLEARCHAT': 'on_raw_twitch_clear_chat',
+    'HOSTTARGET': 'on_raw_twitch_host_target',
+    'RECONNECT': 'on_raw_twitch_reconnect_cmd',
+    'ROOMSTATE': 'on_raw_twitch_roomstate',
+    'USERNOTICE': 'on_raw_twitch_usernotice',
+    'USERSTATE': 'on_raw_twitch_userstate',
+    'WHISPER': 'on_raw_twitch_whisper',
+    'NOTICE': 'on_raw_twitch_notice',
+    'PRIVMSG': 'on_raw_twitch_privmsg',
+}
+
+# Typed event callbacks, see events.py
+EVENT_CALLBACKS = (
+    'on_clearchat_event',
+    'on_notice_event',
+    'on_roomstate_event',
+    'on_usernotice_event',
+    'on_userstate_event',
+    'on_whisper_event',
+    'on_message_event',
+)
+
+# Helpers which may be called from other threads through send_many
+SEND_COMMANDS = frozenset({
+    'message', 'whisper', 'action', 'timeout', 'ban', 'unban', 'slow', 'slow_off', 'followers',
+    'followers_off', 'subscribers', 'subscribers_off', 'clear', 'r9kbeta', 'r9kbeta_off', 'emoteonly',
+    'emoteonly_off', 'commercial', 'host', 'unhost', 'mod', 'unmod', 'join', 'part', 'join_many', 'part_many',
+})
+
+# Batch callbacks, see batch.py, and the raw handlers that replace the
+# per message ones once a batch callback is overridden
+BATCH_CALLBACKS = {
+    'CLEARCHAT': ('on_clearchat_batch', 'on_raw_twitch_clear_chat_batch'),
+    'USERNOTICE': ('on_usernotice_batch', 'on_raw_twitch_usernotice_batch'),
+    'WHISPER': ('on_whisper_batch', 'on_raw_twitch_whisper_batch'),
+    'PRIVMSG': ('on_message_batch', 'on_raw_twitch_privmsg_batch'),
+}
+
 
 class TwitchIrc(BaseIrcClass):
+    # Parse PRIVMSG/USERNOTICE/CLEARCHAT with parser.parse_line instead of Pydle
+    FAST_PARSER = False
+
+    # Queue outbound messages through ratelimit.SendScheduler
+    RATE_LIMIT = False
+
+    # Handle RECONNECT with reconnect.ZeroGapReconnect, reconnecting
+    # directly if its link has not joined within ZERO_GAP_TIMEOUT seconds
+    ZERO_GAP_RECONNECT = False
+    ZERO_GAP_TIMEOUT = LINK_TIMEOUT
+
+    # Limits for async overrideables, see concurrency.HandlerScheduler
+    HANDLER_CONCURRENCY = 100
+    CHANNEL_HANDLER_CONCURRENCY = 10
+    ORDERED_CHANNEL_HANDLERS = False
+    MAX_PENDING_HANDLERS = 1000
+    HANDLER_BACKPRESSURE = BLOCK
+
+    # Pass tmi-sent-ts (or the local time) to callbacks in milliseconds
+    # instead of seconds
+    MILLISECOND_TIMESTAMPS = False
+
+    # Record time.monotonic() of the socket read for every message, see
+    # TwitchIrc.received_at and TwitchEvent.received_at
+    RECEIVE_TIMESTAMPS = False
+
+    # Share channel names, tag keys and chatter identities between messages
+    INTERN_STRINGS = False
+    USER_CACHE_SIZE = USER_CACHE_SIZE
+
+    # Record counters and histograms in client.metrics, see metrics.py
+    METRICS = False
+
+    # Sliding window message rates, unique chatters and top emotes per
+    # channel in client.analytics, see analytics.py
+    ANALYTICS = False
+
+    # Directory to record raw lines to, see recorder.py
+    RECORD_DIRECTORY = None
+
+    # Only parse and dispatch chat traffic matching these, see
+    # subscription.Subscription
+    SUBSCRIBE_COMMANDS = None
+    SUBSCRIBE_CHANNELS = None
+    SUBSCRIBE_USERS = None
+    SUBSCRIBE_KEYWORDS = None
+
+    # File to periodically save joined channels, channel state and seen
+    # message ids to, restored on startup, see snapshot.py
+    SNAPSHOT_PATH = None
+    SNAPSHOT_INTERVAL = SNAPSHOT_INTERVAL
+
+    # Batch callbacks are delivered at this many messages or this many
+    # seconds after the first message of the batch
+    BATCH_SIZE = BATCH_SIZE
+    BATCH_INTERVAL = BATCH_INTERVAL
+
+    # Time callbacks and report event loop stalls longer than this many
+    # seconds with the blocking handler's stack, see watchdog.py
+    WATCHDOG_THRESHOLD = None
+    SLOW_HANDLERS = SLOW_HANDLERS
+
+    # Worker pool used by offload(), 'thread' or 'process'
+    EXECUTOR = THREAD
+    EXECUTOR_WORKERS = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._build_dispatch()
+
+    @classmethod
+    def _build_dispatch(cls):
+        """
+        Resolve the raw handler name for each Twitch command once per
+        class, picking up batch handlers.  Handlers are looked up by name
+        when dispatching, so overrides and patches made later still apply
+        """
+        cls._twitch_dispatch = dict(TWITCH_COMMANDS)
+
+        cls._event_callbacks = frozenset(
+            name for name in EVENT_CALLBACKS if getattr(cls, name) is not getattr(TwitchIrc, name)
+        )
+
+        cls._batch_callbacks = {}
+
+        for command, (name, handler) in BATCH_CALLBACKS.items():
+            if getattr(cls, name) is not getattr(TwitchIrc, name):
+                cls._batch_callbacks[command] = name
+                cls._twitch_dispatch[command] = handler
+
     def __init__(self, username, token, server=TWITCH_IRC_SERVER, port=TWITCH_IRC_PORT):
         self._username = username
         self._token = token
         self._server = server
         self._port = port
 
+        # Merged ROOMSTATE/USERSTATE per channel
+        self.state = StateStore()
+        self._scheduler = None
+
+        if self.RATE_LIMIT:
+            self._scheduler = SendScheduler(self._send_message, self.is_mod, self.slow_seconds)
+
+        # Handlers attached per event, channel and chat command
+        self.router = Router()
+
+        # Commands submitted from other threads
+        self._outbox = Outbox(self._send_command, SEND_COMMANDS)
+
+        # Connect task scheduled by start() with async Pydle
+        self._connecting = None
+
+        # Rate limited bulk JOIN/PART
+        self._membership = MembershipQueue(self._send_raw)
+
+        # Zero gap reconnect state
+        self._reconnect = None
+        self._seen_ids = MessageIdCache() if self.ZERO_GAP_RECONNECT or self.SNAPSHOT_PATH else None
+
+        # Warm restart, state is restored right away and the snapshot's
+        # channels are rejoined once registered
+        self.snapshots = None
+        self._restored_channels = []
+
+        if self.SNAPSHOT_PATH:
+            self.snapshots = Snapshotter(self, self.SNAPSHOT_PATH, self.SNAPSHOT_INTERVAL)
+            self._restored_channels = self.snapshots.restore()
+
+        # Created on the first coroutine returned by an overrideable
+        self._handlers = None
+
+        # Worker pool running offload()ed work, see workers.py, and the
+        # work offloaded by command
+        self.workers = None
+        self._offloaded = {}
+
+        # Socket read time of the latest read and of the message being handled
+        self._read_at = None
+        self.received_at = None
+
+        # user-id -> Chatter
+        self.chatters = UserCache(self.USER_CACHE_SIZE) if self.INTERN_STRINGS and self.USER_CACHE_SIZE else None
+
+        self.metrics = ClientMetrics(self) if self.METRICS else None
+        self.watchdog = None
+
+        if self.WATCHDOG_THRESHOLD:
+            self.watchdog = Watchdog(self.WATCHDOG_THRESHOLD, self.SLOW_HANDLERS, self._on_stall)
+        self.analytics = ChatAnalytics() if self.ANALYTICS else None
+
+        # Raw line archive
+        self.recorder = Recorder(self.RECORD_DIRECTORY) if self.RECORD_DIRECTORY else None
+
+        # Raw line filter applied before parsing
+        self.subscription = None
+        criteria = (self.SUBSCRIBE_COMMANDS, self.SUBSCRIBE_CHANNELS, self.SUBSCRIBE_USERS, self.SUBSCRIBE_KEYWORDS)
+
+        if any(criterion is not None for criterion in criteria):
+            self.subscription = Subscription(*criteria)
+
+        # Pending batches for overridden batch callbacks
+        self._batcher = None
+
+        if self._batch_callbacks:
+            self._batcher = Batcher(self._deliver_batch, self.BATCH_SIZE, self.BATCH_INTERVAL)
+
         # Instantiate inherited class
         super().__init__(
             self._username,
@@ -31,16 +258,191 @@ class TwitchIrc(BaseIrcClass):
         )
 
     def start(self):
-        super().connect(
+        self._outbox.bind(asyncio.get_event_loop())
+
+        if self.watchdog is not None:
+            self.watchdog.start()
+
+        # Closed by stop(), started again
+        if self.RECORD_DIRECTORY and self.recorder is None:
+            self.recorder = Recorder(self.RECORD_DIRECTORY)
+
+        self._connect_socket()
+        return self
+
+    def stop(self):
+        self.flush_batches()
+
+        if self.snapshots is not None:
+            self.snapshots.stop()
+
+            try:
+                self.snapshots.save()
+            except OSError:
+                LOGGER.exception(f"Failed to save snapshot {self.snapshots.path}")
+
+        if self.watchdog is not None:
+            self.watchdog.stop()
+
+        # Without waiting for running work, which would block the loop
+        if self.workers is not None:
+            self.workers.shutdown(wait=False)
+            self.workers = None
+
+        # Writes the queued lines and the segment's index, off the loop
+        # as the writer may be far behind
+        if self.recorder is not None:
+            asyncio.get_event_loop().run_in_executor(None, self.recorder.close)
+            self.recorder = None
+
+        return self._disconnect_socket()
+
+    def _connect_socket(self):
+        """
+        Connects, replacing any current connection, without start()'s setup
+        """
+        # Async Pydle returns a coroutine which also starts reading
+        self._connecting = ensure_scheduled(self.connect(
             self._server,
             self._port,
             password=f"oauth:{self._token}",
+        ))
+        return self._connecting
+
+    def _disconnect_socket(self):
+        """
+        Disconnects without stop()'s shutdown
+        """
+        return ensure_scheduled(self.disconnect(True))
+
+    def route(self, event, handler=None, channel=None):
+        """
+        Calls handler(event) for every event of that type ('message',
+        'usernotice', 'whisper', ... see routing.EVENTS), only in channel if
+        given.  Returns a routing.Route for detach(), or is used as a
+        decorator when handler is omitted.
+        """
+        if handler is None:
+            def decorator(handler):
+                self.router.on(event, handler, channel)
+                return handler
+
+            return decorator
+
+        return self.router.on(event, handler, channel)
+
+    def command(self, name, handler=None, channel=None):
+        """
+        Calls handler(event, args) for chat messages starting with the
+        command name (e.g. '!song'), only in channel if given.  Returns a
+        routing.Route for detach(), or is used as a decorator when handler
+        is omitted.
+        """
+        if handler is None:
+            def decorator(handler):
+                self.router.command(name, handler, channel)
+                return handler
+
+            return decorator
+
+        return self.router.command(name, handler, channel)
+
+    def detach(self, route):
+        return self.router.detach(route)
+
+    def send_many(self, commands):
+        """
+        Queues helper calls, [(name, *args)] e.g. ('timeout', channel, user,
+        600), to run on the event loop.  Safe to call from any thread and
+        never blocks.  Returns an outbox.SendHandle per command.
+        """
+        return self._outbox.submit(commands)
+
+    def send_threadsafe(self, name, *args):
+        """
+        send_many for a single command, returns its outbox.SendHandle
+        """
+        return self._outbox.submit([(name,) + args])[0]
+
+    def _send_command(self, name, *args):
+        return getattr(self, name)(*args)
+
+    def flush_batches(self):
+        """
+        Delivers every pending batch without waiting for BATCH_SIZE or
+        BATCH_INTERVAL
+        """
+        if self._batcher is not None:
+            self._batcher.flush()
+
+    def is_mod(self, channel):
+        return self.state.is_mod(channel)
+
+    def slow_seconds(self, channel):
+        return self.state.slow_seconds(channel)
+
+    def join_many(self, channels, progress=None):
+        """
+        Joins channels using as few JOIN lines as possible within Twitch's
+        join rate limit.  Returns a MembershipRequest which can be awaited
+        and is complete once every channel sent ROOMSTATE (or failed).
+        """
+        return self._membership.join(
+            [channel for channel in channels if not self.in_channel(channel)],
+            progress,
         )
 
-        return self
+    def part_many(self, channels, progress=None):
+        return self._membership.part(
+            [channel for channel in channels if self.in_channel(channel)],
+            progress,
+        )
 
-    def stop(self):
-        self.disconnect(True)
+    def raw(self, message):
+        if self.metrics is not None:
+            self.metrics.bytes_sent.inc(amount=len(message.encode(self.encoding or 'utf-8')))
+
+        return super().raw(message)
+
+    def on_disconnect(self, expected):
+        if self.metrics is not None and not expected:
+            self.metrics.reconnects.inc('disconnect')
+
+        return super().on_disconnect(expected)
+
+    def _send_raw(self, line):
+        return ensure_scheduled(self.raw(f"{line}\r\n"))
+
+    def _send_message(self, target, message):
+        return super().message(target, message)
+
+    def _submit(self, channel, message, priority=PRIORITY_NORMAL, key=None, whisper_to=None):
+        """
+        Sends through the rate limiter when enabled, returning a future
+        which resolves once the line is written
+        """
+        if self._scheduler is None:
+            return self._send_message(channel, message)
+
+        return self._scheduler.submit(channel, message, priority=priority, key=key, whisper_to=whisper_to)
+
+    def _moderate(self, channel, message, key=None, field=None, value=None):
+        """
+        Sends a moderation command.  If field is given and the channel's
+        known state already has value for it nothing is sent and None is
+        returned.
+        """
+        if field is not None:
+            state = self.state.get(channel)
+
+            if state is not None and state.known and getattr(state, field) == value:
+                LOGGER.debug(f"Skipping {message} in {channel}, {field} is already {value}")
+                return None
+
+        if self._scheduler is None:
+            return self.message(channel, message)
+
+        return self._submit(channel, message, PRIORITY_MODERATION, key=key)
 
     def whisper(self, user, message):
         """
@@ -51,119 +453,434 @@ class TwitchIrc(BaseIrcClass):
         if user[0] == '#':
             LOGGER.warning(f"Whisper is for users only.")
         else:
-            super().message('#jtv', f".w {user} {message}")
+            return self._submit('#jtv', f".w {user} {message}", whisper_to=user)
 
     def message(self, target, message):
         if target[0] == '#':
-            super().message(target, message)
+            return self._submit(target, message)
         else:
-            self.whisper(target, message)
+            return self.whisper(target, message)
 
     def action(self, target, message):
         if target[0] == '#':
-            self.message(target, f"\x01ACTION {message}\x01")
+            return self.message(target, f"\x01ACTION {message}\x01")
         else:  # Again, gimmicky
-            self.whisper(target, f"/me {message}")
+            return self.whisper(target, f"/me {message}")
 
     def timeout(self, channel, user, seconds, reason=None):
         reason = reason or ''
 
-        self.message(channel, f".timeout {user} {seconds} {reason}")
+        return self._moderate(channel, f".timeout {user} {seconds} {reason}", ('user', channel, user))
 
     def ban(self, channel, user, reason=None):
         reason = reason or ''
 
-        self.message(channel, f".ban {user} {reason}")
+        return self._moderate(channel, f".ban {user} {reason}", ('user', channel, user))
 
     def unban(self, channel, user):
-        self.message(channel, f".unban {user}")
+        return self._moderate(channel, f".unban {user}", ('user', channel, user))
 
     def slow(self, channel, seconds):
-        self.message(channel, f".slow {seconds}")
+        return self._moderate(channel, f".slow {seconds}", ('slow', channel), 'slow', int(seconds))
 
     def slow_off(self, channel):
-        self.message(channel, ".slowoff")
+        return self._moderate(channel, ".slowoff", ('slow', channel), 'slow', 0)
 
     def followers(self, channel, restrict):
-        self.message(channel, f".followers {restrict}")
+        # Twitch reports follower mode in minutes, other units are always sent
+        minutes = int(restrict) if str(restrict).isdigit() else None
+        field = 'followers_only' if minutes is not None else None
+
+        return self._moderate(channel, f".followers {restrict}", ('followers', channel), field, minutes)
 
     def followers_off(self, channel):
-        self.message(channel, ".followersoff")
+        return self._moderate(channel, ".followersoff", ('followers', channel), 'followers_only', -1)
 
     def subscribers(self, channel):
-        self.message(channel, ".subscribers")
+        return self._moderate(channel, ".subscribers", ('subscribers', channel), 'subs_only', True)
 
     def subscribers_off(self, channel):
-        self.message(channel, ".subscribersoff")
+        return self._moderate(channel, ".subscribersoff", ('subscribers', channel), 'subs_only', False)
 
     def clear(self, channel):
-        self.message(channel, f".clear")
+        return self._moderate(channel, f".clear", ('clear', channel))
 
     def r9kbeta(self, channel):
-        self.message(channel, f".r9kbeta")
+        return self._moderate(channel, f".r9kbeta", ('r9kbeta', channel), 'r9k', True)
 
     def r9kbeta_off(self, channel):
-        self.message(channel, f".r9kbetaoff")
+        return self._moderate(channel, f".r9kbetaoff", ('r9kbeta', channel), 'r9k', False)
 
     def emoteonly(self, channel):
-        self.message(channel, f".emoteonly")
+        return self._moderate(channel, f".emoteonly", ('emoteonly', channel), 'emote_only', True)
 
     def emoteonly_off(self, channel):
-        self.message(channel, f".emoteonlyoff")
+        return self._moderate(channel, f".emoteonlyoff", ('emoteonly', channel), 'emote_only', False)
 
     def commercial(self, channel, seconds=30):
-        self.message(channel, f".commercial {seconds}")
+        return self.message(channel, f".commercial {seconds}")
 
     def host(self, channel, target):
-        self.message(channel, f".host {target}")
+        return self.message(channel, f".host {target}")
 
     def unhost(self, channel):
-        self.message(channel, f".unhost")
+        return self.message(channel, f".unhost")
 
     def mod(self, channel, user):
-        self.message(channel, f".mod {user}")
+        return self._moderate(channel, f".mod {user}", ('mod', channel, user))
 
     def unmod(self, channel, user):
-        self.message(channel, f".unmod {user}")
+        return self._moderate(channel, f".unmod {user}", ('mod', channel, user))
+
+    def on_data(self, data):
+        if self.RECEIVE_TIMESTAMPS:
+            self._read_at = time.monotonic()
+
+        return super().on_data(data)
+
+    def _has_message(self):
+        if self.subscription is not None:
+            self._skip_unsubscribed()
+
+        return super()._has_message()
+
+    def _skip_unsubscribed(self):
+        """
+        Drops the complete lines at the start of the receive buffer which do
+        not match the subscription, so they are never parsed
+        """
+        buffer = self._receive_buffer
+        match = self.subscription.match
+        pos = 0
+
+        while True:
+            end = buffer.find(b'\n', pos)
+
+            if end == -1 or match(buffer[pos:end]):
+                break
+
+            pos = end + 1
+
+        if pos:
+            if self.metrics is not None:
+                self.metrics.bytes_received.inc(amount=pos)
+
+            self._receive_buffer = buffer[pos:]
+
+    def _parse_message(self):
+        if self.RECEIVE_TIMESTAMPS:
+            message = self._read_message()
+            message.received_at = self._read_at
+            return message
+
+        return self._read_message()
+
+    def _read_message(self):
+        if not self.FAST_PARSER and self.recorder is None and self.metrics is None:
+            return super()._parse_message()
+
+        line, _, self._receive_buffer = self._receive_buffer.partition(b'\n')
+
+        if self.metrics is not None:
+            self.metrics.bytes_received.inc(amount=len(line) + 1)
+
+        if line.endswith(b'\r'):
+            line = line[:-1]
+
+        if self.recorder is not None:
+            self.recorder.record(line)
+
+        return self._parse_line(line)
+
+    def _parse_line(self, line):
+        encoding = self.encoding or 'utf-8'
+        message = None
+
+        if self.FAST_PARSER:
+            message = parse_line(line, encoding, intern=self.INTERN_STRINGS)
+        if message is None:
+            message = TaggedMessage.parse(line + b'\n', encoding=encoding)
+
+        return message
+
+    def _replay_line(self, line):
+        """
+        Dispatches a recorded line (without CRLF) to the Twitch handlers
+        """
+        message = self._parse_line(line)
+
+        if message.command in self._twitch_dispatch:
+            self._on_handle_twitch(message)
 
     def on_unknown(self, message):
         self._on_handle_twitch(message)
 
     def _on_handle_twitch(self, message):
-        cmd_to_func = {
-            'CLEARCHAT': self.on_raw_twitch_clear_chat,
-            'HOSTTARGET': self.on_raw_twitch_host_target,
-            'RECONNECT': self.on_raw_twitch_reconnect_cmd,
-            'ROOMSTATE': self.on_raw_twitch_roomstate,
-            'USERNOTICE': self.on_raw_twitch_usernotice,
-            'USERSTATE': self.on_raw_twitch_userstate,
-            'WHISPER': self.on_raw_twitch_whisper,
-            'NOTICE': self.on_raw_twitch_notice,
-            'PRIVMSG': self.on_raw_twitch_privmsg,
-        }
+        name = self._twitch_dispatch.get(message.command)
+
+        if name is None:
+            super().on_unknown(message)
+            return
+
+        funct = getattr(self, name)
+
+        tags = message.tags
+
+        # Drop messages already delivered by the other connection
+        # during a zero gap reconnect
+        if self._seen_ids is not None:
+            message_id = tags.get(ID_KEY)
+
+            if message_id is not None and self._seen_ids.seen(message_id):
+                return
+
+        # Generate the timestamp if not included
+        # in provided tags
+        if self.MILLISECOND_TIMESTAMPS:
+            ts = int(tags[TS_KEY]) if TS_KEY in tags else int(time.time() * 1000)
+        elif TS_KEY in tags:
+            ts = from_twitch_ts(tags[TS_KEY])
+        else:
+            ts = int(time.time())
+
+        if self.RECEIVE_TIMESTAMPS:
+            self.received_at = getattr(message, 'received_at', None)
+
+        if self.INTERN_STRINGS:
+            params = message.params
+
+            if params and params[0][:1] == '#':
+                params[0] = sys.intern(params[0])
+
+            # Pydle builds a new dict with new keys for every message
+            if type(tags) is dict and tags:
+                tags = message.tags = intern_tags(tags)
+
+        if self.metrics is not None:
+            self._record_message(message)
+
+        if self._offloaded:
+            jobs = self._offloaded.get(message.command)
+
+            if jobs:
+                self._offload(ts, message, jobs)
+
+        # Call handler
+        if LOGGER.isEnabledFor(logging.DEBUG):
+            LOGGER.debug("%s %s %s %s", ts, tags, message.command, message.params)
+
+        watchdog = self.watchdog
+
+        if watchdog is None:
+            funct(ts, message)
+            return
+
+        params = message.params
+        watchdog.dispatching(message.command, params[0] if params and params[0][:1] == '#' else None)
 
         try:
-            funct = cmd_to_func[message.command]
+            funct(ts, message)
+        finally:
+            watchdog.dispatching(None, None)
 
-            # Generate the timestamp if not included
-            # in provided tags
-            if TS_KEY in message.tags:
-                ts = from_twitch_ts(message.tags[TS_KEY])
+    def _invoke(self, channel, callback, *args):
+        """
+        Calls an overrideable, scheduling the coroutine returned by
+        async def overrides
+        """
+        watchdog = self.watchdog
+
+        if self.metrics is None:
+            result = callback(*args) if watchdog is None else watchdog.call(channel, callback, *args)
+        else:
+            start = time.perf_counter()
+            result = callback(*args) if watchdog is None else watchdog.call(channel, callback, *args)
+            elapsed = time.perf_counter() - start
+
+            if result is not None and inspect.iscoroutine(result):
+                result = self._timed(callback.__name__, result, elapsed)
             else:
-                ts = pendulum.now().int_timestamp
+                self.metrics.callback_seconds.observe(elapsed, callback.__name__)
+
+        if result is not None and inspect.iscoroutine(result):
+            if self._handlers is None:
+                self._handlers = HandlerScheduler(
+                    self.HANDLER_CONCURRENCY,
+                    self.CHANNEL_HANDLER_CONCURRENCY,
+                    self.ORDERED_CHANNEL_HANDLERS,
+                    self.MAX_PENDING_HANDLERS,
+                    self.HANDLER_BACKPRESSURE,
+                    pause=lambda: self._set_reading(False),
+                    resume=lambda: self._set_reading(True),
+                )
+
+            self._handlers.submit(channel, result)
+
+    def _emit(self, channel, name, callback, event):
+        """
+        Delivers a typed event to its event callback, if overridden, and to
+        the routes attached for it
+        """
+        event.received_at = self.received_at
 
-            # Call handler
-            LOGGER.debug(f"{ts} {message.tags} {message.command} {message.params}")
-            funct(ts, message)
-        except KeyError:
-            super().on_unknown(message)
+        if callback in self._event_callbacks:
+            self._invoke(channel, getattr(self, callback), event)
+
+        router = self.router
+        if not router:
+            return
+
+        for handler in router.handlers(name, channel):
+            self._invoke(channel, handler, event)
+
+        if name == 'message':
+            found = router.command_for(channel, event.message)
+
+            if found is not None:
+                handlers, args = found
+
+                for handler in handlers:
+                    self._invoke(channel, handler, event, args)
+
+    def _on_stall(self, stall):
+        """
+        Called on the loop by the watchdog once a reported stall ended
+        """
+        if self.metrics is not None:
+            self.metrics.stalls.inc(stall.command or '')
+            self.metrics.stall_seconds.observe(stall.seconds)
+
+        self._invoke(stall.channel, self.on_loop_stall, stall)
+
+    def _deliver_batch(self, batch):
+        self._invoke(None, getattr(self, self._batch_callbacks[batch.command]), batch)
+
+    async def _timed(self, name, coro, elapsed):
+        """
+        Awaits an async overrideable, recording the time it ran for
+        (excluding time spent waiting for a free handler slot)
+        """
+        start = time.perf_counter()
+
+        try:
+            return await coro
+        finally:
+            self.metrics.callback_seconds.observe(elapsed + time.perf_counter() - start, name)
+
+    def _record_message(self, message):
+        params = message.params
+        channel = params[0] if params and params[0][:1] == '#' else ''
+        self.metrics.messages.inc(message.command, channel)
+
+        sent = message.tags.get(TS_KEY)
+        if sent is not None and sent is not True:
+            self.metrics.lag_seconds.observe(max(0.0, time.time() - int(sent) / MILLI_TO_SECONDS))
+
+    def offload(self, command, func, callback=None):
+        """
+        Runs func(event) on the worker pool for every message of command,
+        with event a workers.WorkEvent.  Messages for a channel always run
+        on the same worker, in order.  callback(event, result) is called
+        back on the event loop so it can use message/timeout/etc.
+
+        With EXECUTOR = 'process', func must be a module level function.
+        """
+        if self.workers is None:
+            self.workers = WorkerPool(self.EXECUTOR, self.EXECUTOR_WORKERS)
+
+        self._offloaded.setdefault(command, []).append((func, callback))
+
+    def _offload(self, timestamp, message, jobs):
+        event = self._work_event(timestamp, message)
+        loop = asyncio.get_event_loop()
+
+        # Shut down by stop(), started again
+        if self.workers is None:
+            self.workers = WorkerPool(self.EXECUTOR, self.EXECUTOR_WORKERS)
+
+        for func, callback in jobs:
+            future = asyncio.wrap_future(self.workers.submit(event.channel, func, event), loop=loop)
+            future.add_done_callback(functools.partial(self._offload_done, event, callback))
+
+    def _offload_done(self, event, callback, future):
+        if future.cancelled():
+            return
+
+        if future.exception() is not None:
+            LOGGER.error(f"Offloaded {event.command} work failed", exc_info=future.exception())
+        elif callback is not None:
+            self._invoke(event.channel, callback, event, future.result())
+
+    def _work_event(self, timestamp, message):
+        params = message.params
+        command = message.command
+
+        if command == 'WHISPER':
+            channel = None
+        else:
+            channel = params[0] if params else None
+
+        if command in {'PRIVMSG', 'WHISPER'}:
+            user = parse_user(message.source)
+        else:
+            user = message.tags.get('login')
+
+        return WorkEvent(
+            command,
+            timestamp,
+            channel,
+            user,
+            params[1] if len(params) > 1 else '',
+            dict(message.tags),
+        )
+
+    def _analyze(self, message):
+        tags = message.tags
+        self.analytics.add(message.params[0], tags.get('user-id'), tags.get('emotes'), message.params[1])
+
+    def _login(self, message):
+        """
+        The sender's login, shared with their earlier messages through the
+        user cache
+        """
+        login = parse_user(message.source)
+
+        if self.chatters is None:
+            return login
+
+        tags = message.tags
+        user_id = tags.get('user-id')
+
+        if not user_id or user_id is True:
+            return login
+
+        return self.chatters.lookup(user_id, login, tags.get('display-name'), tags.get('color')).login
+
+    def _set_reading(self, enabled):
+        """
+        Pauses or resumes reading from the socket
+        """
+        transport = getattr(getattr(self.connection, 'writer', None), 'transport', None)
+
+        if transport is None:
+            LOGGER.warning("Connection does not support pausing reads")
+        elif enabled:
+            transport.resume_reading()
+        else:
+            transport.pause_reading()
 
     # Raw Capabilities
     def on_raw_twitch_clear_chat(self, timestamp, message):
-        if len(message.params) > 1:
-            self.on_channel_ban(timestamp, message.tags, message.params[0], message.params[1])
+        channel = message.params[0]
+        user = message.params[1] if len(message.params) > 1 else None
+
+        if user is not None:
+            self._invoke(channel, self.on_channel_ban, timestamp, message.tags, channel, user)
         else:
-            self.on_cleared_chat(timestamp, message.tags, message.params[0])
+            self._invoke(channel, self.on_cleared_chat, timestamp, message.tags, channel)
+
+        if self.router or 'on_clearchat_event' in self._event_callbacks:
+            self._emit(channel, 'clearchat', 'on_clearchat_event', ClearChat(timestamp, message.tags, channel, user))
 
     def on_raw_twitch_host_target(self, timestamp, message):
         host = message.params[0].split('#')[1]
@@ -172,63 +889,170 @@ class TwitchIrc(BaseIrcClass):
         viewers = int(params[1]) if params[1] != '-' else 0
 
         if hostee == '-':
-            self.on_stop_hosting(timestamp, host, viewers)
+            self._invoke(message.params[0], self.on_stop_hosting, timestamp, host, viewers)
         else:
-            self.on_hosting(timestamp, host, hostee, viewers)
+            self._invoke(message.params[0], self.on_hosting, timestamp, host, hostee, viewers)
 
     def on_raw_twitch_reconnect_cmd(self, timestamp, message):
-        LOGGER.debug(f"RECONNECT command received {pendulum.from_timestamp(timestamp)}")
+        LOGGER.debug(f"RECONNECT command received at {timestamp}")
+
+        if self.metrics is not None:
+            self.metrics.reconnects.inc('reconnect_cmd')
+
+        if self.ZERO_GAP_RECONNECT and self._reconnect is None:
+            self._reconnect = ZeroGapReconnect(self, ReconnectLink, self.ZERO_GAP_TIMEOUT)
+            self._reconnect.start()
 
         # Call overrideable
-        self.on_reconnect_cmd(timestamp)
+        self._invoke(None, self.on_reconnect_cmd, timestamp)
 
     def on_raw_twitch_roomstate(self, timestamp, message):
-        self.on_roomstate(
+        channel = message.params[0]
+        self._membership.confirm_join(channel)
+        self.state.update_room(channel, message.tags)
+
+        self._invoke(
+            channel,
+            self.on_roomstate,
             timestamp,
             message.tags,
-            message.params[0],
+            channel,
         )
 
+        if self.router or 'on_roomstate_event' in self._event_callbacks:
+            self._emit(channel, 'roomstate', 'on_roomstate_event', RoomState(timestamp, message.tags, channel))
+
     def on_raw_twitch_usernotice(self, timestamp, message):
-        self.on_usernotice(
+        channel = message.params[0]
+        text = message.params[1] if len(message.params) > 1 else ''
+
+        self._invoke(
+            channel,
+            self.on_usernotice,
             timestamp,
             message.tags,
-            message.params[0],
-            message.params[1] if len(message.params) > 1 else '',
+            channel,
+            text,
         )
 
+        if self.router or 'on_usernotice_event' in self._event_callbacks:
+            event = UserNotice(timestamp, message.tags, channel, text)
+            self._emit(channel, 'usernotice', 'on_usernotice_event', event)
+
     def on_raw_twitch_userstate(self, timestamp, message):
-        self.on_userstate(
+        channel = message.params[0]
+        self.state.update_user(channel, message.tags)
+
+        self._invoke(
+            channel,
+            self.on_userstate,
             timestamp,
             message.tags,
-            message.params[0],
+            channel,
         )
 
+        if self.router or 'on_userstate_event' in self._event_callbacks:
+            self._emit(channel, 'userstate', 'on_userstate_event', UserState(timestamp, message.tags, channel))
+
     def on_raw_twitch_whisper(self, timestamp, message):
-        self.on_whisper(
+        user = self._login(message)
+
+        self._invoke(
+            None,
+            self.on_whisper,
             timestamp,
             message.tags,
-            parse_user(message.source),
+            user,
             message.params[1],
         )
 
+        if self.router or 'on_whisper_event' in self._event_callbacks:
+            event = Whisper(timestamp, message.tags, user, message.params[1])
+            self._emit(None, 'whisper', 'on_whisper_event', event)
+
     def on_raw_twitch_notice(self, timestamp, message):
-        self.on_notice(
+        msg_id = message.tags.get('msg-id')
+
+        if msg_id in JOIN_FAILURES:
+            self._membership.fail(message.params[0], msg_id)
+
+        channel = message.params[0]
+
+        self._invoke(
+            channel,
+            self.on_notice,
             timestamp,
             message.tags,
-            message.params[0],
+            channel,
             message.params[1],
         )
 
+        if self.router or 'on_notice_event' in self._event_callbacks:
+            event = Notice(timestamp, message.tags, channel, message.params[1])
+            self._emit(channel, 'notice', 'on_notice_event', event)
+
     def on_raw_twitch_privmsg(self, timestamp, message):
-        self.on_message(
+        channel = message.params[0]
+        user = self._login(message)
+
+        if self.analytics is not None:
+            self._analyze(message)
+
+        self._invoke(
+            channel,
+            self.on_message,
             timestamp,
             message.tags,
-            message.params[0],
-            parse_user(message.source),
+            channel,
+            user,
             message.params[1],
         )
 
+        if self.router or 'on_message_event' in self._event_callbacks:
+            event = ChatMessage(timestamp, message.tags, channel, user, message.params[1])
+            self._emit(channel, 'message', 'on_message_event', event)
+
+    # Raw Batch Capabilities
+    # Replace the handlers above for commands with an overridden batch
+    # callback, events and routes are still delivered per message
+    def on_raw_twitch_clear_chat_batch(self, timestamp, message):
+        params = message.params
+        user = params[1] if len(params) > 1 else None
+        self._batcher.add('CLEARCHAT', CLEARCHAT_FIELDS, timestamp, message.tags, params[0], user)
+
+        if self.router or 'on_clearchat_event' in self._event_callbacks:
+            event = ClearChat(timestamp, message.tags, params[0], user)
+            self._emit(params[0], 'clearchat', 'on_clearchat_event', event)
+
+    def on_raw_twitch_usernotice_batch(self, timestamp, message):
+        params = message.params
+        text = params[1] if len(params) > 1 else ''
+        self._batcher.add('USERNOTICE', USERNOTICE_FIELDS, timestamp, message.tags, params[0], text)
+
+        if self.router or 'on_usernotice_event' in self._event_callbacks:
+            event = UserNotice(timestamp, message.tags, params[0], text)
+            self._emit(params[0], 'usernotice', 'on_usernotice_event', event)
+
+    def on_raw_twitch_whisper_batch(self, timestamp, message):
+        user = self._login(message)
+        self._batcher.add('WHISPER', WHISPER_FIELDS, timestamp, message.tags, user, message.params[1])
+
+        if self.router or 'on_whisper_event' in self._event_callbacks:
+            event = Whisper(timestamp, message.tags, user, message.params[1])
+            self._emit(None, 'whisper', 'on_whisper_event', event)
+
+    def on_raw_twitch_privmsg_batch(self, timestamp, message):
+        params = message.params
+        user = self._login(message)
+
+        if self.analytics is not None:
+            self._analyze(message)
+        self._batcher.add('PRIVMSG', MESSAGE_FIELDS, timestamp, message.tags, params[0], user, params[1])
+
+        if self.router or 'on_message_event' in self._event_callbacks:
+            event = ChatMessage(timestamp, message.tags, params[0], user, params[1])
+            self._emit(params[0], 'message', 'on_message_event', event)
+
     # Capabilities
     # These cause the client to request the twitch capabilities
     def on_capability_twitch_tv_membership_available(self, value):
@@ -267,6 +1091,65 @@ class TwitchIrc(BaseIrcClass):
         """
         self._on_handle_twitch(message)
 
+    def on_raw_376(self, message):
+        """
+        End of MOTD, registration is complete
+        """
+        result = super().on_raw_376(message)
+
+        if self._reconnect is not None:
+            self._reconnect.client_ready()
+
+        self._rejoin_restored()
+
+        if self.snapshots is not None:
+            self.snapshots.start()
+
+        return result
+
+    def _rejoin_restored(self):
+        """
+        Rejoins the channels of the restored snapshot (or of an abandoned
+        zero gap reconnect).  The live ROOMSTATE and USERSTATE replies
+        replace the restored state, channels which could not be joined are
+        dropped.
+        """
+        channels, self._restored_channels = self._restored_channels, []
+
+        if not channels:
+            return None
+
+        request = self.join_many(channels)
+        request.future.add_done_callback(self._reconcile_restored)
+        return request
+
+    def _reconcile_restored(self, future):
+        if future.cancelled():
+            return
+
+        if future.exception() is not None:
+            LOGGER.error("Failed to rejoin restored channels", exc_info=future.exception())
+            return
+
+        request = future.result()
+
+        for channel in request.failed:
+            LOGGER.warning(f"Dropping restored channel {channel}: {request.failed[channel]}")
+            self.state.remove(channel)
+
+        if self.snapshots is not None:
+            self.snapshots.save_soon()
+
+    def on_raw_part(self, message):
+        """
+        Confirm parts requested through part_many
+        """
+        if message.source and parse_user(message.source) == self._username.lower():
+            self._membership.confirm_part(message.params[0])
+            self.state.remove(message.params[0])
+
+        return super().on_raw_part(message)
+
     def on_raw_privmsg(self, message):
         """
         Pydle does not returns tags so override on_raw_privmsg
@@ -309,6 +1192,72 @@ class TwitchIrc(BaseIrcClass):
     def on_message(self, timestamp, tags, channel, user, message):
         pass
 
+    # Event Overrideables
+    # Only called (and their events only built) when overridden by a subclass
+    def on_clearchat_event(self, event):
+        pass
+
+    def on_notice_event(self, event):
+        pass
+
+    def on_roomstate_event(self, event):
+        pass
+
+    def on_usernotice_event(self, event):
+        pass
+
+    def on_userstate_event(self, event):
+        pass
+
+    def on_whisper_event(self, event):
+        pass
+
+    def on_message_event(self, event):
+        pass
+
+    # Batch Overrideables
+    # Overriding one delivers that command in batches only, see batch.Batch
+    def on_clearchat_batch(self, batch):
+        pass
+
+    def on_usernotice_batch(self, batch):
+        pass
+
+    def on_whisper_batch(self, batch):
+        pass
+
+    def on_message_batch(self, batch):
+        pass
+
+    # Called once an event loop stall reported by the watchdog ended,
+    # see watchdog.Stall
+    def on_loop_stall(self, stall):
+        pass
+
+
+TwitchIrc._build_dispatch()
+
+
+class ReconnectLink(TwitchIrc):
+    """
+    Temporary connection opened by ZeroGapReconnect.  Messages carrying an
+    id are handed to the primary client, which deduplicates them.
+    """
+    _primary = None
+    _on_ready = None
+
+    def _on_handle_twitch(self, message):
+        if ID_KEY in message.tags:
+            self._primary._on_handle_twitch(message)
+        elif message.command in {'ROOMSTATE', 'NOTICE'}:
+            # Needed to confirm joins
+            super()._on_handle_twitch(message)
+
+    def on_raw_376(self, message):
+        result = super().on_raw_376(message)
+        self._on_ready()
+        return result
+
 
 # Utility
 def from_twitch_ts(ts):
@@ -317,3 +1266,12 @@ def from_twitch_ts(ts):
 
 def parse_user(source):
     return source.split('!')[0]
+
+
+def ensure_scheduled(result):
+    """
+    Pydle's coroutine based API returns awaitables, schedule them
+    """
+    if inspect.isawaitable(result):
+        return asyncio.ensure_future(result)
+    return result
@@ -0,0 +1,223 @@
+import asyncio
+import collections
+import logging
+import time
+
+from .ratelimit import TokenBucket
+
+LOGGER = logging.getLogger()
+
+# Join attempts as (channels, seconds), see https://dev.twitch.tv/docs/irc/guide
+JOIN_LIMIT = (20, 10)
+
+# IRC line limit including the trailing CRLF
+MAX_LINE_LENGTH = 512
+
+# Seconds to wait for a ROOMSTATE before a join is considered failed
+JOIN_TIMEOUT = 30.0
+
+# NOTICE msg-ids which mean a join was refused
+JOIN_FAILURES = frozenset({
+    'msg_banned',
+    'msg_channel_blocked',
+    'msg_channel_suspended',
+    'tos_ban',
+    'invalid_user',
+})
+
+
+def pack_channels(command, channels, limit=MAX_LINE_LENGTH):
+    """
+    Packs channels into as few '<command> #a,#b,...' lines as fit in limit
+    bytes (including CRLF).  Returns a list of (line, channels) pairs.
+    """
+    prefix = len(command) + 1
+    lines = []
+    chunk = []
+    size = prefix + 2
+
+    for channel in channels:
+        length = len(channel.encode()) + (1 if chunk else 0)
+
+        if chunk and size + length > limit:
+            lines.append((f"{command} {','.join(chunk)}", chunk))
+            chunk = []
+            size = prefix + 2
+            length -= 1
+
+        chunk.append(channel)
+        size += length
+
+    if chunk:
+        lines.append((f"{command} {','.join(chunk)}", chunk))
+
+    return lines
+
+
+class MembershipRequest:
+    """
+    Tracks a join_many/part_many call.  future resolves with the request
+    once every channel has been confirmed or failed; progress (if given) is
+    called with the request after every change.
+    """
+    def __init__(self, channels, loop, progress=None):
+        self.channels = list(channels)
+        self.pending = set(self.channels)
+        self.completed = set()
+        self.failed = {}
+        self.future = loop.create_future()
+        self._progress = progress
+
+        if not self.pending:
+            self.future.set_result(self)
+
+    @property
+    def done(self):
+        return not self.pending
+
+    def _update(self, channel, reason=None):
+        if channel not in self.pending:
+            return
+
+        self.pending.discard(channel)
+
+        if reason is None:
+            self.completed.add(channel)
+        else:
+            self.failed[channel] = reason
+
+        if self._progress is not None:
+            self._progress(self)
+
+        if not self.pending and not self.future.done():
+            self.future.set_result(self)
+
+    def __await__(self):
+        return self.future.__await__()
+
+    def __repr__(self):
+        return (
+            f"MembershipRequest(completed={len(self.completed)}, "
+            f"failed={len(self.failed)}, pending={len(self.pending)})"
+        )
+
+
+class MembershipQueue:
+    """
+    Sends JOIN/PART lines for queued channels within Twitch's join limit.
+    send(line) writes a raw line.  bucket may be shared between queues
+    whose connections use the same account.
+    """
+    def __init__(self, send, loop=None, clock=time.monotonic, timeout=JOIN_TIMEOUT, bucket=None):
+        self._send = send
+        self._loop = loop
+        self._clock = clock
+        self.timeout = timeout
+
+        self._bucket = bucket or TokenBucket(*JOIN_LIMIT, clock=clock)
+        self._queue = collections.deque()
+        self._joining = {}
+        self._parting = {}
+        self._deadlines = collections.deque()
+        self._timer = None
+
+    @property
+    def loop(self):
+        if self._loop is None:
+            self._loop = asyncio.get_event_loop()
+        return self._loop
+
+    def __len__(self):
+        return len(self._queue)
+
+    def join(self, channels, progress=None):
+        return self._enqueue('JOIN', channels, self._joining, progress)
+
+    def part(self, channels, progress=None):
+        return self._enqueue('PART', channels, self._parting, progress)
+
+    def _enqueue(self, command, channels, waiting, progress):
+        """
+        Queues channels, waiting maps each queued or sent channel to the
+        requests waiting for it.  Channels already waited for are not
+        queued again, the new request shares their outcome.
+        """
+        channels = list(dict.fromkeys(channels))
+        request = MembershipRequest(channels, self.loop, progress)
+        queued = False
+
+        for channel in channels:
+            requests = waiting.get(channel)
+
+            if requests is not None:
+                requests.append(request)
+                continue
+
+            waiting[channel] = [request]
+            self._queue.append((command, channel))
+            queued = True
+
+        if queued:
+            self._schedule(0)
+
+        return request
+
+    def confirm_join(self, channel):
+        self._resolve(self._joining, channel)
+
+    def confirm_part(self, channel):
+        self._resolve(self._parting, channel)
+
+    def fail(self, channel, reason):
+        self._resolve(self._joining, channel, reason)
+
+    def _resolve(self, waiting, channel, reason=None):
+        for request in waiting.pop(channel, ()):
+            request._update(channel, reason)
+
+    def _schedule(self, delay):
+        if self._timer is not None:
+            self._timer.cancel()
+
+        self._timer = self.loop.call_later(delay, self._pump)
+
+    def _expire(self):
+        now = self._clock()
+
+        while self._deadlines and self._deadlines[0][0] <= now:
+            _, command, sent = self._deadlines.popleft()
+            waiting = self._joining if command == 'JOIN' else self._parting
+
+            for channel, requests in sent:
+                if waiting.get(channel) is requests:
+                    self._resolve(waiting, channel, 'timeout')
+
+    def _pump(self):
+        self._timer = None
+        self._expire()
+
+        # PARTs do not count towards the join limit
+        batch = {'JOIN': [], 'PART': []}
+        while self._queue:
+            command, channel = self._queue[0]
+
+            if command == 'JOIN':
+                if self._bucket.delay() > 0:
+                    break
+                self._bucket.take()
+
+            self._queue.popleft()
+            batch[command].append(channel)
+
+        for command, channels in batch.items():
+            waiting = self._joining if command == 'JOIN' else self._parting
+
+            for line, chunk in pack_channels(command, channels):
+                self._send(line)
+                sent = [(channel, waiting.get(channel)) for channel in chunk]
+                self._deadlines.append((self._clock() + self.timeout, command, sent))
+
+        if self._queue:
+            self._schedule(self._bucket.delay())
+        elif self._deadlines:
+            self._schedule(max(0, self._deadlines[0][0] - self._clock()))
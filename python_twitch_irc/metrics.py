@@ -0,0 +1,240 @@
+import asyncio
+import bisect
+import logging
+import math
+
+LOGGER = logging.getLogger()
+
+# Histogram buckets in seconds
+CALLBACK_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+LAG_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=(), function=None):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.function = function
+        self._values = {}
+
+    def clear(self):
+        self._values.clear()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def value(self, *labels):
+        if self.function is not None:
+            return self.function().get(labels, 0)
+        return self._values.get(labels, 0)
+
+    def _samples(self):
+        if self.function is not None:
+            self._values = dict(self.function())
+
+        for values, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labels, values)} {_format_value(value)}"
+
+
+class Counter(Metric):
+    """
+    Monotonic count, labelled by the values passed to inc(), or read from
+    function() (returning {label values: count}) for counts kept elsewhere
+    """
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        values = self._values
+        values[labels] = values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    """
+    Value set with set(), or read from function() (returning {label
+    values: value}) whenever the metric is rendered
+    """
+    kind = 'gauge'
+
+    def set(self, *labels, value):
+        self._values[labels] = value
+
+
+class Histogram(Metric):
+    """
+    Cumulative bucket counts, sum and count per label values
+    """
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=CALLBACK_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        entry = self._values.get(labels)
+
+        if entry is None:
+            # Bucket counts (non cumulative, last is +Inf), sum
+            entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    def count(self, *labels):
+        entry = self._values.get(labels)
+        return sum(entry[0]) if entry is not None else 0
+
+    def _samples(self):
+        for values, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                labels = _format_labels(self.labels, values, ('le', _format_value(bound)))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+
+            labels = _format_labels(self.labels, values)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Registry:
+    """
+    A set of metrics rendered together in Prometheus' text format
+    """
+    def __init__(self):
+        self._metrics = {}
+
+    def __getitem__(self, name):
+        return self._metrics[name]
+
+    def __iter__(self):
+        return iter(self._metrics.values())
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labels=(), function=None):
+        return self.register(Counter(name, documentation, labels, function))
+
+    def gauge(self, name, documentation, labels=(), function=None):
+        return self.register(Gauge(name, documentation, labels, function))
+
+    def histogram(self, name, documentation, labels=(), buckets=CALLBACK_BUCKETS):
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def render(self):
+        lines = []
+
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+
+        return '\n'.join(lines) + '\n'
+
+    async def serve(self, host='127.0.0.1', port=9100):
+        """
+        Serves render() over HTTP on every path, returns the asyncio server
+        """
+        async def handle(reader, writer):
+            try:
+                # Request line and headers are not needed
+                while (await reader.readline()).strip():
+                    pass
+
+                body = self.render().encode()
+                writer.write(
+                    b'HTTP/1.1 200 OK\r\n'
+                    b'Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n'
+                    b'Content-Length: ' + str(len(body)).encode() + b'\r\n'
+                    b'Connection: close\r\n\r\n' + body
+                )
+                await writer.drain()
+            except ConnectionError:
+                pass
+            finally:
+                writer.close()
+
+        server = await asyncio.start_server(handle, host, port)
+        LOGGER.debug(f"Serving metrics on {host}:{server.sockets[0].getsockname()[1]}")
+        return server
+
+
+class ClientMetrics(Registry):
+    """
+    Metrics recorded by TwitchIrc when METRICS is enabled
+    """
+    def __init__(self, client):
+        super().__init__()
+
+        self.messages = self.counter(
+            'twitch_irc_messages_total', 'Messages received', ('command', 'channel'),
+        )
+        self.callback_seconds = self.histogram(
+            'twitch_irc_callback_seconds', 'Time spent in overrideable callbacks', ('callback',),
+        )
+        self.lag_seconds = self.histogram(
+            'twitch_irc_lag_seconds', 'Time between tmi-sent-ts and receiving the message', (),
+            LAG_BUCKETS,
+        )
+        self.bytes_received = self.counter('twitch_irc_received_bytes_total', 'Bytes received')
+        self.bytes_sent = self.counter('twitch_irc_sent_bytes_total', 'Bytes sent')
+        self.reconnects = self.counter('twitch_irc_reconnects_total', 'Reconnects', ('reason',))
+        self.stalls = self.counter(
+            'twitch_irc_loop_stalls_total', 'Event loop stalls reported by the watchdog', ('command',),
+        )
+        self.stall_seconds = self.histogram(
+            'twitch_irc_loop_stall_seconds', 'Duration of event loop stalls', (), LAG_BUCKETS,
+        )
+        self.skipped = self.counter(
+            'twitch_irc_skipped_lines_total', 'Lines dropped by the subscription before parsing', ('command',),
+            lambda: skipped_lines(client),
+        )
+        self.queue_depth = self.gauge(
+            'twitch_irc_queue_depth', 'Items waiting in outbound and handler queues', ('queue',),
+            lambda: queue_depths(client),
+        )
+
+
+def skipped_lines(client):
+    if client.subscription is None:
+        return {}
+
+    return {(command,): count for command, count in client.subscription.skipped.items()}
+
+
+def queue_depths(client):
+    depths = {('membership',): len(client._membership), ('outbox',): len(client._outbox)}
+
+    if client._scheduler is not None:
+        depths[('outbound',)] = len(client._scheduler)
+    if client._handlers is not None:
+        depths[('handlers',)] = client._handlers.pending
+
+    return depths
@@ -0,0 +1,304 @@
+import asyncio
+import collections
+import logging
+import re
+import time
+
+from .irc import TwitchIrc
+from .tags import parse_badges
+from .workers import THREAD
+
+LOGGER = logging.getLogger()
+
+# Actions, in increasing severity
+TIMEOUT = 'timeout'
+BAN = 'ban'
+
+# Seconds during which a chatter is not actioned again for the same or a
+# less severe rule
+MODERATION_WINDOW = 60
+
+# Backreferences, named groups and global inline flags, which break (or
+# fail to compile) once patterns are combined
+NOT_COMBINABLE = re.compile(r'\\[1-9]|\(\?P[=<]|\(\?[aiLmsux]+\)')
+
+# pattern is a case insensitive phrase (matched anywhere in the message) or,
+# with regex=True, a regular expression
+Rule = collections.namedtuple('Rule', 'pattern action seconds reason regex')
+Rule.__new__.__defaults__ = (TIMEOUT, 600, None, False)
+
+
+def severity(rule):
+    return (rule.action == BAN, rule.seconds or 0)
+
+
+class AhoCorasick:
+    """
+    Automaton finding every phrase occurring in a text in a single pass
+    over the text, whatever the number of phrases
+    """
+    def __init__(self, phrases):
+        # Per state: transitions, failure state and phrase indexes ending there
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+
+        for index, phrase in enumerate(phrases):
+            self._add(phrase, index)
+
+        self._link()
+
+    def __len__(self):
+        return len(self._goto)
+
+    def _add(self, phrase, index):
+        state = 0
+
+        for char in phrase:
+            next_state = self._goto[state].get(char)
+
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+
+            state = next_state
+
+        self._out[state] += (index,)
+
+    def _link(self):
+        goto, fail, out = self._goto, self._fail, self._out
+        queue = collections.deque(goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+
+                link = fail[state]
+                while link and char not in goto[link]:
+                    link = fail[link]
+
+                fail[next_state] = goto[link].get(char, 0)
+                out[next_state] += out[fail[next_state]]
+
+    def search(self, text):
+        """
+        Returns the indexes of the phrases found in text, or an empty tuple
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        found = ()
+
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+
+            state = goto[state].get(char, 0)
+
+            if out[state]:
+                found += out[state]
+
+        return found
+
+
+class CompiledRules:
+    """
+    Rules compiled to one automaton for phrases and one combined regular
+    expression, only falling back to the individual expressions to tell
+    which rule matched.  Expressions with backreferences, named groups or
+    global inline flags are always matched individually, as are all of
+    them if the combined expression does not compile.
+    """
+    def __init__(self, rules):
+        self.phrases = [rule for rule in rules if not rule.regex]
+        self.regexes = [(rule, re.compile(rule.pattern, re.IGNORECASE)) for rule in rules if rule.regex]
+
+        self._automaton = AhoCorasick([rule.pattern.lower() for rule in self.phrases]) if self.phrases else None
+        self._combined = None
+        self._separate = [(rule, compiled) for rule, compiled in self.regexes if NOT_COMBINABLE.search(rule.pattern)]
+
+        combined = [rule.pattern for rule, _ in self.regexes if not NOT_COMBINABLE.search(rule.pattern)]
+        if combined:
+            try:
+                self._combined = re.compile('|'.join(f'(?:{pattern})' for pattern in combined), re.IGNORECASE)
+            except re.error as e:
+                LOGGER.warning(f"Matching {len(combined)} moderation expressions individually: {e}")
+                self._separate = self.regexes
+
+    def __len__(self):
+        return len(self.phrases) + len(self.regexes)
+
+    def match(self, text):
+        """
+        Returns the most severe rule matching text, or None
+        """
+        best = None
+
+        if self._automaton is not None:
+            for index in self._automaton.search(text.lower()):
+                rule = self.phrases[index]
+
+                if best is None or severity(rule) > severity(best):
+                    best = rule
+
+        if self._combined is not None and self._combined.search(text):
+            regexes = self.regexes
+        else:
+            regexes = self._separate
+
+        for rule, compiled in regexes:
+            if (best is None or severity(rule) > severity(best)) and compiled.search(text):
+                best = rule
+
+        return best
+
+
+def compile_rules(rules):
+    """
+    Compiles {channel: [Rule]} where channel None holds the rules applying
+    to every channel.  Each channel gets a single CompiledRules including
+    the global rules.
+    """
+    shared = list(rules.get(None, ()))
+    compiled = {None: CompiledRules(shared)}
+
+    for channel, channel_rules in rules.items():
+        if channel is not None:
+            compiled[channel] = CompiledRules(shared + list(channel_rules))
+
+    return compiled
+
+
+class Moderator:
+    """
+    Matches messages against per channel rules, see compile_rules
+    """
+    def __init__(self, rules=None):
+        self.rules = {}
+        self._compiled = {None: CompiledRules([])}
+
+        if rules is not None:
+            self.load(rules)
+
+    def load(self, rules):
+        self._compiled = compile_rules(rules)
+        self.rules = rules
+
+    async def reload(self, rules, executor=None):
+        """
+        Compiles rules on executor (the default executor if None) and swaps
+        them in once done, messages are matched against the previous rules
+        meanwhile
+        """
+        compiled = await asyncio.get_event_loop().run_in_executor(executor, compile_rules, rules)
+        self._compiled = compiled
+        self.rules = rules
+
+        LOGGER.debug(f"Reloaded moderation rules for {len(compiled) - 1} channels")
+
+    def check(self, channel, text):
+        """
+        Returns the most severe rule matching text in channel, or None
+        """
+        compiled = self._compiled
+        rules = compiled.get(channel)
+        return (rules if rules is not None else compiled[None]).match(text)
+
+    def check_event(self, event):
+        return self.check(event.channel, event.message)
+
+
+class ModerationBot(TwitchIrc):
+    """
+    Times out or bans chatters whose messages match moderator's rules.
+    Moderators and the broadcaster are never actioned.
+    """
+    # Seconds during which a chatter is not actioned again, unless a more
+    # severe rule matches
+    MODERATION_WINDOW = MODERATION_WINDOW
+
+    # Match on the worker pool (EXECUTOR must be 'thread') instead of the
+    # event loop
+    MODERATION_OFFLOAD = False
+
+    def __init__(self, *args, rules=None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.moderator = Moderator(rules)
+
+        # (channel, user) -> (expiry, severity) of the last action, oldest
+        # expiry first
+        self._actioned = collections.OrderedDict()
+
+        if self.MODERATION_OFFLOAD:
+            if self.EXECUTOR != THREAD:
+                raise ValueError("MODERATION_OFFLOAD requires EXECUTOR = 'thread'")
+
+            self.offload('PRIVMSG', self.moderator.check_event, self._on_checked)
+
+    def on_raw_twitch_privmsg(self, timestamp, message):
+        if not self.MODERATION_OFFLOAD:
+            self._check_message(timestamp, message)
+
+        super().on_raw_twitch_privmsg(timestamp, message)
+
+    def on_raw_twitch_privmsg_batch(self, timestamp, message):
+        if not self.MODERATION_OFFLOAD:
+            self._check_message(timestamp, message)
+
+        super().on_raw_twitch_privmsg_batch(timestamp, message)
+
+    def _check_message(self, timestamp, message):
+        if is_exempt(message.tags):
+            return
+
+        channel, text = message.params[0], message.params[1]
+        rule = self.moderator.check(channel, text)
+
+        if rule is not None:
+            self.enforce(timestamp, channel, self._login(message), text, rule)
+
+    def _on_checked(self, event, rule):
+        if rule is not None and not is_exempt(event.tags):
+            self.enforce(event.timestamp, event.channel, event.user, event.message, rule)
+
+    def enforce(self, timestamp, channel, user, message, rule):
+        """
+        Applies rule to user unless they were actioned as severely within
+        MODERATION_WINDOW, returns whether an action was sent
+        """
+        now = time.monotonic()
+        actioned = self._actioned
+
+        while actioned and next(iter(actioned.values()))[0] <= now:
+            actioned.popitem(last=False)
+
+        key = (channel, user)
+        previous = actioned.get(key)
+        rank = severity(rule)
+
+        if previous is not None and previous[1] >= rank:
+            return False
+
+        actioned[key] = (now + self.MODERATION_WINDOW, rank)
+        actioned.move_to_end(key)
+
+        if rule.action == BAN:
+            self.ban(channel, user, rule.reason)
+        else:
+            self.timeout(channel, user, rule.seconds, rule.reason)
+
+        self._invoke(channel, self.on_moderation, timestamp, channel, user, message, rule)
+        return True
+
+    # Overrideables
+    def on_moderation(self, timestamp, channel, user, message, rule):
+        pass
+
+
+def is_exempt(tags):
+    return tags.get('mod') == '1' or 'broadcaster' in parse_badges(tags.get('badges'))
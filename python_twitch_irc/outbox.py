@@ -0,0 +1,245 @@
+import asyncio
+import collections
+import concurrent.futures
+import inspect
+import logging
+import threading
+
+LOGGER = logging.getLogger()
+
+# Commands drained per event loop iteration before yielding to the loop
+DRAIN_LIMIT = 500
+
+# SendHandle states
+PENDING = 'pending'
+RUNNING = 'running'
+FINISHED = 'finished'
+CANCELLED = 'cancelled'
+
+
+class SendHandle:
+    """
+    Outcome of a command queued through Outbox.  Can be polled (done(),
+    result(timeout)) from any thread or awaited on any event loop.  The
+    result is what the helper returned (or resolved to when it returned
+    a future, e.g. with RATE_LIMIT).
+
+    Lighter than concurrent.futures.Future: nothing but the handle is
+    allocated until a thread waits on it or a callback is added.
+    """
+    __slots__ = ('_state', '_result', '_exception', '_event', '_callbacks', '_lock')
+
+    def __init__(self, lock):
+        self._state = PENDING
+        self._result = None
+        self._exception = None
+        self._event = None
+        self._callbacks = None
+        self._lock = lock
+
+    def __repr__(self):
+        return f"SendHandle({self._state})"
+
+    def __await__(self):
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        self.add_done_callback(lambda handle: loop.call_soon_threadsafe(_copy, handle, future))
+        return future.__await__()
+
+    def done(self):
+        return self._state in (FINISHED, CANCELLED)
+
+    def cancelled(self):
+        return self._state == CANCELLED
+
+    def cancel(self):
+        """
+        Cancels the command if it has not run yet, returns whether it was
+        """
+        with self._lock:
+            if self._state != PENDING:
+                return self._state == CANCELLED
+
+            self._state = CANCELLED
+
+        self._finish()
+        return True
+
+    def result(self, timeout=None):
+        self._wait(timeout)
+
+        if self._state == CANCELLED:
+            raise concurrent.futures.CancelledError()
+        if self._exception is not None:
+            raise self._exception
+
+        return self._result
+
+    def exception(self, timeout=None):
+        self._wait(timeout)
+
+        if self._state == CANCELLED:
+            raise concurrent.futures.CancelledError()
+
+        return self._exception
+
+    def add_done_callback(self, callback):
+        """
+        Calls callback(handle) once done, on the thread completing it
+        """
+        with self._lock:
+            if not self.done():
+                if self._callbacks is None:
+                    self._callbacks = []
+
+                self._callbacks.append(callback)
+                return
+
+        callback(self)
+
+    def _wait(self, timeout):
+        if self.done():
+            return
+
+        with self._lock:
+            if not self.done() and self._event is None:
+                self._event = threading.Event()
+
+        if not self.done() and not self._event.wait(timeout):
+            raise concurrent.futures.TimeoutError()
+
+    def _start(self):
+        with self._lock:
+            if self._state != PENDING:
+                return False
+
+            self._state = RUNNING
+            return True
+
+    def _set(self, result=None, exception=None):
+        self._result = result
+        self._exception = exception
+
+        with self._lock:
+            self._state = FINISHED
+
+        self._finish()
+
+    def _finish(self):
+        with self._lock:
+            event, callbacks = self._event, self._callbacks
+            self._callbacks = None
+
+        if event is not None:
+            event.set()
+
+        for callback in callbacks or ():
+            try:
+                callback(self)
+            except Exception:
+                LOGGER.exception("SendHandle callback failed")
+
+
+class Outbox:
+    """
+    Thread-safe queue of commands run on the event loop by
+    call(name, *args).  Submitting never blocks; the loop is woken once
+    per batch of submissions and drains the queue in order.
+    """
+    def __init__(self, call, commands, loop=None, drain_limit=DRAIN_LIMIT):
+        self.commands = frozenset(commands)
+        self.drain_limit = drain_limit
+
+        self._call = call
+        self._loop = loop
+        self._queue = collections.deque()
+        self._lock = threading.Lock()
+        self._woken = False
+
+    def __len__(self):
+        return len(self._queue)
+
+    def bind(self, loop):
+        self._loop = loop
+
+    def submit(self, commands):
+        """
+        Queues [(name, *args)], returns a SendHandle per command
+        """
+        items = []
+
+        for name, *args in commands:
+            if name not in self.commands:
+                raise ValueError(f"Unknown command {name}")
+
+            items.append((SendHandle(self._lock), name, args))
+
+        loop = self._loop
+        if loop is None:
+            loop = self._loop = _event_loop()
+
+        self._queue.extend(items)
+
+        with self._lock:
+            wake, self._woken = not self._woken, True
+
+        if wake:
+            loop.call_soon_threadsafe(self._drain)
+
+        return [handle for handle, _, _ in items]
+
+    def _drain(self):
+        with self._lock:
+            self._woken = False
+
+        queue = self._queue
+
+        for _ in range(min(len(queue), self.drain_limit)):
+            handle, name, args = queue.popleft()
+
+            if not handle._start():
+                continue
+
+            try:
+                result = self._call(name, *args)
+            except Exception as e:
+                handle._set(exception=e)
+                continue
+
+            if inspect.isawaitable(result):
+                asyncio.ensure_future(result).add_done_callback(lambda future, handle=handle: _resolve(handle, future))
+            else:
+                handle._set(result)
+
+        if queue:
+            with self._lock:
+                wake, self._woken = not self._woken, True
+
+            if wake:
+                self._loop.call_soon(self._drain)
+
+
+def _resolve(handle, future):
+    if future.cancelled():
+        handle._set(exception=concurrent.futures.CancelledError())
+    else:
+        handle._set(future.result() if future.exception() is None else None, future.exception())
+
+
+def _copy(handle, future):
+    if future.cancelled():
+        return
+
+    if handle.cancelled():
+        future.cancel()
+    elif handle._exception is not None:
+        future.set_exception(handle._exception)
+    else:
+        future.set_result(handle._result)
+
+
+def _event_loop():
+    try:
+        return asyncio.get_event_loop()
+    except RuntimeError:
+        raise RuntimeError("Client not started, no event loop to send on") from None
@@ -0,0 +1,106 @@
+from .tags import InternedTags, Tags
+
+FALLBACK_ENCODING = 'latin1'
+
+# Commands handled by the fast path; everything else goes through Pydle
+HOT_COMMANDS = frozenset({b'PRIVMSG', b'USERNOTICE', b'CLEARCHAT'})
+
+
+class TwitchMessage:
+    """
+    Minimal stand-in for Pydle's TaggedMessage produced by parse_line
+    """
+    __slots__ = ('tags', 'source', 'command', 'params', 'received_at', '_line', '_valid')
+
+    def __init__(self, tags, source, command, params, line=b''):
+        self.tags = tags
+        self.source = source
+        self.command = command
+        self.params = params
+        self.received_at = None
+        self._line = line
+        self._valid = True
+
+    @property
+    def _raw(self):
+        return _decode(self._line, 'utf-8')
+
+    def __repr__(self):
+        return f"TwitchMessage({self.command}, {self.params})"
+
+
+def _decode(data, encoding):
+    try:
+        return data.decode(encoding)
+    except UnicodeDecodeError:
+        return data.decode(FALLBACK_ENCODING)
+
+
+def parse_line(line, encoding='utf-8', commands=HOT_COMMANDS, intern=False):
+    """
+    Parse a raw line (bytes) in a single pass if its command is in
+    commands, otherwise return None so the caller can fall back to Pydle.
+    With intern=True tag keys and repetitive tag values are interned.
+    """
+    # Lines split off a buffer at LF keep the CR of their CRLF
+    if line.endswith(b'\n'):
+        line = line[:-1]
+    if line.endswith(b'\r'):
+        line = line[:-1]
+
+    pos = 0
+    tags = None
+
+    if line.startswith(b'@'):
+        pos = line.find(b' ')
+        if pos < 0:
+            return None
+
+        tags = line[1:pos]
+        pos += 1
+
+        # Tolerate extra spaces between sections like Pydle does
+        while line[pos:pos + 1] == b' ':
+            pos += 1
+
+    source = None
+    if line[pos:pos + 1] == b':':
+        end = line.find(b' ', pos)
+        if end < 0:
+            return None
+
+        source = line[pos + 1:end]
+        pos = end + 1
+
+    end = line.find(b' ', pos)
+    if end < 0:
+        command = line[pos:]
+        rest = b''
+    else:
+        command = line[pos:end]
+        rest = line[end + 1:]
+
+    if command not in commands:
+        return None
+
+    # Parameters: (word )* (:trailing)?
+    if rest.startswith(b':'):
+        params = [_decode(rest[1:], encoding)]
+    else:
+        index = rest.find(b' :')
+
+        if index >= 0:
+            params = _decode(rest[:index], encoding).split()
+            params.append(_decode(rest[index + 2:], encoding))
+        else:
+            params = _decode(rest, encoding).split()
+
+    tags_class = InternedTags if intern else Tags
+
+    return TwitchMessage(
+        tags_class(_decode(tags, encoding)) if tags else {},
+        _decode(source, encoding) if source is not None else None,
+        command.decode('ascii'),
+        params,
+        line,
+    )
@@ -0,0 +1,525 @@
+import asyncio
+import bisect
+import collections
+import hashlib
+import inspect
+import logging
+import multiprocessing
+import threading
+
+from .irc import EVENT_CALLBACKS, TWITCH_IRC_PORT, TWITCH_IRC_SERVER, TwitchIrc, ensure_scheduled
+from .membership import JOIN_LIMIT
+from .ratelimit import SendScheduler, TokenBucket
+
+LOGGER = logging.getLogger()
+
+# Overrideables forwarded from each shard to the pool
+CALLBACKS = (
+    'on_cleared_chat',
+    'on_channel_ban',
+    'on_hosting',
+    'on_stop_hosting',
+    'on_notice',
+    'on_reconnect_cmd',
+    'on_roomstate',
+    'on_usernotice',
+    'on_userstate',
+    'on_whisper',
+    'on_message',
+) + EVENT_CALLBACKS
+
+# TwitchIrc helpers taking a channel as their first argument
+CHANNEL_HELPERS = frozenset({
+    'action', 'timeout', 'ban', 'unban', 'slow', 'slow_off', 'followers', 'followers_off',
+    'subscribers', 'subscribers_off', 'clear', 'r9kbeta', 'r9kbeta_off', 'emoteonly',
+    'emoteonly_off', 'commercial', 'host', 'unhost', 'mod', 'unmod',
+})
+
+# Sent by process shards when their mod status or slow mode in a channel
+# changes, handled by ProcessShard instead of being forwarded
+STATE_EVENT = '_state'
+
+
+class HashRing:
+    """
+    Consistent hash ring mapping keys (channels) to nodes (shard indexes)
+    """
+    def __init__(self, nodes=(), replicas=64):
+        self.replicas = replicas
+        self._hashes = []
+        self._nodes = {}
+
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def _hash(key):
+        return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], 'big')
+
+    def add(self, node):
+        for i in range(self.replicas):
+            point = self._hash(f"{node}:{i}")
+            bisect.insort(self._hashes, point)
+            self._nodes[point] = node
+
+    def remove(self, node):
+        for i in range(self.replicas):
+            point = self._hash(f"{node}:{i}")
+            self._hashes.remove(point)
+            del self._nodes[point]
+
+    def get(self, key):
+        if not self._hashes:
+            raise LookupError("Hash ring is empty")
+
+        index = bisect.bisect(self._hashes, self._hash(key)) % len(self._hashes)
+        return self._nodes[self._hashes[index]]
+
+
+def _forwarder(name):
+    def forward(self, *args):
+        return self._forward(name, args)
+
+    forward.__name__ = name
+    return forward
+
+
+def shard_class(client_class, names):
+    """
+    Subclass of client_class whose overrideables in names are forwarded
+    through the instance's _forward(name, args).  On connect the shard
+    calls its _on_pool_connect() to join its assigned channels.
+    """
+    def on_connect(self):
+        result = super(shard, self).on_connect()
+        self._on_pool_connect()
+        return result
+
+    attrs = {name: _forwarder(name) for name in names}
+    attrs['on_connect'] = on_connect
+
+    shard = type(f"{client_class.__name__}Shard", (client_class,), attrs)
+    return shard
+
+
+class TwitchIrcPool:
+    """
+    Spreads channels over several TwitchIrc connections using consistent
+    hashing and presents the same overrideables as TwitchIrc.
+
+    client_class may be a TwitchIrc subclass to configure the shards
+    (FAST_PARSER, RATE_LIMIT, ...).  With processes=True each shard runs in
+    its own process and callbacks are delivered back to this process.
+    """
+    # Channels per connection before another shard is added
+    MAX_CHANNELS_PER_SHARD = 100
+
+    def __init__(self, username, token, shards=1, server=TWITCH_IRC_SERVER, port=TWITCH_IRC_PORT,
+                 client_class=TwitchIrc, processes=False):
+        self._username = username
+        self._token = token
+        self._server = server
+        self._port = port
+        self._client_class = client_class
+        self._processes = processes
+
+        self._callbacks = [
+            name for name in CALLBACKS if getattr(type(self), name) is not getattr(TwitchIrcPool, name)
+        ]
+        self._shard_class = shard_class(client_class, self._callbacks)
+
+        self._ring = HashRing()
+        self._shards = []
+        self._channels = {}
+        self._started = False
+
+        # Rate limits apply per account, so in-process shards share one
+        # scheduler and one join bucket
+        self._join_bucket = TokenBucket(*JOIN_LIMIT)
+        self._scheduler = None
+        if client_class.RATE_LIMIT and not processes:
+            self._scheduler = SendScheduler(self._send_message, self.is_mod, self.slow_seconds)
+
+        for _ in range(shards):
+            self._add_shard()
+
+    @property
+    def shards(self):
+        return list(self._shards)
+
+    @property
+    def channels(self):
+        return set(self._channels)
+
+    def _create_shard(self, index):
+        if self._processes:
+            return ProcessShard(self, index)
+
+        shard = self._shard_class(self._username, self._token, self._server, self._port)
+        shard._forward = self._forward
+        shard._on_pool_connect = lambda: self._join_assigned(shard)
+        shard._membership._bucket = self._join_bucket
+
+        if self._scheduler is not None:
+            shard._scheduler = self._scheduler
+
+        return shard
+
+    def _add_shard(self):
+        index = len(self._shards)
+        shard = self._create_shard(index)
+
+        self._shards.append(shard)
+        self._ring.add(index)
+
+        if self._started:
+            shard.start()
+
+        return shard
+
+    def _remove_shard(self):
+        index = len(self._shards) - 1
+        self._ring.remove(index)
+        shard = self._shards.pop()
+
+        return shard
+
+    def shard_for(self, channel):
+        return self._shards[self._ring.get(channel)]
+
+    def _forward(self, name, args):
+        return getattr(self, name)(*args)
+
+    def _join_assigned(self, shard):
+        return shard.join_many(
+            [channel for channel, owner in self._channels.items() if owner is shard]
+        )
+
+    def _underused(self):
+        # Only shrink once well below capacity to avoid flapping
+        return len(self._channels) < (len(self._shards) - 1) * self.MAX_CHANNELS_PER_SHARD // 2
+
+    def _rebalance(self):
+        """
+        Grow or shrink the shard count to fit the channels and move any
+        channel whose owner changed
+        """
+        needed = max(1, -(-len(self._channels) // self.MAX_CHANNELS_PER_SHARD))
+        removed = []
+        joins = collections.defaultdict(list)
+        parts = collections.defaultdict(list)
+
+        while len(self._shards) < needed:
+            self._add_shard()
+
+        while len(self._shards) > needed and self._underused():
+            removed.append(self._remove_shard())
+
+        for channel, owner in list(self._channels.items()):
+            shard = self.shard_for(channel)
+
+            if owner is not None and shard is not owner:
+                LOGGER.debug(f"Moving {channel} to shard {self._shards.index(shard)}")
+                self._channels[channel] = shard
+
+                if owner not in removed:
+                    parts[owner].append(channel)
+                joins[shard].append(channel)
+
+        if not self._started:
+            return
+
+        # Moved channels count towards the shared join limit like any other
+        for owner, channels in parts.items():
+            owner.part_many(channels)
+        for shard, channels in joins.items():
+            shard.join_many(channels)
+
+        for shard in removed:
+            shard.stop()
+
+    def start(self):
+        self._started = True
+
+        for shard in self._shards:
+            shard.start()
+
+        return self
+
+    def stop(self):
+        self._started = False
+
+        for shard in self._shards:
+            shard.stop()
+
+    def join(self, channel):
+        if channel in self._channels:
+            return
+
+        # Placeholder so the new channel counts towards capacity
+        self._channels[channel] = None
+
+        if len(self._channels) > len(self._shards) * self.MAX_CHANNELS_PER_SHARD:
+            self._rebalance()
+
+        shard = self.shard_for(channel)
+        self._channels[channel] = shard
+
+        if self._started:
+            return shard.join_many([channel])
+
+    def part(self, channel):
+        shard = self._channels.pop(channel, None)
+
+        if shard is None:
+            return
+
+        if self._started:
+            shard.part_many([channel])
+
+        if self._underused():
+            self._rebalance()
+
+    def is_mod(self, channel):
+        return self.shard_for(channel).is_mod(channel)
+
+    def slow_seconds(self, channel):
+        return self.shard_for(channel).slow_seconds(channel)
+
+    def _send_message(self, target, message):
+        return self.shard_for(target)._send_message(target, message)
+
+    def message(self, target, message):
+        if target[0] == '#':
+            return self.shard_for(target).message(target, message)
+
+        return self._shards[0].message(target, message)
+
+    def whisper(self, user, message):
+        return self._shards[0].whisper(user, message)
+
+    def __getattr__(self, name):
+        """
+        Channel helpers (timeout, ban, slow, ...) are routed to the shard
+        owning the channel passed as their first argument
+        """
+        if name not in CHANNEL_HELPERS:
+            raise AttributeError(name)
+
+        def routed(channel, *args, **kwargs):
+            return getattr(self.shard_for(channel), name)(channel, *args, **kwargs)
+
+        return routed
+
+    # Overrideables
+    def on_cleared_chat(self, timestamp, tags, channel):
+        pass
+
+    def on_channel_ban(self, timestamp, tags, channel, user):
+        pass
+
+    def on_hosting(self, timestamp, host, hostee, viewers):
+        pass
+
+    def on_stop_hosting(self, timestamp, host, viewers):
+        pass
+
+    def on_notice(self, timestamp, tags, channel, message):
+        pass
+
+    def on_reconnect_cmd(self, timestamp):
+        pass
+
+    def on_roomstate(self, timestamp, tags, channel):
+        pass
+
+    def on_usernotice(self, timestamp, tags, channel, message):
+        pass
+
+    def on_userstate(self, timestamp, tags, channel):
+        pass
+
+    def on_whisper(self, timestamp, tags, user, message):
+        pass
+
+    def on_message(self, timestamp, tags, channel, user, message):
+        pass
+
+    def on_clearchat_event(self, event):
+        pass
+
+    def on_notice_event(self, event):
+        pass
+
+    def on_roomstate_event(self, event):
+        pass
+
+    def on_usernotice_event(self, event):
+        pass
+
+    def on_userstate_event(self, event):
+        pass
+
+    def on_whisper_event(self, event):
+        pass
+
+    def on_message_event(self, event):
+        pass
+
+
+class ProcessShard:
+    """
+    Runs a shard in a child process.  Callbacks come back over a queue and
+    are dispatched on a reader thread into the parent's event loop (or
+    directly when no loop is running); commands are sent the other way.
+
+    The child reports its mod status and slow mode per channel, which
+    is_mod() and slow_seconds() answer from.  join_many/part_many are rate
+    limited in the child and return None, their progress stays there.
+    """
+    def __init__(self, pool, index):
+        self._pool = pool
+        self._index = index
+        self._context = multiprocessing.get_context('spawn')
+        self._events = self._context.Queue()
+        self._commands = self._context.Queue()
+        self._process = None
+        self._reader = None
+        self._loop = None
+
+        # channel -> (mod, slow seconds) as last reported by the child
+        self._state = {}
+
+    def start(self):
+        pool = self._pool
+        channels = [channel for channel, owner in pool._channels.items() if owner is self]
+
+        try:
+            self._loop = asyncio.get_event_loop()
+        except RuntimeError:
+            self._loop = None
+
+        self._process = self._context.Process(
+            target=_run_shard_process,
+            args=(
+                pool._client_class, pool._callbacks,
+                (pool._username, pool._token, pool._server, pool._port),
+                channels, self._events, self._commands,
+            ),
+            daemon=True,
+        )
+        self._process.start()
+
+        self._reader = threading.Thread(target=self._read_events, daemon=True)
+        self._reader.start()
+
+    def stop(self):
+        if self._process is not None:
+            self._commands.put(('stop', ()))
+            self._events.put(None)
+            self._process = None
+
+    def _read_events(self):
+        while True:
+            event = self._events.get()
+            if event is None:
+                return
+
+            name, args = event
+            if name == STATE_EVENT:
+                channel, mod, slow = args
+                self._state[channel] = (mod, slow)
+                continue
+
+            if self._loop is not None and self._loop.is_running():
+                self._loop.call_soon_threadsafe(self._pool._forward, name, args)
+            else:
+                self._pool._forward(name, args)
+
+    def _command(self, name, *args):
+        self._commands.put((name, args))
+
+    def join(self, channel):
+        self._command('join_many', [channel])
+
+    def part(self, channel):
+        self.part_many([channel])
+
+    def join_many(self, channels, progress=None):
+        self._command('join_many', list(channels))
+
+    def part_many(self, channels, progress=None):
+        for channel in channels:
+            self._state.pop(channel, None)
+
+        self._command('part_many', list(channels))
+
+    def message(self, target, message):
+        self._command('message', target, message)
+
+    def whisper(self, user, message):
+        self._command('whisper', user, message)
+
+    def _send_message(self, target, message):
+        self._command('_send_message', target, message)
+
+    def is_mod(self, channel):
+        return self._state.get(channel, (False, 0))[0]
+
+    def slow_seconds(self, channel):
+        return self._state.get(channel, (False, 0))[1]
+
+    def __getattr__(self, name):
+        if name not in CHANNEL_HELPERS:
+            raise AttributeError(name)
+
+        return lambda *args: self._command(name, *args)
+
+
+def _run_shard_process(client_class, callbacks, args, channels, events, commands):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    shard = shard_class(client_class, callbacks)(*args)
+    shard._forward = lambda name, params: events.put((name, params))
+    shard._on_pool_connect = lambda: shard.join_many(channels)
+
+    def report(channel, state, changes):
+        if 'mod' in changes or 'slow' in changes:
+            events.put((STATE_EVENT, (channel, state.mod, state.slow)))
+
+    shard.state.subscribe(report)
+
+    def stop():
+        done = shard.stop()
+
+        if asyncio.isfuture(done):
+            done.add_done_callback(lambda _: loop.stop())
+        else:
+            loop.stop()
+
+    def call(name, params):
+        ensure_scheduled(getattr(shard, name)(*params))
+
+    def read_commands():
+        while True:
+            name, params = commands.get()
+
+            if name == 'stop':
+                loop.call_soon_threadsafe(stop)
+                return
+
+            loop.call_soon_threadsafe(call, name, params)
+
+    threading.Thread(target=read_commands, daemon=True).start()
+
+    # Async Pydle's connect(), scheduled by start(), reads from a task on
+    # this loop, older Pydle reads in handle_forever()
+    shard.start()
+
+    if inspect.iscoroutinefunction(shard.handle_forever):
+        loop.run_forever()
+    else:
+        shard.handle_forever()
+
+    loop.close()
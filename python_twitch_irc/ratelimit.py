@@ -0,0 +1,349 @@
+import asyncio
+import collections
+import heapq
+import inspect
+import itertools
+import logging
+import time
+
+LOGGER = logging.getLogger()
+
+# Limits as (messages, seconds), see https://dev.twitch.tv/docs/irc/guide
+USER_LIMIT = (20, 30)
+MOD_LIMIT = (100, 30)
+WHISPER_SECOND_LIMIT = (3, 1)
+WHISPER_MINUTE_LIMIT = (100, 60)
+WHISPER_RECIPIENT_LIMIT = (40, 24 * 60 * 60)
+
+# Priorities, lower is sent first
+PRIORITY_MODERATION = 0
+PRIORITY_NORMAL = 1
+
+# Seconds a normal priority message may wait before being dropped
+DEFAULT_MAX_AGE = 30.0
+
+# Queue of whispers, which share limits regardless of their channel
+WHISPER_LANE = object()
+
+
+class RateLimitError(Exception):
+    pass
+
+
+class StaleMessage(RateLimitError):
+    """
+    Set on a send future when its message waited longer than its max age
+    """
+
+
+class WhisperRecipientLimit(RateLimitError):
+    """
+    Set on a send future when whispering would exceed the unique recipient limit
+    """
+
+
+class TokenBucket:
+    def __init__(self, capacity, period, clock=time.monotonic):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self):
+        """
+        Seconds until a token is available
+        """
+        self._refill()
+
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self._refill()
+        self.tokens -= 1
+
+
+class RecipientWindow:
+    """
+    Tracks unique whisper recipients over a fixed window.  Recipients are
+    kept in the order they were first whispered, so expired ones are
+    popped from the front.
+    """
+    def __init__(self, limit, period, clock=time.monotonic):
+        self.limit = limit
+        self.period = period
+        self._clock = clock
+        self._recipients = collections.OrderedDict()
+
+    def allowed(self, user):
+        now = self._clock()
+        recipients = self._recipients
+
+        while recipients:
+            name, seen = next(iter(recipients.items()))
+            if now - seen < self.period:
+                break
+            recipients.popitem(last=False)
+
+        return user in recipients or len(recipients) < self.limit
+
+    def add(self, user):
+        self._recipients.setdefault(user, self._clock())
+
+
+class Outbound:
+    __slots__ = ('priority', 'seq', 'channel', 'target', 'text', 'key', 'expires', 'future', 'queued')
+
+    def __init__(self, priority, seq, channel, target, text, key, expires, future):
+        self.priority = priority
+        self.seq = seq
+        self.channel = channel
+        self.target = target
+        self.text = text
+        self.key = key
+        self.expires = expires
+        self.future = future
+        self.queued = True
+
+    @property
+    def lane(self):
+        return WHISPER_LANE if self.target is not None else self.channel
+
+
+class SendScheduler:
+    """
+    Queues outbound lines and releases them within Twitch's limits.
+
+    send(target, text) performs the actual write.  is_mod(channel) and
+    slow_seconds(channel) describe the current room/user state and pick
+    the applicable limits.  Whispers are submitted with whisper_to set.
+
+    Lines are queued per lane (a channel, or all whispers) in heaps keyed
+    by (priority, sequence).  Every line of a lane is subject to the same
+    limits, so a pump only looks at the head of each lane: the lowest head
+    is sent, or its lane is blocked until the next pump.  Replaced lines
+    are dropped lazily once they reach the head.
+    """
+    def __init__(self, send, is_mod, slow_seconds, loop=None, clock=time.monotonic):
+        self._send = send
+        self._is_mod = is_mod
+        self._slow_seconds = slow_seconds
+        self._loop = loop
+        self._clock = clock
+
+        self._user_bucket = TokenBucket(*USER_LIMIT, clock=clock)
+        self._mod_bucket = TokenBucket(*MOD_LIMIT, clock=clock)
+        self._whisper_second = TokenBucket(*WHISPER_SECOND_LIMIT, clock=clock)
+        self._whisper_minute = TokenBucket(*WHISPER_MINUTE_LIMIT, clock=clock)
+        self._recipients = RecipientWindow(*WHISPER_RECIPIENT_LIMIT, clock=clock)
+
+        self._lanes = {}
+        self._size = 0
+        self._keys = {}
+        self._last_sent = {}
+        self._seq = itertools.count()
+        self._timer = None
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def loop(self):
+        if self._loop is None:
+            self._loop = asyncio.get_event_loop()
+        return self._loop
+
+    def submit(self, channel, text, priority=PRIORITY_NORMAL, key=None, max_age=None, whisper_to=None):
+        """
+        Queue text for channel and return a future which resolves once it is sent.
+
+        A queued line with the same key is replaced (and its future cancelled).
+        """
+        future = self.loop.create_future()
+        # Callers usually drop the future, dropped lines are logged instead
+        future.add_done_callback(_retrieve)
+
+        if max_age is None and priority == PRIORITY_NORMAL:
+            max_age = DEFAULT_MAX_AGE
+
+        expires = self._clock() + max_age if max_age is not None else None
+        item = Outbound(priority, next(self._seq), channel, whisper_to, text, key, expires, future)
+
+        if key is not None:
+            previous = self._keys.pop(key, None)
+
+            if previous is not None:
+                self._discard(previous)
+                previous.future.cancel()
+
+            self._keys[key] = item
+
+        heapq.heappush(self._lanes.setdefault(item.lane, []), (item.priority, item.seq, item))
+        self._size += 1
+        self._schedule(0)
+
+        return future
+
+    def _schedule(self, delay):
+        if self._timer is not None:
+            self._timer.cancel()
+
+        self._timer = self.loop.call_later(delay, self._pump)
+
+    def _channel_delay(self, item):
+        if item.target is not None:
+            if not self._recipients.allowed(item.target):
+                raise WhisperRecipientLimit(item.target)
+
+            return max(self._whisper_second.delay(), self._whisper_minute.delay())
+
+        if self._is_mod(item.channel):
+            return self._mod_bucket.delay()
+
+        delay = max(self._user_bucket.delay(), self._mod_bucket.delay())
+        slow = self._slow_seconds(item.channel)
+
+        if slow and item.channel in self._last_sent:
+            delay = max(delay, self._last_sent[item.channel] + slow - self._clock())
+
+        return delay
+
+    def _consume(self, item):
+        if item.target is not None:
+            self._whisper_second.take()
+            self._whisper_minute.take()
+            self._recipients.add(item.target)
+        elif self._is_mod(item.channel):
+            self._mod_bucket.take()
+        else:
+            self._user_bucket.take()
+            self._mod_bucket.take()
+
+        self._last_sent[item.channel] = self._clock()
+
+    def _head(self, lane):
+        """
+        Pops dropped lines off lane and returns its first queued line, or
+        None once the lane is empty (and removed)
+        """
+        heap = self._lanes[lane]
+
+        while heap:
+            item = heap[0][2]
+
+            if item.queued and not item.future.done():
+                return item
+
+            heapq.heappop(heap)
+            self._discard(item)
+
+        del self._lanes[lane]
+        return None
+
+    def _pump(self):
+        self._timer = None
+        now = self._clock()
+        wait = None
+
+        # Heads of every lane, lowest (priority, sequence) first
+        heads = []
+        for lane in list(self._lanes):
+            item = self._head(lane)
+            if item is not None:
+                heads.append((item.priority, item.seq, item))
+        heapq.heapify(heads)
+
+        while heads:
+            _, _, item = heapq.heappop(heads)
+            lane = item.lane
+
+            if item.expires is not None and now > item.expires:
+                self._pop(item)
+                self._drop(item, StaleMessage(item.text))
+            else:
+                try:
+                    delay = self._channel_delay(item)
+                except RateLimitError as e:
+                    self._pop(item)
+                    self._drop(item, e)
+                else:
+                    if delay > 0:
+                        # Every other line of this lane waits as well
+                        wait = delay if wait is None else min(wait, delay)
+                        continue
+
+                    self._pop(item)
+                    self._consume(item)
+                    self._write(item)
+
+            item = self._head(lane)
+            if item is not None:
+                heapq.heappush(heads, (item.priority, item.seq, item))
+
+        if wait is not None:
+            self._schedule(wait)
+
+    def _pop(self, item):
+        heap = self._lanes[item.lane]
+
+        if heap[0][2] is item:
+            heapq.heappop(heap)
+        else:
+            # A line submitted while sending went ahead of item
+            heap.remove((item.priority, item.seq, item))
+            heapq.heapify(heap)
+
+        self._discard(item)
+
+    def _discard(self, item):
+        if not item.queued:
+            return
+
+        item.queued = False
+        self._size -= 1
+
+        if item.key is not None and self._keys.get(item.key) is item:
+            del self._keys[item.key]
+
+    def _drop(self, item, error):
+        LOGGER.warning(f"Dropping line for {item.target or item.channel}: {error.__class__.__name__}")
+        item.future.set_exception(error)
+
+    def _write(self, item):
+        future = item.future
+
+        try:
+            result = self._send(item.channel, item.text)
+        except Exception as e:
+            future.set_exception(e)
+            return
+
+        if inspect.isawaitable(result):
+            task = asyncio.ensure_future(result, loop=self.loop)
+            task.add_done_callback(lambda done: _chain(done, future))
+        else:
+            future.set_result(True)
+
+
+def _retrieve(future):
+    if not future.cancelled():
+        future.exception()
+
+
+def _chain(done, future):
+    if future.done():
+        return
+
+    if done.cancelled():
+        future.cancel()
+    elif done.exception() is not None:
+        future.set_exception(done.exception())
+    else:
+        future.set_result(True)
@@ -0,0 +1,131 @@
+import asyncio
+import collections
+import logging
+
+LOGGER = logging.getLogger()
+
+# Message ids remembered for deduplication
+MESSAGE_ID_CACHE_SIZE = 10000
+
+ID_KEY = 'id'
+
+# Seconds the link has to register and join before the attempt is abandoned
+LINK_TIMEOUT = 30
+
+
+class MessageIdCache:
+    """
+    Bounded set of recently seen message ids, oldest evicted first
+    """
+    def __init__(self, maxsize=MESSAGE_ID_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._ids = set()
+        self._order = collections.deque()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, message_id):
+        return message_id in self._ids
+
+    def __iter__(self):
+        return iter(self._order)
+
+    def seen(self, message_id):
+        """
+        Records message_id and returns whether it had already been seen
+        """
+        if message_id in self._ids:
+            return True
+
+        self._ids.add(message_id)
+        self._order.append(message_id)
+
+        if len(self._order) > self.maxsize:
+            self._ids.discard(self._order.popleft())
+
+        return False
+
+
+class ZeroGapReconnect:
+    """
+    Make-before-break handling of Twitch's RECONNECT command:
+
+    1. A link connection (link_class) is opened and joins the client's
+       channels in rate limited batches.  Messages carrying an id tag are
+       fed into the client's dispatch and deduplicated there.
+    2. Once the link has joined every channel the client drops its old
+       socket and reconnects, rejoining the same channels.
+    3. Once the client has joined every channel again the link is closed.
+
+    If the link has not joined within timeout seconds it is closed and the
+    client reconnects directly, rejoining its channels once registered.
+    """
+    LINKING = 'linking'
+    RECONNECTING = 'reconnecting'
+    ABANDONED = 'abandoned'
+    DONE = 'done'
+
+    def __init__(self, client, link_class, timeout=LINK_TIMEOUT):
+        self.client = client
+        self.channels = [channel for channel in client.channels]
+        self.timeout = timeout
+        self.state = None
+
+        self.link = link_class(client._username, client._token, client._server, client._port)
+        self.link._primary = client
+        self.link._on_ready = self._link_ready
+        self.link._membership._bucket = client._membership._bucket
+
+        self._deadline = None
+
+    def start(self):
+        LOGGER.debug(f"Zero gap reconnect: linking {len(self.channels)} channels")
+        self.state = self.LINKING
+        self._deadline = asyncio.get_event_loop().call_later(self.timeout, self._abandon)
+        self.link._connect_socket()
+
+    def _link_ready(self):
+        if self.state != self.LINKING:
+            return
+
+        request = self.link.join_many(self.channels)
+        request.future.add_done_callback(lambda _: self._link_caught_up())
+
+    def _link_caught_up(self):
+        if self.state != self.LINKING:
+            return
+
+        LOGGER.debug("Zero gap reconnect: link caught up, reconnecting client")
+        self.state = self.RECONNECTING
+        self._deadline.cancel()
+
+        # Reconnecting replaces the old socket
+        self.client._connect_socket()
+
+    def _abandon(self):
+        if self.state != self.LINKING:
+            return
+
+        LOGGER.warning(f"Zero gap reconnect: link not ready after {self.timeout}s, reconnecting directly")
+        self.state = self.ABANDONED
+        self.link._disconnect_socket()
+        self.client._reconnect = None
+        self.client._restored_channels.extend(self.channels)
+        self.client._connect_socket()
+
+    def client_ready(self):
+        """
+        Called once the client registered on its new connection
+        """
+        if self.state != self.RECONNECTING:
+            return
+
+        request = self.client.join_many(self.channels)
+        request.future.add_done_callback(lambda _: self._client_caught_up())
+
+    def _client_caught_up(self):
+        LOGGER.debug("Zero gap reconnect: client caught up, closing link")
+        self.state = self.DONE
+        self.link._disconnect_socket()
+        self.client._reconnect = None
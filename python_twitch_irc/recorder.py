@@ -0,0 +1,351 @@
+import asyncio
+import bisect
+import json
+import logging
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+
+LOGGER = logging.getLogger()
+
+# Record header: receive time (seconds since epoch) and line length
+HEADER = struct.Struct('<dI')
+
+SEGMENT_SUFFIX = '.seg'
+INDEX_SUFFIX = '.idx'
+
+# Segments are rotated at whichever limit is reached first
+SEGMENT_BYTES = 64 * 1024 * 1024
+SEGMENT_SECONDS = 3600
+
+# Records between entries of an index's time -> offset table
+INDEX_INTERVAL = 1000
+
+# Lines queued for the writer before further lines are dropped
+QUEUE_SIZE = 100000
+
+
+def line_channel(line):
+    """
+    Returns the channel of a raw line (bytes) or None
+    """
+    pos = 0
+
+    if line.startswith(b'@'):
+        pos = line.find(b' ') + 1
+        if not pos:
+            return None
+
+    if line.startswith(b':', pos):
+        pos = line.find(b' ', pos) + 1
+        if not pos:
+            return None
+
+    # Skip the command
+    pos = line.find(b' ', pos) + 1
+    if not pos or not line.startswith(b'#', pos):
+        return None
+
+    end = line.find(b' ', pos)
+    return line[pos:end if end != -1 else len(line)].decode('utf-8', 'replace')
+
+
+class SegmentIndex:
+    """
+    Sidecar index of a segment: time range, per channel (count, first,
+    last) and a sparse receive time -> file offset table
+    """
+    def __init__(self, start=None, end=None, records=0, channels=None, offsets=None):
+        self.start = start
+        self.end = end
+        self.records = records
+        self.channels = channels or {}
+        self.offsets = offsets or []
+
+    def add(self, received, channel, offset):
+        if self.records % INDEX_INTERVAL == 0:
+            self.offsets.append((received, offset))
+
+        if self.start is None:
+            self.start = received
+        self.end = received
+        self.records += 1
+
+        if channel is not None:
+            entry = self.channels.get(channel)
+            if entry is None:
+                self.channels[channel] = [1, received, received]
+            else:
+                entry[0] += 1
+                entry[2] = received
+
+    def overlaps(self, channel=None, start=None, end=None):
+        if channel is not None and channel not in self.channels:
+            return False
+
+        first, last = (self.channels[channel][1:] if channel is not None else (self.start, self.end))
+        if first is None:
+            return False
+
+        return (start is None or last >= start) and (end is None or first <= end)
+
+    def seek(self, start):
+        """
+        Offset of the last indexed record received at or before start
+        """
+        if start is None or not self.offsets:
+            return 0
+
+        position = bisect.bisect_right([received for received, _ in self.offsets], start) - 1
+        return self.offsets[max(position, 0)][1]
+
+    def to_json(self):
+        return {
+            'start': self.start,
+            'end': self.end,
+            'records': self.records,
+            'channels': self.channels,
+            'offsets': self.offsets,
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(
+            data['start'],
+            data['end'],
+            data['records'],
+            data['channels'],
+            [tuple(entry) for entry in data['offsets']],
+        )
+
+
+class Recorder:
+    """
+    Appends raw lines with their receive time to rotating segment files in
+    directory.  record() only queues the line; a background thread writes
+    segments and their sidecar indexes.  Lines arriving while queue_size
+    lines wait for a slow disk are dropped and counted in dropped.
+    """
+    def __init__(
+        self,
+        directory,
+        segment_bytes=SEGMENT_BYTES,
+        segment_seconds=SEGMENT_SECONDS,
+        clock=time.time,
+        queue_size=QUEUE_SIZE,
+    ):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self.dropped = 0
+
+        self._clock = clock
+        self._queue = queue.Queue(queue_size)
+        self._file = None
+        self._index = None
+        self._path = None
+        self._opened = None
+        self._sequence = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+        for name in os.listdir(directory):
+            if name.endswith(SEGMENT_SUFFIX):
+                self._sequence = max(self._sequence, int(name.split('-')[-1][:-len(SEGMENT_SUFFIX)]))
+
+        self._thread = threading.Thread(target=self._run, name='twitch-irc-recorder', daemon=True)
+        self._thread.start()
+
+    def record(self, line):
+        try:
+            self._queue.put_nowait((self._clock(), line))
+        except queue.Full:
+            if not self.dropped:
+                LOGGER.warning(f"Recorder queue full, dropping lines until {self.directory} catches up")
+            self.dropped += 1
+
+    def flush(self):
+        """
+        Blocks until every queued line is written
+        """
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            batch = [item]
+
+            # Write whatever else is queued in one go
+            try:
+                while len(batch) < 10000:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            for item in batch:
+                if item is None:
+                    self._close_segment()
+                    return
+                elif isinstance(item, threading.Event):
+                    if self._file is not None:
+                        self._file.flush()
+                        self._write_index()
+                    item.set()
+                else:
+                    try:
+                        self._write(*item)
+                    except OSError:
+                        LOGGER.exception("Failed to record line")
+
+    def _write(self, received, line):
+        if self._file is None or self._should_rotate(received):
+            self._close_segment()
+            self._open_segment(received)
+
+        offset = self._file.tell()
+        self._file.write(HEADER.pack(received, len(line)))
+        self._file.write(line)
+        self._index.add(received, line_channel(line), offset)
+
+    def _should_rotate(self, received):
+        return self._file.tell() >= self.segment_bytes or received - self._opened >= self.segment_seconds
+
+    def _open_segment(self, received):
+        self._sequence += 1
+        self._path = os.path.join(self.directory, f"segment-{self._sequence:08d}{SEGMENT_SUFFIX}")
+        self._file = open(self._path, 'ab')
+        self._index = SegmentIndex()
+        self._opened = received
+
+    def _close_segment(self):
+        if self._file is None:
+            return
+
+        self._file.close()
+        self._write_index()
+        self._file = None
+
+    def _write_index(self):
+        path = self._path[:-len(SEGMENT_SUFFIX)] + INDEX_SUFFIX
+
+        with open(path + '.tmp', 'w') as fp:
+            json.dump(self._index.to_json(), fp)
+        os.replace(path + '.tmp', path)
+
+
+class Replayer:
+    """
+    Reads segments written by Recorder through mmap, optionally limited to
+    a channel and a receive time range using the sidecar indexes.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+
+    def segments(self):
+        names = sorted(name for name in os.listdir(self.directory) if name.endswith(SEGMENT_SUFFIX))
+        return [os.path.join(self.directory, name) for name in names]
+
+    def index(self, segment):
+        """
+        The segment's SegmentIndex, or None if it has none (e.g. the
+        recorder did not shut down cleanly)
+        """
+        try:
+            with open(segment[:-len(SEGMENT_SUFFIX)] + INDEX_SUFFIX) as fp:
+                return SegmentIndex.from_json(json.load(fp))
+        except FileNotFoundError:
+            return None
+
+    def records(self, channel=None, start=None, end=None):
+        """
+        Yields (received, line) pairs in receive order
+        """
+        encoded = channel.encode() if channel is not None else None
+
+        for segment in self.segments():
+            index = self.index(segment)
+            offset = 0
+
+            if index is not None:
+                if not index.overlaps(channel, start, end):
+                    continue
+                offset = index.seek(start)
+
+            for received, line in self._read(segment, offset):
+                if start is not None and received < start:
+                    continue
+                if end is not None and received > end:
+                    return
+                if encoded is not None and (encoded not in line or line_channel(line) != channel):
+                    continue
+
+                yield received, line
+
+    def _read(self, segment, offset):
+        with open(segment, 'rb') as fp:
+            if not os.fstat(fp.fileno()).st_size:
+                return
+
+            with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                size = len(data)
+                header = HEADER.size
+
+                while offset + header <= size:
+                    received, length = HEADER.unpack_from(data, offset)
+                    offset += header
+
+                    # A partially written last record
+                    if offset + length > size:
+                        return
+
+                    yield received, data[offset:offset + length]
+                    offset += length
+
+    def lines(self, channel=None, start=None, end=None):
+        for _, line in self.records(channel, start, end):
+            yield line
+
+    def replay(self, client, channel=None, start=None, end=None):
+        """
+        Feeds recorded lines into client's dispatch as fast as possible
+        and returns the number of lines replayed
+        """
+        count = 0
+
+        for _, line in self.records(channel, start, end):
+            client._replay_line(line)
+            count += 1
+
+        return count
+
+    async def replay_realtime(self, client, channel=None, start=None, end=None, speed=1.0):
+        """
+        Feeds recorded lines into client's dispatch with their original
+        spacing, speed times faster
+        """
+        loop = asyncio.get_event_loop()
+        count = 0
+        origin = None
+
+        for received, line in self.records(channel, start, end):
+            if origin is None:
+                origin = (received, loop.time())
+
+            delay = origin[1] + (received - origin[0]) / speed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            client._replay_line(line)
+            count += 1
+
+        return count
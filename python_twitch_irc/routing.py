@@ -0,0 +1,201 @@
+import collections
+
+# Event types routes can be attached to, named after the event callbacks
+# (on_<event>_event) and receiving the same event objects
+EVENTS = frozenset({'clearchat', 'notice', 'roomstate', 'usernotice', 'userstate', 'whisper', 'message'})
+
+# Attached handler, returned so it can be detached
+Route = collections.namedtuple('Route', 'kind key channel handler')
+
+EVENT = 'event'
+COMMAND = 'command'
+
+# Trie key marking the end of a command
+END = None
+
+
+class CommandTrie:
+    """
+    Case insensitive chat commands ('!song', '!song request', ...) to
+    handlers.  match() walks the message once and returns the longest
+    command ending at a word boundary.
+    """
+    def __init__(self):
+        self._root = {}
+
+    def __bool__(self):
+        return bool(self._root)
+
+    def add(self, name, handler):
+        node = self._root
+
+        for char in name.lower():
+            node = node.setdefault(char, {})
+
+        node.setdefault(END, []).append(handler)
+
+    def remove(self, name, handler):
+        path = [self._root]
+
+        for char in name.lower():
+            node = path[-1].get(char)
+            if node is None:
+                return False
+            path.append(node)
+
+        handlers = path[-1].get(END)
+        if not handlers or handler not in handlers:
+            return False
+
+        handlers.remove(handler)
+        if not handlers:
+            del path[-1][END]
+
+        # Prune nodes left empty
+        for char, parent, node in zip(reversed(name.lower()), reversed(path[:-1]), reversed(path[1:])):
+            if node:
+                break
+            del parent[char]
+
+        return True
+
+    def match(self, text):
+        """
+        Returns (handlers, rest of text) for the longest command text starts
+        with, or None
+        """
+        node = self._root
+        found = None
+
+        for index, char in enumerate(text):
+            if char == ' ' and END in node:
+                found = (node[END], index)
+
+            node = node.get(char.lower())
+            if node is None:
+                break
+        else:
+            if END in node:
+                found = (node[END], len(text))
+
+        if found is None:
+            return None
+
+        handlers, end = found
+        return handlers, text[end:].strip()
+
+
+class Router:
+    """
+    Handlers per event type and channel (None for every channel) and chat
+    commands per channel.  The handlers for an (event, channel) pair are
+    resolved once and cached until a route for that event changes.
+    """
+    def __init__(self):
+        self._events = {}
+        self._commands = {}
+        self._resolved = {}
+        self._routes = 0
+
+    def __bool__(self):
+        return self._routes > 0
+
+    def __len__(self):
+        return self._routes
+
+    def on(self, event, handler, channel=None):
+        """
+        Calls handler(event) for every event of that type, in channel only
+        if given
+        """
+        if event not in EVENTS:
+            raise ValueError(f"Unknown event {event}")
+
+        self._events.setdefault(event, {}).setdefault(channel, []).append(handler)
+        self._invalidate(event, channel)
+        self._routes += 1
+        return Route(EVENT, event, channel, handler)
+
+    def command(self, name, handler, channel=None):
+        """
+        Calls handler(event, args) for chat messages starting with name,
+        args being the rest of the message
+        """
+        trie = self._commands.get(channel)
+
+        if trie is None:
+            trie = self._commands[channel] = CommandTrie()
+
+        trie.add(name, handler)
+        self._routes += 1
+        return Route(COMMAND, name, channel, handler)
+
+    def detach(self, route):
+        """
+        Removes a route returned by on() or command(), returns whether it
+        was attached
+        """
+        if route.kind == EVENT:
+            handlers = self._events.get(route.key, {}).get(route.channel)
+
+            if not handlers or route.handler not in handlers:
+                return False
+
+            handlers.remove(route.handler)
+            self._invalidate(route.key, route.channel)
+        else:
+            trie = self._commands.get(route.channel)
+
+            if trie is None or not trie.remove(route.key, route.handler):
+                return False
+
+            if not trie:
+                del self._commands[route.channel]
+
+        self._routes -= 1
+        return True
+
+    def handlers(self, event, channel):
+        """
+        Handlers for event in channel, including those for every channel
+        """
+        key = (event, channel)
+        resolved = self._resolved.get(key)
+
+        if resolved is None:
+            table = self._events.get(event, {})
+            resolved = tuple(table.get(None, ()))
+
+            # Whispers have no channel, only the handlers for every channel
+            if channel is not None:
+                resolved = tuple(table.get(channel, ())) + resolved
+
+            self._resolved[key] = resolved
+
+        return resolved
+
+    def command_for(self, channel, text):
+        """
+        Returns (handlers, args) of the command text starts with, preferring
+        channel's commands, or None
+        """
+        commands = self._commands
+
+        if not commands:
+            return None
+
+        trie = commands.get(channel)
+        found = trie.match(text) if trie is not None else None
+
+        if found is None:
+            trie = commands.get(None)
+            found = trie.match(text) if trie is not None else None
+
+        return found
+
+    def _invalidate(self, event, channel):
+        if channel is None:
+            for key in [key for key in self._resolved if key[0] == event]:
+                del self._resolved[key]
+        else:
+            self._resolved.pop((event, channel), None)
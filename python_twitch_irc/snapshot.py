@@ -0,0 +1,178 @@
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+
+LOGGER = logging.getLogger()
+
+# Bumped whenever the file layout changes, older snapshots are ignored
+SNAPSHOT_VERSION = 1
+
+# Seconds between periodic snapshots
+SNAPSHOT_INTERVAL = 30.0
+
+
+def write_snapshot(path, data):
+    """
+    Writes data as JSON to path atomically: a temporary file in the same
+    directory is flushed to disk and then renamed over path, so readers
+    see either the previous or the new snapshot, never a partial one
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temporary = tempfile.mkstemp(prefix='.snapshot-', suffix='.tmp', dir=directory)
+
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(temporary, path)
+    except BaseException:
+        try:
+            os.unlink(temporary)
+        except OSError:
+            pass
+        raise
+
+
+def read_snapshot(path):
+    """
+    Returns the snapshot at path, or None if there is none or it is
+    unreadable or from another version
+    """
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        LOGGER.warning(f"Ignoring unreadable snapshot {path}: {e}")
+        return None
+
+    if not isinstance(data, dict) or data.get('version') != SNAPSHOT_VERSION:
+        LOGGER.warning(f"Ignoring snapshot {path} of another version")
+        return None
+
+    return data
+
+
+class Snapshotter:
+    """
+    Periodically saves a client's joined channels, per channel state and
+    recently seen message ids to path, and restores them on startup.
+
+    Snapshots are captured on the event loop (a few dict copies) and
+    written from the default executor.
+    """
+    def __init__(self, client, path, interval=SNAPSHOT_INTERVAL, loop=None):
+        self.client = client
+        self.path = path
+        self.interval = interval
+        self.saved_at = None
+
+        self._loop = loop
+        self._timer = None
+        self._writing = None
+
+    @property
+    def loop(self):
+        if self._loop is None:
+            self._loop = asyncio.get_event_loop()
+        return self._loop
+
+    def capture(self):
+        """
+        Returns the client's current snapshot data
+        """
+        client = self.client
+        channels = set(client.channels) | set(client.state)
+        seen = client._seen_ids
+
+        return {
+            'version': SNAPSHOT_VERSION,
+            'saved_at': time.time(),
+            'username': client._username.lower(),
+            'channels': sorted(channels),
+            'state': {channel: client.state.get(channel).as_dict() for channel in client.state},
+            'message_ids': list(seen) if seen is not None else [],
+        }
+
+    def save(self):
+        """
+        Captures and writes a snapshot, blocking until it is on disk
+        """
+        write_snapshot(self.path, self.capture())
+        self.saved_at = time.monotonic()
+
+    async def save_async(self):
+        """
+        Captures a snapshot and writes it from the default executor.
+        A save still being written is awaited instead of starting another.
+        """
+        if self._writing is not None:
+            return await self._writing
+
+        data = self.capture()
+        self._writing = self.loop.run_in_executor(None, write_snapshot, self.path, data)
+
+        try:
+            await self._writing
+            self.saved_at = time.monotonic()
+        finally:
+            self._writing = None
+
+    def restore(self):
+        """
+        Loads the snapshot into the client's state and message id cache
+        and returns the channels it had joined (empty if there was no
+        usable snapshot)
+        """
+        data = read_snapshot(self.path)
+
+        if data is None:
+            return []
+
+        client = self.client
+
+        if data.get('username') != client._username.lower():
+            LOGGER.warning(f"Ignoring snapshot {self.path} of user {data.get('username')}")
+            return []
+
+        for channel, values in data.get('state', {}).items():
+            client.state.restore(channel, values)
+
+        if client._seen_ids is not None:
+            for message_id in data.get('message_ids', ()):
+                client._seen_ids.seen(message_id)
+
+        channels = data.get('channels', [])
+        LOGGER.info(f"Restored {len(channels)} channels from {self.path}")
+        return channels
+
+    def start(self):
+        if self._timer is None and self.interval:
+            self._timer = self.loop.call_later(self.interval, self._tick)
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def save_soon(self):
+        """
+        Schedules save_async() on the loop, logging instead of raising
+        """
+        return self.loop.create_task(self._save_logged())
+
+    def _tick(self):
+        self._timer = self.loop.call_later(self.interval, self._tick)
+        self.save_soon()
+
+    async def _save_logged(self):
+        try:
+            await self.save_async()
+        except Exception:
+            LOGGER.exception(f"Failed to save snapshot {self.path}")
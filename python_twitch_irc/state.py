@@ -0,0 +1,192 @@
+from .tags import parse_badges
+
+
+def _flag(value):
+    return value == '1'
+
+
+def _tag(tags, key):
+    """
+    A tag's value, '' for tags sent without a value
+    """
+    value = tags.get(key)
+    return '' if value is True else value
+
+
+# ROOMSTATE tag -> (ChannelState attribute, converter)
+ROOM_FIELDS = {
+    'room-id': ('room_id', str),
+    'slow': ('slow', int),
+    'followers-only': ('followers_only', int),
+    'subs-only': ('subs_only', _flag),
+    'emote-only': ('emote_only', _flag),
+    'r9k': ('r9k', _flag),
+}
+
+USER_FIELDS = ('mod', 'vip', 'broadcaster', 'badges', 'color', 'display_name')
+
+
+class ChannelState:
+    """
+    Merged ROOMSTATE of a channel and our own USERSTATE in it
+    """
+    __slots__ = (
+        'channel', 'room_id', 'slow', 'followers_only', 'subs_only', 'emote_only', 'r9k', 'known',
+        'mod', 'vip', 'broadcaster', 'badges', 'color', 'display_name',
+    )
+
+    def __init__(self, channel):
+        self.channel = channel
+
+        # Room, known once a full ROOMSTATE was received
+        self.known = False
+        self.room_id = None
+        self.slow = 0
+        self.followers_only = -1
+        self.subs_only = False
+        self.emote_only = False
+        self.r9k = False
+
+        # Our user
+        self.mod = False
+        self.vip = False
+        self.broadcaster = False
+        self.badges = {}
+        self.color = ''
+        self.display_name = None
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__[1:])
+        return f"ChannelState({self.channel!r}, {fields})"
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__[1:]}
+
+
+class StateStore:
+    """
+    Per channel state merged from ROOMSTATE (a full snapshot on join, then
+    only the changed tags) and USERSTATE.  Subscribers are called with
+    (channel, state, changes) only when something changed, with changes
+    mapping attribute names to (old, new).
+    """
+    def __init__(self):
+        self._channels = {}
+        self._subscribers = []
+
+    def __len__(self):
+        return len(self._channels)
+
+    def __iter__(self):
+        return iter(self._channels)
+
+    def __contains__(self, channel):
+        return channel in self._channels
+
+    def get(self, channel):
+        return self._channels.get(channel)
+
+    def is_mod(self, channel):
+        state = self._channels.get(channel)
+        return state is not None and state.mod
+
+    def slow_seconds(self, channel):
+        state = self._channels.get(channel)
+        return state.slow if state is not None else 0
+
+    def subscribe(self, callback, channel=None):
+        """
+        Calls callback on changes in channel, or in any channel if None
+        """
+        self._subscribers.append((channel, callback))
+        return callback
+
+    def unsubscribe(self, callback):
+        self._subscribers = [(channel, cb) for channel, cb in self._subscribers if cb is not callback]
+
+    def remove(self, channel):
+        self._channels.pop(channel, None)
+
+    def restore(self, channel, values):
+        """
+        Sets channel's state from ChannelState.as_dict() without notifying
+        subscribers.  It is not known until a live ROOMSTATE confirms it,
+        whose differences are then notified as changes.
+        """
+        state = self._state(channel)
+
+        for name, value in values.items():
+            if name in ChannelState.__slots__ and name != 'channel':
+                setattr(state, name, value)
+
+        state.known = False
+        return state
+
+    def _state(self, channel):
+        state = self._channels.get(channel)
+
+        if state is None:
+            state = self._channels[channel] = ChannelState(channel)
+
+        return state
+
+    def update_room(self, channel, tags):
+        """
+        Merges a ROOMSTATE, tags which are not present are unchanged
+        """
+        state = self._state(channel)
+        changes = {}
+
+        for key, (name, convert) in ROOM_FIELDS.items():
+            value = _tag(tags, key)
+
+            if value is None or value == '':
+                continue
+
+            value = convert(value)
+            old = getattr(state, name)
+
+            if value != old:
+                setattr(state, name, value)
+                changes[name] = (old, value)
+
+        # Only the ROOMSTATE sent on join carries every tag
+        if not state.known and all(key in tags for key in ROOM_FIELDS):
+            state.known = True
+
+        self._notify(state, changes)
+        return changes
+
+    def update_user(self, channel, tags):
+        """
+        Replaces our USERSTATE, which Twitch always sends in full
+        """
+        state = self._state(channel)
+        badges = parse_badges(_tag(tags, 'badges'))
+        values = (
+            _tag(tags, 'mod') == '1' or 'broadcaster' in badges,
+            'vip' in badges or _tag(tags, 'vip') == '1',
+            'broadcaster' in badges,
+            badges,
+            _tag(tags, 'color') or '',
+            _tag(tags, 'display-name'),
+        )
+        changes = {}
+
+        for name, value in zip(USER_FIELDS, values):
+            old = getattr(state, name)
+
+            if value != old:
+                setattr(state, name, value)
+                changes[name] = (old, value)
+
+        self._notify(state, changes)
+        return changes
+
+    def _notify(self, state, changes):
+        if not changes:
+            return
+
+        for channel, callback in self._subscribers:
+            if channel is None or channel == state.channel:
+                callback(state.channel, state, changes)
@@ -0,0 +1,110 @@
+import collections
+
+# Commands a subscription may drop; anything else (PING, numerics, JOIN,
+# PART, ROOMSTATE, USERSTATE, NOTICE, RECONNECT, ...) always passes
+FILTERABLE_COMMANDS = frozenset({b'PRIVMSG', b'USERNOTICE', b'CLEARCHAT', b'CLEARMSG', b'WHISPER', b'HOSTTARGET'})
+
+# Commands whose source is the chatter and trailing parameter their text
+USER_COMMANDS = frozenset({b'PRIVMSG', b'WHISPER'})
+TEXT_COMMANDS = frozenset({b'PRIVMSG', b'WHISPER', b'USERNOTICE'})
+
+
+def _encode(values, prefix=''):
+    if values is None:
+        return None
+
+    encoded = set()
+    for value in values:
+        value = value.lower()
+        if prefix and not value.startswith(prefix):
+            value = prefix + value
+        encoded.add(value.encode())
+
+    return frozenset(encoded)
+
+
+class Subscription:
+    """
+    Decides from the raw line (bytes), before tags are parsed, whether a
+    message is handled.  Every criterion given must match:
+
+    commands: Twitch commands to keep, e.g. {'USERNOTICE'}
+    channels: channels to keep
+    users: logins to keep, only restricts PRIVMSG and WHISPER
+    keywords: case insensitive substrings of the text, one of which must be
+              present, only restricts PRIVMSG, WHISPER and USERNOTICE
+
+    Skipped lines are counted per command in skipped.
+    """
+    def __init__(self, commands=None, channels=None, users=None, keywords=None):
+        self.commands = frozenset(command.upper().encode() for command in commands) if commands is not None else None
+        self.channels = _encode(channels, '#')
+        self.users = _encode(users)
+        self.keywords = tuple(_encode(keywords)) if keywords is not None else None
+
+        self.matched = 0
+        self.skipped = collections.Counter()
+
+    @property
+    def skipped_total(self):
+        return sum(self.skipped.values())
+
+    def match(self, line):
+        """
+        Returns whether line should be parsed and dispatched, counting it
+        """
+        pos = 0
+
+        # Skip the tags without parsing them
+        if line.startswith(b'@'):
+            pos = line.find(b' ') + 1
+            if not pos:
+                return True
+
+        source = None
+        if line.startswith(b':', pos):
+            end = line.find(b' ', pos)
+            if end == -1:
+                return True
+
+            source = line[pos + 1:end]
+            pos = end + 1
+
+        end = line.find(b' ', pos)
+        command = line[pos:end] if end != -1 else line[pos:].rstrip(b'\r')
+
+        if command not in FILTERABLE_COMMANDS:
+            return True
+
+        if self._match(line, end, command, source):
+            self.matched += 1
+            return True
+
+        self.skipped[command.decode()] += 1
+        return False
+
+    def _match(self, line, pos, command, source):
+        if self.commands is not None and command not in self.commands:
+            return False
+
+        if self.channels is not None and command != b'WHISPER':
+            end = line.find(b' ', pos + 1)
+            channel = line[pos + 1:end] if end != -1 else line[pos + 1:].rstrip(b'\r')
+
+            if channel.lower() not in self.channels:
+                return False
+
+        if self.users is not None and command in USER_COMMANDS:
+            login = source.split(b'!', 1)[0] if source is not None else b''
+
+            if login.lower() not in self.users:
+                return False
+
+        if self.keywords is not None and command in TEXT_COMMANDS:
+            start = line.find(b' :', pos)
+            text = line[start + 2:].lower() if start != -1 else b''
+
+            if not any(keyword in text for keyword in self.keywords):
+                return False
+
+        return True
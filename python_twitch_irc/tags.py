@@ -0,0 +1,198 @@
+import sys
+from collections.abc import Mapping
+
+# IRCv3 tag value escapes
+TAG_ESCAPES = {
+    ':': ';',
+    's': ' ',
+    '\\': '\\',
+    'r': '\r',
+    'n': '\n',
+}
+
+# Tags whose values repeat across messages and are worth interning
+LOW_CARDINALITY_TAGS = frozenset({
+    'badge-info',
+    'badges',
+    'color',
+    'emote-only',
+    'first-msg',
+    'flags',
+    'mod',
+    'msg-id',
+    'returning-chatter',
+    'room-id',
+    'subscriber',
+    'turbo',
+    'user-type',
+    'vip',
+})
+
+
+class Tags(Mapping):
+    """
+    Read-only mapping over a raw IRCv3 tag string (without the leading '@').
+    The string is only split on first access and each value is only
+    unescaped when it is looked up.  Empty or missing values are returned
+    as True to match what Pydle produces.
+    """
+    __slots__ = ('_raw', '_values', '_decoded')
+
+    def __init__(self, raw):
+        self._raw = raw
+        self._values = None
+        self._decoded = None
+
+    def _split(self):
+        values = {}
+
+        for item in self._raw.split(';'):
+            key, _, value = item.partition('=')
+            values[key] = value
+
+        self._values = values
+        return values
+
+    def __getitem__(self, key):
+        decoded = self._decoded
+
+        if decoded is not None and key in decoded:
+            return decoded[key]
+
+        values = self._values
+        if values is None:
+            values = self._split()
+
+        value = values[key]
+
+        if not value:
+            value = True
+        elif '\\' in value:
+            value = unescape_tag_value(value)
+
+            if decoded is None:
+                decoded = self._decoded = {}
+
+            decoded[key] = value
+
+        return value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        values = self._values
+        if values is None:
+            values = self._split()
+
+        return key in values
+
+    def __iter__(self):
+        values = self._values
+        if values is None:
+            values = self._split()
+
+        return iter(values)
+
+    def __len__(self):
+        values = self._values
+        if values is None:
+            values = self._split()
+
+        return len(values)
+
+    def __repr__(self):
+        return f"Tags({dict(self)!r})"
+
+
+class InternedTags(Tags):
+    """
+    Tags which intern keys and low cardinality values when split, so
+    buffered messages share them instead of holding copies
+    """
+    __slots__ = ()
+
+    def _split(self):
+        intern = sys.intern
+        values = {}
+
+        for item in self._raw.split(';'):
+            key, _, value = item.partition('=')
+            key = intern(key)
+
+            if key in LOW_CARDINALITY_TAGS:
+                value = intern(value)
+
+            values[key] = value
+
+        self._values = values
+        return values
+
+
+def intern_tags(tags):
+    """
+    Copy of a tags dict with interned keys and low cardinality values
+    """
+    intern = sys.intern
+    interned = {}
+
+    for key, value in tags.items():
+        key = intern(key)
+
+        if key in LOW_CARDINALITY_TAGS and type(value) is str:
+            value = intern(value)
+
+        interned[key] = value
+
+    return interned
+
+
+def unescape_tag_value(value):
+    if '\\' not in value:
+        return value
+
+    out = []
+    chars = iter(value)
+
+    for char in chars:
+        if char == '\\':
+            escaped = next(chars, '')
+            out.append(TAG_ESCAPES.get(escaped, escaped))
+        else:
+            out.append(char)
+
+    return ''.join(out)
+
+
+def parse_badges(value):
+    """
+    'subscriber/12,bits/100' -> {'subscriber': '12', 'bits': '100'}
+    """
+    badges = {}
+
+    if value and value is not True:
+        for badge in value.split(','):
+            name, _, version = badge.partition('/')
+            badges[name] = version
+
+    return badges
+
+
+def parse_emotes(value):
+    """
+    '25:0-4,12-16/1902:6-10' -> [('25', 0, 4), ('25', 12, 16), ('1902', 6, 10)]
+    """
+    emotes = []
+
+    if value and value is not True:
+        for emote in value.split('/'):
+            emote_id, _, ranges = emote.partition(':')
+
+            for span in ranges.split(','):
+                start, _, end = span.partition('-')
+                emotes.append((emote_id, int(start), int(end)))
+
+    return emotes
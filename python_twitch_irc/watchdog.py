@@ -0,0 +1,331 @@
+import asyncio
+import collections
+import heapq
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+import types
+
+LOGGER = logging.getLogger()
+
+# Loop stalls longer than this many seconds are reported
+STALL_THRESHOLD = 0.1
+
+# Slowest callbacks kept per command
+SLOW_HANDLERS = 10
+
+# Reported stalls kept
+STALLS_KEPT = 100
+
+# Seconds between profiler samples
+SAMPLE_INTERVAL = 0.001
+
+# A callback's run time and the command and channel it handled
+Slow = collections.namedtuple('Slow', 'seconds callback command channel')
+
+
+class Stall:
+    """
+    The event loop not running for seconds (updated until it resumes)
+    while callback was handling command in channel.  stack is the loop
+    thread's stack when the stall was detected.
+    """
+    __slots__ = ('started', 'seconds', 'command', 'channel', 'callback', 'stack', '_beat')
+
+    def __init__(self, started, seconds, command, channel, callback, stack, beat):
+        self.started = started
+        self.seconds = seconds
+        self.command = command
+        self.channel = channel
+        self.callback = callback
+        self.stack = stack
+        self._beat = beat
+
+    def __repr__(self):
+        return (
+            f"Stall({self.seconds:.3f}s, callback={self.callback!r}, command={self.command!r}, "
+            f"channel={self.channel!r})"
+        )
+
+    def format(self):
+        return f"{self!r}\n{''.join(self.stack)}"
+
+
+def _callback_name(callback):
+    return getattr(callback, '__qualname__', None) or getattr(callback, '__name__', repr(callback))
+
+
+def fold(frame):
+    """
+    Returns frame's stack as 'outer;...;inner' (flame graph folded format)
+    """
+    names = []
+
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+
+    return ';'.join(reversed(names))
+
+
+class Watchdog:
+    """
+    Times the callbacks a client dispatches and watches its event loop
+    from a side thread.
+
+    The loop thread only records what it is dispatching (two attribute
+    writes per message and per callback) and reschedules a heartbeat.
+    The side thread reports a Stall, with the loop thread's stack, once
+    the heartbeat is late by more than threshold, and calls on_stall(stall)
+    on the loop once it resumes.
+
+    While profiling, a second thread samples the loop thread's stack every
+    sample_interval seconds during dispatch.
+    """
+    def __init__(self, threshold=STALL_THRESHOLD, top=SLOW_HANDLERS, on_stall=None, loop=None):
+        self.threshold = threshold
+        self.interval = threshold / 2
+        self.top = top
+        self.stalls = collections.deque(maxlen=STALLS_KEPT)
+
+        self._on_stall = on_stall
+        self._loop = loop
+        self._slowest = {}
+        self._observed = 0
+
+        # Per command, the time a callback must exceed to enter the top-N
+        self._floors = {}
+
+        # Written by the loop thread, read by the side threads
+        self._command = None
+        self._channel = None
+        self._callback = None
+        self._beat = None
+        self._thread_id = None
+
+        self._stall = None
+        self._timer = None
+        self._stopped = None
+        self._samples = None
+        self._profiling = None
+
+    @property
+    def loop(self):
+        if self._loop is None:
+            self._loop = asyncio.get_event_loop()
+        return self._loop
+
+    # Loop thread
+    def dispatching(self, command, channel):
+        """
+        Marks the start of a message's dispatch, or its end if command
+        is None
+        """
+        self._command = command
+        self._channel = channel
+
+    def call(self, channel, callback, *args):
+        """
+        Calls callback(*args), timing it and recording it as running.  The
+        coroutine of an async callback is returned wrapped, to be timed
+        once it completes.
+        """
+        self._callback = callback
+        start = time.perf_counter()
+        result = None
+
+        try:
+            result = callback(*args)
+        finally:
+            seconds = time.perf_counter() - start
+            self._callback = None
+
+            if type(result) is types.CoroutineType:
+                result = self._timed(result, seconds, callback, self._command, channel)
+
+            # Most calls are not among the slowest, skip them cheaply
+            elif seconds > self._floors.get(self._command, 0.0):
+                self._record(self._command, seconds, callback, channel)
+
+        return result
+
+    async def _timed(self, coro, elapsed, callback, command, channel):
+        """
+        Awaits an async callback's coroutine, recording the time from its
+        first step to its completion (plus elapsed creating it)
+        """
+        start = time.perf_counter()
+
+        try:
+            return await coro
+        finally:
+            seconds = elapsed + time.perf_counter() - start
+
+            if seconds > self._floors.get(command, 0.0):
+                self._record(command, seconds, callback, channel)
+
+    def observe(self, seconds, callback, channel=None):
+        """
+        Records a callback (or its name) that ran for seconds while the
+        current command was dispatched
+        """
+        self._record(self._command, seconds, callback, channel)
+
+    def _record(self, command, seconds, callback, channel):
+        heap = self._slowest.get(command)
+
+        if heap is None:
+            heap = self._slowest[command] = []
+
+        if isinstance(callback, str):
+            name = callback
+        else:
+            name = _callback_name(callback)
+
+        # Min-heap of (seconds, sequence, Slow), the sequence breaking ties
+        self._observed += 1
+        entry = (seconds, self._observed, Slow(seconds, name, command, channel))
+
+        if len(heap) < self.top:
+            heapq.heappush(heap, entry)
+        elif seconds > heap[0][0]:
+            heapq.heapreplace(heap, entry)
+
+        if len(heap) >= self.top:
+            self._floors[command] = heap[0][0]
+
+    def slowest(self, command=None):
+        """
+        Slowest callbacks seen for command (every command if None),
+        slowest first
+        """
+        if command is None:
+            entries = [entry for heap in self._slowest.values() for entry in heap]
+        else:
+            entries = self._slowest.get(command, ())
+
+        return [slow for _, _, slow in sorted(entries, reverse=True)[:self.top]]
+
+    def start(self):
+        if self._stopped is not None:
+            return
+
+        self._stopped = threading.Event()
+        self._heartbeat()
+        threading.Thread(target=self._watch, args=(self._stopped,), name='twitch-irc-watchdog', daemon=True).start()
+
+    def stop(self):
+        self.stop_profiling()
+
+        if self._stopped is not None:
+            self._stopped.set()
+            self._stopped = None
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _heartbeat(self):
+        self._thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._timer = self.loop.call_later(self.interval, self._heartbeat)
+
+    # Side threads
+    def _watch(self, stopped):
+        while not stopped.wait(self.interval / 2):
+            try:
+                self._check()
+            except Exception:
+                LOGGER.exception("Watchdog check failed")
+
+    def _check(self):
+        beat = self._beat
+        stall = self._stall
+
+        if stall is not None:
+            if beat == stall._beat:
+                stall.seconds = time.monotonic() - beat - self.interval
+                return
+
+            # The loop resumed
+            stall.seconds = beat - stall._beat - self.interval
+            self._stall = None
+
+            if self._on_stall is not None:
+                try:
+                    self.loop.call_soon_threadsafe(self._on_stall, stall)
+                except RuntimeError:
+                    pass
+
+        late = time.monotonic() - beat - self.interval
+
+        if late > self.threshold:
+            self._stall = stall = self._capture(late, beat)
+            self.stalls.append(stall)
+            LOGGER.warning(f"Event loop stalled for {late:.3f}s: {stall.format()}")
+
+    def _capture(self, late, beat):
+        command, channel, callback = self._command, self._channel, self._callback
+        frame = sys._current_frames().get(self._thread_id)
+        stack = traceback.format_stack(frame) if frame is not None else []
+
+        if callback is not None:
+            callback = _callback_name(callback)
+
+        return Stall(time.time() - late, late, command, channel, callback, stack, beat)
+
+    # Sampling profiler
+    def start_profiling(self, sample_interval=SAMPLE_INTERVAL):
+        """
+        Samples the loop thread's stack during dispatch until
+        stop_profiling()
+        """
+        if self._profiling is not None:
+            return
+
+        if self._thread_id is None:
+            self._thread_id = threading.get_ident()
+
+        self._samples = collections.Counter()
+        self._profiling = threading.Event()
+        threading.Thread(
+            target=self._sample,
+            args=(self._profiling, self._samples, sample_interval),
+            name='twitch-irc-profiler',
+            daemon=True,
+        ).start()
+
+    def stop_profiling(self):
+        """
+        Returns the samples taken as a Counter of folded stacks (see fold())
+        """
+        if self._profiling is None:
+            return self._samples
+
+        self._profiling.set()
+        self._profiling = None
+        return self._samples
+
+    def _sample(self, stopped, samples, interval):
+        thread_id = self._thread_id
+
+        while not stopped.wait(interval):
+            if self._command is None:
+                continue
+
+            frame = sys._current_frames().get(thread_id)
+
+            if frame is not None:
+                samples[fold(frame)] += 1
+
+
+def format_samples(samples):
+    """
+    Renders profiler samples as folded stack lines ('stack count'), the
+    input format of flamegraph.pl and speedscope
+    """
+    return '\n'.join(f"{stack} {count}" for stack, count in samples.most_common())
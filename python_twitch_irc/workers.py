@@ -0,0 +1,40 @@
+import collections
+import concurrent.futures
+import os
+import zlib
+
+THREAD = 'thread'
+PROCESS = 'process'
+
+# Compact, picklable copy of a dispatched message
+WorkEvent = collections.namedtuple('WorkEvent', 'command timestamp channel user message tags')
+
+
+class WorkerPool:
+    """
+    A set of single worker executors.  Work for a channel always goes to
+    the same worker so it runs (and completes) in arrival order.
+    """
+    def __init__(self, kind=THREAD, workers=None):
+        if kind == THREAD:
+            executor = concurrent.futures.ThreadPoolExecutor
+        elif kind == PROCESS:
+            executor = concurrent.futures.ProcessPoolExecutor
+        else:
+            raise ValueError(f"Unknown worker kind {kind}")
+
+        self.kind = kind
+        self._executors = [executor(max_workers=1) for _ in range(workers or os.cpu_count() or 1)]
+
+    def __len__(self):
+        return len(self._executors)
+
+    def worker_for(self, channel):
+        return zlib.crc32((channel or '').encode()) % len(self._executors)
+
+    def submit(self, channel, func, *args):
+        return self._executors[self.worker_for(channel)].submit(func, *args)
+
+    def shutdown(self, wait=True):
+        for executor in self._executors:
+            executor.shutdown(wait=wait)
@@ -24,7 +24,6 @@ setup(
     packages=find_packages(),
     install_requires=[
       'pydle',
-      'pendulum',
     ],
     data_files=data_files,
     entry_points={
@@ -0,0 +1,146 @@
+import asyncio
+import unittest
+
+from python_twitch_irc import TwitchIrc
+from python_twitch_irc.analytics import ChatAnalytics, CountMinSketch, HyperLogLog, Window, register_updates
+
+
+class Dummy:
+    pass
+
+
+def make_message(command, params, tags=None, source=None):
+    message = Dummy()
+    message.command = command
+    message.params = params
+    message.tags = tags or {}
+    message.source = source
+    return message
+
+
+class TestSketches(unittest.TestCase):
+    def test_hyperloglog(self):
+        sketch = HyperLogLog()
+
+        for i in range(20000):
+            sketch.add(str(i))
+            sketch.add(str(i))
+
+        small = HyperLogLog()
+        for i in range(50):
+            small.add(str(i))
+
+        # Assertions
+        self.assertTrue(abs(sketch.count() - 20000) < 20000 * 0.2, "Expect distinct values estimated")
+        self.assertTrue(abs(small.count() - 50) <= 5, "Expect small counts close to exact")
+        self.assertTrue(len(sketch.registers) == 512, "Expect fixed memory")
+        self.assertTrue(sketch.merge(small).count() == sketch.count(), "Expect merge of a subset unchanged")
+
+    def test_register_updates(self):
+        first = HyperLogLog()
+        second = HyperLogLog()
+        values = [hash(str(i)) for i in range(100)]
+
+        for value in values:
+            first.add_hash(value)
+        second.update(register_updates(values))
+
+        # Assertions
+        self.assertTrue(first.registers == second.registers, "Expect batched updates to match")
+
+    def test_count_min(self):
+        sketch = CountMinSketch(width=64, depth=4)
+
+        for i in range(500):
+            sketch.add(f'emote_{i % 50}')
+        estimate = sketch.add('Kappa', 1000)
+
+        # Assertions
+        self.assertTrue(estimate >= 1000, "Expect estimates never below the count")
+        self.assertTrue(sketch.estimate('Kappa') < 1100, "Expect heavy hitters close to their count")
+
+
+class TestWindow(unittest.TestCase):
+    def test_sliding(self):
+        window = Window(60, top=2)
+        window.add(1000, 10, register_updates([1, 2, 3]), {'Kappa': 5, 'LUL': 2, 'KEKW': 1})
+        window.add(1030, 5, register_updates([3, 4]), {'LUL': 4})
+
+        stats = window.snapshot(1030)
+        later = window.snapshot(1075)
+        expired = window.snapshot(1200)
+
+        # Assertions
+        self.assertTrue(stats.messages == 15, "Expect messages in the window")
+        self.assertTrue(stats.rate == 0.25, "Expect messages per second")
+        self.assertTrue(stats.chatters == 4, "Expect distinct chatters")
+        self.assertTrue(stats.emotes == [('LUL', 6), ('Kappa', 5)], "Expect top emotes")
+        self.assertTrue(later.messages == 5 and later.chatters == 2, "Expect old messages slid out")
+        self.assertTrue(expired.messages == 0 and expired.emotes == [], "Expect empty window")
+        self.assertTrue(window.prune(1200), "Expect empty window pruned")
+
+
+class TestChatAnalytics(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+    def test_flush(self):
+        analytics = ChatAnalytics(windows=(60, 3600), loop=self.loop)
+        analytics.add('#test-room', '1', '25:0-4,12-16/1902:6-10', 'Kappa Keepo Kappa')
+        analytics.add('#test-room', '2', True, 'hello')
+        analytics.add('#other-room', '1', True, 'hi')
+
+        # Assertions
+        self.assertTrue(analytics.snapshot('#test-room') is None, "Expect nothing before the flush")
+
+        analytics.flush(1000)
+        stats = analytics.snapshot('#test-room', 1010)
+
+        self.assertTrue(sorted(stats) == [60, 3600], "Expect every window")
+        self.assertTrue(stats[60].messages == 2 and stats[60].chatters == 2, "Expect messages and chatters")
+        self.assertTrue(stats[60].emotes == [('Kappa', 2), ('Keepo', 1)], "Expect emote names from the ranges")
+        self.assertTrue(analytics.snapshot('#other-room', 1010)[3600].messages == 1, "Expect channels apart")
+
+        analytics.prune(1000 + 7200)
+        self.assertTrue(analytics.channels == [], "Expect idle channels forgotten")
+
+    def test_timer(self):
+        analytics = ChatAnalytics(interval=0.01, loop=self.loop)
+        analytics.add('#test-room', '1', True, 'hello')
+
+        self.loop.run_until_complete(asyncio.sleep(0.05))
+
+        # Assertions
+        self.assertTrue(analytics.snapshot('#test-room')[60].messages == 1, "Expect flushed by the timer")
+
+    def test_snapshot_all(self):
+        analytics = ChatAnalytics(loop=self.loop)
+
+        for i in range(5):
+            analytics.add(f'#room-{i}', str(i), True, 'hello')
+        analytics.flush(1000)
+
+        snapshots = self.loop.run_until_complete(analytics.snapshot_all(1000, chunk=2))
+
+        # Assertions
+        self.assertTrue(len(snapshots) == 5, "Expect every channel")
+
+    def test_client(self):
+        class Bot(TwitchIrc):
+            ANALYTICS = True
+
+        irc = Bot('dummy', 'dummy_token')
+        irc.analytics._loop = self.loop
+
+        irc._on_handle_twitch(make_message(
+            'PRIVMSG',
+            ['#test-room', 'Kappa'],
+            {'user-id': '1', 'emotes': '25:0-4'},
+            'a_user!a_user@a_user.tmi.twitch.tv',
+        ))
+        irc.analytics.flush()
+
+        # Assertions
+        self.assertTrue(irc.analytics.snapshot('#test-room')[60].emotes == [('Kappa', 1)], "Expect messages analyzed")
+        self.assertTrue(TwitchIrc('dummy', 'dummy_token').analytics is None, "Expect analytics off by default")
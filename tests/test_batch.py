@@ -0,0 +1,142 @@
+import asyncio
+import unittest
+
+from python_twitch_irc import TwitchIrc
+from python_twitch_irc.batch import MESSAGE_FIELDS, Batch, Batcher
+
+
+class Dummy:
+    pass
+
+
+def make_message(command, params, tags=None, source=None):
+    message = Dummy()
+    message.command = command
+    message.params = params
+    message.tags = tags or {}
+    message.source = source
+    return message
+
+
+def privmsg(text, channel='#test-room'):
+    return make_message(
+        'PRIVMSG',
+        [channel, text],
+        {'tmi-sent-ts': '1500000000000'},
+        'a_user!a_user@a_user.tmi.twitch.tv',
+    )
+
+
+class TestBatch(unittest.TestCase):
+    def test_columns(self):
+        batch = Batch('PRIVMSG', MESSAGE_FIELDS)
+        batch.append(1, {}, '#one', 'a_user', 'hello')
+        batch.append(2, {}, '#two', 'b_user', 'world')
+
+        # Assertions
+        self.assertTrue(len(batch) == 2, "Expect two messages")
+        self.assertTrue(batch.channel == ['#one', '#two'], "Expect a list per field")
+        self.assertTrue(batch.columns['message'] == ['hello', 'world'], "Expect columns by name")
+        self.assertTrue(list(batch)[1] == (2, {}, '#two', 'b_user', 'world'), "Expect rows in fields order")
+
+        with self.assertRaises(AttributeError):
+            batch.missing
+
+
+class TestBatcher(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.delivered = []
+
+    def test_size_limit(self):
+        batcher = Batcher(self.delivered.append, size=2, interval=60, loop=self.loop)
+
+        for i in range(5):
+            batcher.add('PRIVMSG', ('value',), i)
+
+        # Assertions
+        self.assertTrue([batch.value for batch in self.delivered] == [[0, 1], [2, 3]], "Expect full batches")
+        self.assertTrue(batcher.pending('PRIVMSG') == 1, "Expect remainder pending")
+
+    def test_time_limit(self):
+        batcher = Batcher(self.delivered.append, size=100, interval=0.01, loop=self.loop)
+        batcher.add('PRIVMSG', ('value',), 1)
+        batcher.add('WHISPER', ('value',), 2)
+
+        self.loop.run_until_complete(asyncio.sleep(0.05))
+
+        # Assertions
+        self.assertTrue(len(self.delivered) == 2, "Expect every command flushed by time")
+        self.assertTrue(batcher.pending('PRIVMSG') == 0, "Expect nothing pending")
+
+    def test_flush(self):
+        batcher = Batcher(self.delivered.append, size=100, interval=60, loop=self.loop)
+        batcher.add('PRIVMSG', ('value',), 1)
+        batcher.flush()
+        batcher.flush()
+
+        self.loop.run_until_complete(asyncio.sleep(0))
+
+        # Assertions
+        self.assertTrue(len(self.delivered) == 1, "Expect one delivery")
+        self.assertTrue(not batcher._timers, "Expect timers cancelled")
+
+
+class TestClientBatches(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+    def test_message_batch(self):
+        class Bot(TwitchIrc):
+            BATCH_SIZE = 3
+
+            def on_message(self, timestamp, tags, channel, user, message):
+                self.received.append(message)
+
+            def on_message_batch(self, batch):
+                self.batches.append(batch)
+
+        irc = Bot('dummy', 'dummy_token')
+        irc._batcher._loop = self.loop
+        irc.received = []
+        irc.batches = []
+
+        for i in range(4):
+            irc._on_handle_twitch(privmsg(str(i)))
+
+        irc.flush_batches()
+
+        # Assertions
+        self.assertTrue(not irc.received, "Expect per message callback replaced")
+        self.assertTrue([len(batch) for batch in irc.batches] == [3, 1], "Expect size then flush")
+        self.assertTrue(irc.batches[0].message == ['0', '1', '2'], "Expect messages in order")
+        self.assertTrue(irc.batches[0].user == ['a_user'] * 3, "Expect logins")
+        self.assertTrue(irc.batches[0].timestamp[0] == 1500000000, "Expect timestamps")
+
+    def test_clearchat_batch(self):
+        class Bot(TwitchIrc):
+            def on_clearchat_batch(self, batch):
+                self.batches.append(batch)
+
+        irc = Bot('dummy', 'dummy_token')
+        irc._batcher._loop = self.loop
+        irc.batches = []
+
+        irc._on_handle_twitch(make_message('CLEARCHAT', ['#test-room', 'a_user']))
+        irc._on_handle_twitch(make_message('CLEARCHAT', ['#test-room']))
+        irc.flush_batches()
+
+        # Assertions
+        self.assertTrue(irc.batches[0].user == ['a_user', None], "Expect bans and clears")
+
+    def test_disabled(self):
+        irc = TwitchIrc('dummy', 'dummy_token')
+
+        # Assertions
+        self.assertTrue(irc._batcher is None, "Expect no batching by default")
+        self.assertTrue(
+            irc._twitch_dispatch['PRIVMSG'] == 'on_raw_twitch_privmsg',
+            "Expect per message handler",
+        )
@@ -0,0 +1,133 @@
+import asyncio
+import unittest
+
+from python_twitch_irc import TwitchIrc
+from python_twitch_irc.concurrency import BLOCK, DROP_NEWEST, DROP_OLDEST, HandlerScheduler
+
+
+class Dummy:
+    pass
+
+
+class TestHandlerScheduler(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.order = []
+        self.gate = asyncio.Event()
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    async def handler(self, name):
+        self.order.append(('start', name))
+        await self.gate.wait()
+        self.order.append(('end', name))
+
+    def run_loop(self):
+        self.loop.run_until_complete(asyncio.sleep(0.01))
+
+    def test_global_limit(self):
+        scheduler = HandlerScheduler(max_concurrency=2, channel_concurrency=10)
+
+        for i in range(5):
+            scheduler.submit('#test-room', self.handler(i))
+        self.run_loop()
+
+        # Assertions
+        self.assertTrue(scheduler.running == 2, "Expect two handlers running")
+        self.assertTrue(scheduler.pending == 3, "Expect three handlers waiting")
+
+        self.gate.set()
+        self.run_loop()
+        self.assertTrue(scheduler.running == 0 and scheduler.pending == 0, "Expect all handlers finished")
+
+    def test_ordered(self):
+        scheduler = HandlerScheduler(ordered=True)
+
+        scheduler.submit('#a', self.handler('a1'))
+        scheduler.submit('#a', self.handler('a2'))
+        scheduler.submit('#b', self.handler('b1'))
+        self.run_loop()
+
+        # Assertions
+        self.assertTrue(self.order == [('start', 'a1'), ('start', 'b1')], "Expect one handler per channel")
+
+        self.gate.set()
+        self.run_loop()
+        self.assertTrue(self.order.index(('end', 'a1')) < self.order.index(('start', 'a2')), "Expect order kept")
+
+    def test_drop_newest(self):
+        scheduler = HandlerScheduler(max_concurrency=1, max_pending=2, policy=DROP_NEWEST)
+
+        for i in range(5):
+            scheduler.submit('#test-room', self.handler(i))
+
+        self.gate.set()
+        self.run_loop()
+
+        # Assertions
+        self.assertTrue(scheduler.dropped == 2, "Expect newest handlers dropped")
+        self.assertTrue([name for step, name in self.order if step == 'end'] == [0, 1, 2], "Expect oldest run")
+
+    def test_drop_oldest(self):
+        scheduler = HandlerScheduler(max_concurrency=1, max_pending=2, policy=DROP_OLDEST)
+
+        for i in range(5):
+            scheduler.submit('#test-room', self.handler(i))
+
+        self.gate.set()
+        self.run_loop()
+
+        # Assertions
+        self.assertTrue(scheduler.dropped == 2, "Expect oldest waiting handlers dropped")
+        self.assertTrue([name for step, name in self.order if step == 'end'] == [0, 3, 4], "Expect newest run")
+
+    def test_block(self):
+        paused = []
+        scheduler = HandlerScheduler(
+            max_concurrency=1, max_pending=2, policy=BLOCK,
+            pause=lambda: paused.append(True), resume=lambda: paused.append(False),
+        )
+
+        for i in range(4):
+            scheduler.submit('#test-room', self.handler(i))
+
+        # Assertions
+        self.assertTrue(paused == [True] and scheduler.paused, "Expect reads paused")
+        self.assertTrue(scheduler.dropped == 0, "Expect nothing dropped")
+
+        self.gate.set()
+        self.run_loop()
+        self.assertTrue(paused == [True, False], "Expect reads resumed")
+        self.assertTrue(len([step for step, _ in self.order if step == 'end']) == 4, "Expect all handlers run")
+
+
+class TestAsyncOverrideables(unittest.TestCase):
+    def test_async_on_message(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self.addCleanup(asyncio.set_event_loop, None)
+        self.addCleanup(loop.close)
+
+        class Subclassed(TwitchIrc):
+            received = []
+
+            async def on_message(self, timestamp, tags, channel, user, message):
+                await asyncio.sleep(0)
+                self.received.append(message)
+
+        irc = Subclassed('dummy', 'dummy_token')
+        message = Dummy()
+        message.source = 'a_user!a_user@a_user.tmi.twitch.tv'
+        message.command = 'PRIVMSG'
+        message.params = ['#test-room', 'message']
+        message.tags = {}
+
+        irc._on_handle_twitch(message)
+        loop.run_until_complete(asyncio.sleep(0.01))
+
+        # Assertions
+        self.assertTrue(irc.received == ['message'], "Expect coroutine handler scheduled")
+        self.assertTrue(irc._handlers.running == 0, "Expect handler finished")
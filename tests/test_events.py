@@ -0,0 +1,79 @@
+import unittest
+
+from python_twitch_irc import ChatMessage, ClearChat, RoomState, Tags, TwitchIrc, UserNotice
+
+
+class Dummy:
+    pass
+
+
+class TestEvents(unittest.TestCase):
+    def test_chat_message(self):
+        tags = {
+            'badges': 'subscriber/12,bits/100',
+            'bits': '50',
+            'emotes': '25:0-4',
+            'mod': '0',
+            'user-id': '244083199',
+        }
+        event = ChatMessage(1533676810, tags, '#test-room', 'a_user', 'Kappa')
+
+        # Assertions
+        self.assertTrue(event.badges == {'subscriber': '12', 'bits': '100'}, "Expect parsed badges")
+        self.assertTrue(event.badges is event.badges, "Expect parsed value to be cached")
+        self.assertTrue(event.emotes == [('25', 0, 4)], "Expect parsed emotes")
+        self.assertTrue(event.bits == 50, "Expect bits to be an integer")
+        self.assertTrue(event.mod is False, "Expect mod to be a boolean")
+        self.assertTrue(event.user_id == '244083199', "Expect user id")
+        self.assertTrue(event.color is None, "Expect missing tag to be None")
+        self.assertTrue(not hasattr(event, '__dict__'), "Expect events to use slots")
+
+    def test_raw_tags(self):
+        tags = Tags(r'msg-id=resub;msg-param-months=6;system-msg=6\smonths;emotes=')
+        event = UserNotice(1533676810, tags, '#test-room', '')
+
+        # Assertions
+        self.assertTrue(event.msg_id == 'resub', "Expect msg-id")
+        self.assertTrue(event.param('months') == '6', "Expect msg-param lookup")
+        self.assertTrue(event.system_msg == '6 months', "Expect unescaped value")
+        self.assertTrue(event.emotes == [], "Expect empty emotes")
+
+    def test_roomstate(self):
+        event = RoomState(1533676810, {'slow': '10', 'emote-only': '1'}, '#test-room')
+
+        # Assertions
+        self.assertTrue(event.slow == 10, "Expect slow seconds")
+        self.assertTrue(event.emote_only is True, "Expect emote only")
+        self.assertTrue(event.followers_only is None, "Expect unset value")
+
+    def test_event_callbacks(self):
+        class Subclassed(TwitchIrc):
+            def on_message_event(self, event):
+                self.event = event
+
+            def on_clearchat_event(self, event):
+                self.cleared = event
+
+        irc = Subclassed('dummy', 'dummy_token')
+        message = Dummy()
+        message.source = 'a_user!a_user@a_user.tmi.twitch.tv'
+        message.command = 'PRIVMSG'
+        message.params = ['#test-room', 'message']
+        message.tags = {'user-id': '244083199'}
+        irc._on_handle_twitch(message)
+
+        message = Dummy()
+        message.command = 'CLEARCHAT'
+        message.params = ['#test-room']
+        message.tags = {}
+        irc._on_handle_twitch(message)
+
+        # Assertions
+        self.assertTrue(isinstance(irc.event, ChatMessage), "Expect a chat message event")
+        self.assertTrue(irc.event.user == 'a_user', "Expect event user")
+        self.assertTrue(irc.event.user_id == '244083199', "Expect event tag")
+        self.assertTrue(isinstance(irc.cleared, ClearChat), "Expect a clear chat event")
+        self.assertTrue(irc.cleared.user is None, "Expect whole chat cleared")
+
+    def test_event_callbacks_not_overridden(self):
+        self.assertTrue(not TwitchIrc._event_callbacks, "Expect no events built by default")
@@ -0,0 +1,137 @@
+import asyncio
+import unittest
+
+from pydle.features.ircv3.tags import TaggedMessage
+
+from python_twitch_irc.fake_server import FakeTwitchServer, format_line
+
+
+def parse(line):
+    message = TaggedMessage.parse(line, encoding='utf-8')
+    message.command = str(message.command).zfill(3)
+    return message
+
+
+class TestFormatLine(unittest.TestCase):
+    def test_format(self):
+        line = format_line('PRIVMSG', ('#test-room', 'hello world'), {'display-name': 'A User;'}, 'a!a@a')
+
+        # Assertions
+        self.assertTrue(
+            line == r'@display-name=A\sUser\: :a!a@a PRIVMSG #test-room :hello world',
+            "Expect escaped tags and trailing param",
+        )
+        self.assertTrue(format_line('ROOMSTATE', ('#test-room',)) == ':tmi.twitch.tv ROOMSTATE #test-room')
+
+
+class TestFakeTwitchServer(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.server = FakeTwitchServer(rate=0, token='dummy_token', seed=1)
+        self.loop.run_until_complete(self.server.start())
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.server.stop())
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def run_scenario(self, coro):
+        return self.loop.run_until_complete(asyncio.wait_for(coro, 5))
+
+    async def connect(self, token='dummy_token'):
+        reader, writer = await asyncio.open_connection(self.server.host, self.server.port)
+        writer.write(b'CAP REQ :twitch.tv/tags twitch.tv/commands twitch.tv/membership\r\n')
+        writer.write(f"PASS oauth:{token}\r\nNICK Bot\r\n".encode())
+        return reader, writer
+
+    async def read_until(self, reader, command):
+        lines = []
+
+        while True:
+            line = await reader.readline()
+            if not line:
+                return lines
+
+            lines.append(line)
+            if parse(line).command == command:
+                return lines
+
+    def test_register_and_join(self):
+        async def scenario():
+            reader, writer = await self.connect()
+            lines = await self.read_until(reader, '376')
+
+            writer.write(b'JOIN #test-room\r\n')
+            lines += await self.read_until(reader, 'ROOMSTATE')
+            members = self.server.members('#test-room')
+            writer.close()
+            return lines, members
+
+        lines, members = self.run_scenario(scenario())
+        commands = [parse(line).command for line in lines]
+
+        # Assertions
+        self.assertTrue(commands[0] == 'CAP', "Expect capabilities acknowledged first")
+        self.assertTrue(b'ACK :twitch.tv/tags twitch.tv/commands twitch.tv/membership' in lines[0])
+        self.assertTrue('001' in commands and '376' in commands, "Expect welcome and end of MOTD")
+        self.assertTrue(commands[-3:] == ['366', 'USERSTATE', 'ROOMSTATE'], "Expect NAMES, USERSTATE and ROOMSTATE")
+        self.assertTrue(len(members) == 1, "Expect the connection to be in the channel")
+
+    def test_bad_token(self):
+        async def scenario():
+            reader, writer = await self.connect('wrong')
+            lines = await self.read_until(reader, None)
+            writer.close()
+            return lines
+
+        lines = self.run_scenario(scenario())
+
+        # Assertions
+        self.assertTrue(b'Login authentication failed' in lines[-1], "Expect failed login NOTICE")
+
+    def test_synthetic_chat(self):
+        self.server.set_rate('#test-room', 500)
+
+        async def scenario():
+            reader, writer = await self.connect()
+            writer.write(b'JOIN #test-room\r\n')
+            await self.read_until(reader, 'ROOMSTATE')
+
+            messages = []
+            while len(messages) < 20:
+                line = await reader.readline()
+                messages.append(parse(line))
+
+            writer.close()
+            return messages
+
+        messages = self.run_scenario(scenario())
+
+        # Assertions
+        self.assertTrue(all(message.command == 'PRIVMSG' for message in messages), "Expect chat messages")
+        self.assertTrue(all(message.params[0] == '#test-room' for message in messages), "Expect chat in the channel")
+        self.assertTrue(all('id' in message.tags and 'tmi-sent-ts' in message.tags for message in messages))
+
+    def test_inject(self):
+        async def scenario():
+            reader, writer = await self.connect()
+            writer.write(b'JOIN #test-room\r\n')
+            await self.read_until(reader, 'ROOMSTATE')
+
+            self.server.inject_clearchat('#test-room', 'a_user', 600)
+            self.server.inject_usernotice('#test-room', 'resub', 'a_user', 'hi', cumulative_months=6)
+            self.server.inject_reconnect()
+
+            lines = await self.read_until(reader, 'RECONNECT')
+            writer.close()
+            return [parse(line) for line in lines]
+
+        clearchat, usernotice, reconnect = self.run_scenario(scenario())
+
+        # Assertions
+        self.assertTrue(clearchat.params == ['#test-room', 'a_user'], "Expect user timed out")
+        self.assertTrue(clearchat.tags['ban-duration'] == '600', "Expect ban duration")
+        self.assertTrue(usernotice.tags['msg-id'] == 'resub', "Expect resub notice")
+        self.assertTrue(usernotice.tags['msg-param-cumulative-months'] == '6', "Expect msg params")
+        self.assertTrue(reconnect.command == 'RECONNECT', "Expect RECONNECT")
@@ -0,0 +1,115 @@
+import unittest
+
+from python_twitch_irc import TwitchIrc
+from python_twitch_irc.identity import UserCache
+from python_twitch_irc.parser import parse_line
+from python_twitch_irc.tags import intern_tags
+
+LINE = (
+    b'@badges=subscriber/12;color=#1E90FF;display-name=A_User;id=1;room-id=36026978;user-id=244083199 '
+    b':a_user!a_user@a_user.tmi.twitch.tv PRIVMSG #test-room :hello'
+)
+
+
+class Dummy:
+    pass
+
+
+def make_message(command, params, tags=None, source=None):
+    message = Dummy()
+    message.command = command
+    message.params = params
+    message.tags = tags or {}
+    message.source = source
+    return message
+
+
+def copy(value):
+    # A new str object with the same value
+    return ''.join(list(value))
+
+
+class TestUserCache(unittest.TestCase):
+    def test_shared_chatter(self):
+        cache = UserCache()
+        first = cache.lookup(copy('1'), copy('a_user'), 'A_User', '#FF0000')
+        second = cache.lookup(copy('1'), copy('a_user'), 'A_User', '#FF0000')
+
+        # Assertions
+        self.assertTrue(first is second, "Expect one object per chatter")
+        self.assertTrue(first.login is second.login, "Expect the same login string")
+
+    def test_updates_in_place(self):
+        cache = UserCache()
+        chatter = cache.lookup('1', 'a_user', 'A_User', '#FF0000')
+        cache.lookup('1', 'renamed', 'Renamed', '#00FF00')
+
+        # Assertions
+        self.assertTrue(chatter.login == 'renamed', "Expect renames applied")
+        self.assertTrue(chatter.color == '#00FF00', "Expect colour changes applied")
+
+    def test_bounded_lru(self):
+        cache = UserCache(maxsize=2)
+        cache.lookup('1', 'one')
+        cache.lookup('2', 'two')
+        cache.lookup('1', 'one')
+        cache.lookup('3', 'three')
+
+        # Assertions
+        self.assertTrue(len(cache) == 2, "Expect cache bounded")
+        self.assertTrue('1' in cache and '2' not in cache, "Expect least recently used evicted")
+
+
+class TestInterning(unittest.TestCase):
+    def test_interned_tags(self):
+        first = parse_line(LINE, intern=True).tags
+        second = parse_line(LINE, intern=True).tags
+
+        key = next(key for key in first if key == 'badges')
+        other = next(key for key in second if key == 'badges')
+
+        # Assertions
+        self.assertTrue(key is other, "Expect tag keys shared")
+        self.assertTrue(first['badges'] is second['badges'], "Expect low cardinality values shared")
+        self.assertTrue(first['id'] == '1', "Expect other values unchanged")
+
+    def test_intern_tags_dict(self):
+        first = intern_tags({copy('color'): copy('#FF0000'), copy('id'): copy('1')})
+        second = intern_tags({copy('color'): copy('#FF0000'), copy('id'): copy('1')})
+
+        # Assertions
+        self.assertTrue(first['color'] is second['color'], "Expect colour values shared")
+        self.assertTrue(first == {'color': '#FF0000', 'id': '1'}, "Expect the same mapping")
+
+    def test_client_shares_strings(self):
+        class Bot(TwitchIrc):
+            INTERN_STRINGS = True
+
+            def on_message(self, timestamp, tags, channel, user, message):
+                self.received.append((tags, channel, user))
+
+        irc = Bot('dummy', 'dummy_token')
+        irc.received = []
+
+        for _ in range(2):
+            irc._on_handle_twitch(make_message(
+                'PRIVMSG',
+                [copy('#test-room'), 'hello'],
+                {copy('user-id'): copy('244083199'), copy('display-name'): 'A_User'},
+                copy('a_user!a_user@a_user.tmi.twitch.tv'),
+            ))
+
+        (first_tags, first_channel, first_user), (second_tags, second_channel, second_user) = irc.received
+
+        # Assertions
+        self.assertTrue(first_channel is second_channel, "Expect channel names shared")
+        self.assertTrue(first_user is second_user, "Expect logins shared through the user cache")
+        self.assertTrue(irc.chatters.get('244083199').display_name == 'A_User', "Expect chatter cached")
+        self.assertTrue(
+            next(iter(first_tags)) is next(iter(second_tags)),
+            "Expect tag keys shared",
+        )
+
+    def test_disabled(self):
+        # Assertions
+        self.assertTrue(TwitchIrc('dummy', 'dummy_token').chatters is None, "Expect no user cache by default")
@@ -243,3 +243,96 @@ class TestIrcClient(unittest.TestCase):
             self.assertTrue(args[2] == message.params[0], "Expect argument be a channel")
             self.assertTrue(args[3] == 'a_user', "Expect argument be a user")
             self.assertTrue(args[4] == message.params[1], "Expect argument to be a message")
+
+    def test_subclass_raw_override(self):
+        class Subclassed(TwitchIrc):
+            def on_raw_twitch_privmsg(self, timestamp, message):
+                self.handled = message
+
+        irc = Subclassed('dummy', 'dummy_token')
+        message = Dummy()
+        message.source = 'a_user!a_user@a_user.tmi.twitch.tv'
+        message.command = 'PRIVMSG'
+        message.params = ['#test-room', 'message']
+        message.tags = {}
+
+        with mock.patch.object(TwitchIrc, 'on_message') as mocked:
+            irc._on_handle_twitch(message)
+
+            # Assertions
+            self.assertTrue(irc.handled is message, "Expect overridden raw handler to be called")
+            self.assertTrue(not mocked.called, "Expect base raw handler to be bypassed")
+
+    def test_patched_raw_handler(self):
+        class Subclassed(TwitchIrc):
+            pass
+
+        irc = Subclassed('dummy', 'dummy_token')
+        message = Dummy()
+        message.source = 'a_user!a_user@a_user.tmi.twitch.tv'
+        message.command = 'PRIVMSG'
+        message.params = ['#test-room', 'message']
+        message.tags = {}
+
+        # Patched after the dispatch table was built
+        with mock.patch.object(Subclassed, 'on_raw_twitch_privmsg') as mocked:
+            irc._on_handle_twitch(message)
+
+            # Assertions
+            self.assertTrue(mocked.called, "Expect the patched raw handler to be called")
+            self.assertTrue(mocked.call_args[0][1] is message, "Expect the message passed")
+
+    def test_unknown_command(self):
+        irc = TwitchIrc('dummy', 'dummy_token')
+        message = Dummy()
+        message.command = 'GLOBALUSERSTATE'
+        message.params = []
+        message.tags = {}
+
+        with mock.patch.object(TwitchIrc.__bases__[0], 'on_unknown', new_callable=mock.MagicMock) as mocked:
+            irc._on_handle_twitch(message)
+
+            # Assertions
+            self.assertTrue(mocked.called, "Expect unknown commands to fall through to pydle")
+
+    def test_timestamp_seconds(self):
+        irc = TwitchIrc('dummy', 'dummy_token')
+        message = Dummy()
+        message.source = 'a_user!a_user@a_user.tmi.twitch.tv'
+        message.command = 'PRIVMSG'
+        message.params = ['#test-room', 'message']
+        message.tags = {'tmi-sent-ts': '1533676810932'}
+
+        with mock.patch.object(TwitchIrc, 'on_message') as mocked:
+            irc._on_handle_twitch(message)
+
+            # Assertions
+            self.assertTrue(mocked.call_args[0][0] == 1533676810, "Expect seconds by default")
+
+    def test_timestamp_milliseconds(self):
+        class Subclassed(TwitchIrc):
+            MILLISECOND_TIMESTAMPS = True
+            RECEIVE_TIMESTAMPS = True
+
+            def on_message_event(self, event):
+                self.event = event
+
+        irc = Subclassed('dummy', 'dummy_token')
+        irc.encoding = 'utf-8'
+        irc._read_at = 123.5
+        irc._receive_buffer = (
+            b'@tmi-sent-ts=1533676810932 :a_user!a_user@a_user.tmi.twitch.tv PRIVMSG #test-room :message\r\n'
+            b':a_user!a_user@a_user.tmi.twitch.tv PRIVMSG #test-room :no timestamp\r\n'
+        )
+
+        with mock.patch.object(TwitchIrc, 'on_message') as mocked:
+            irc._on_handle_twitch(irc._parse_message())
+            first = irc.event
+            irc._on_handle_twitch(irc._parse_message())
+
+            # Assertions
+            self.assertTrue(mocked.call_args_list[0][0][0] == 1533676810932, "Expect milliseconds from the tag")
+            self.assertTrue(mocked.call_args_list[1][0][0] > 1533676810932, "Expect local milliseconds")
+            self.assertTrue(first.timestamp == 1533676810932, "Expect milliseconds on events")
+            self.assertTrue(first.received_at == 123.5, "Expect socket read time on events")
+            self.assertTrue(irc.received_at == 123.5, "Expect socket read time on the client")
@@ -0,0 +1,103 @@
+import asyncio
+import unittest
+
+from python_twitch_irc import TwitchIrc
+from python_twitch_irc.membership import MembershipQueue, pack_channels
+
+
+class Dummy:
+    pass
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestPackChannels(unittest.TestCase):
+    def test_line_limit(self):
+        channels = [f"#channel_{i:04}" for i in range(200)]
+        lines = pack_channels('JOIN', channels)
+
+        # Assertions
+        self.assertTrue(all(len(line) + 2 <= 512 for line, _ in lines), "Expect lines within 512 bytes")
+        self.assertTrue(len(lines) == 6, "Expect channels packed into few lines")
+        self.assertTrue([c for _, chunk in lines for c in chunk] == channels, "Expect every channel once")
+        self.assertTrue(lines[0][0].startswith('JOIN #channel_0000,#channel_0001,'), "Expect comma list")
+
+
+class TestMembershipQueue(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.clock = Clock()
+        self.sent = []
+        self.queue = MembershipQueue(self.sent.append, loop=self.loop, clock=self.clock)
+        self.queue._schedule = lambda delay: None
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_join_limit(self):
+        progress = []
+        request = self.queue.join([f"#channel_{i}" for i in range(30)], progress=progress.append)
+        self.queue._pump()
+
+        # Assertions
+        self.assertTrue(len(self.sent) == 1, "Expect one JOIN line")
+        self.assertTrue(self.sent[0].count('#') == 20, "Expect 20 joins per 10 seconds")
+
+        self.queue.confirm_join('#channel_0')
+        self.assertTrue(request.completed == {'#channel_0'}, "Expect ROOMSTATE to confirm join")
+        self.assertTrue(progress == [request], "Expect progress reported")
+
+        self.clock.now = 5
+        self.queue._pump()
+        self.assertTrue(self.sent[1].count('#') == 10, "Expect remaining joins after refill")
+
+    def test_duplicate_requests(self):
+        first = self.queue.join(['#a', '#b'])
+        self.queue._pump()
+        second = self.queue.join(['#b', '#c'])
+        self.queue._pump()
+
+        # Assertions
+        self.assertTrue(self.sent == ['JOIN #a,#b', 'JOIN #c'], "Expect channels already joining not sent again")
+
+        self.queue.confirm_join('#b')
+        self.assertTrue('#b' in first.completed and '#b' in second.completed, "Expect both requests confirmed")
+
+        self.clock.now = self.queue.timeout + 1
+        self.queue._pump()
+        self.assertTrue(first.done and second.done, "Expect both requests resolved")
+        self.assertTrue(first.failed == {'#a': 'timeout'} and second.failed == {'#c': 'timeout'}, "Expect timeouts")
+
+    def test_failures(self):
+        request = self.queue.join(['#banned', '#slow'])
+        self.queue._pump()
+        self.queue.fail('#banned', 'msg_banned')
+
+        self.clock.now = 31
+        self.queue._pump()
+
+        # Assertions
+        self.assertTrue(request.failed == {'#banned': 'msg_banned', '#slow': 'timeout'}, "Expect failures")
+        self.assertTrue(request.future.done(), "Expect request complete")
+
+    def test_client(self):
+        irc = TwitchIrc('dummy', 'dummy_token')
+        irc._membership = self.queue
+        request = irc.join_many(['#test-room'])
+        self.queue._pump()
+
+        message = Dummy()
+        message.command = 'ROOMSTATE'
+        message.params = ['#test-room']
+        message.tags = {}
+        irc._on_handle_twitch(message)
+
+        # Assertions
+        self.assertTrue(self.sent == ['JOIN #test-room'], "Expect JOIN sent")
+        self.assertTrue(request.done and request.completed == {'#test-room'}, "Expect join confirmed")
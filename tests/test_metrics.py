@@ -0,0 +1,147 @@
+import asyncio
+import time
+import unittest
+
+from python_twitch_irc import TwitchIrc
+from python_twitch_irc.metrics import Registry
+
+
+class Dummy:
+    pass
+
+
+def make_message(command, params, tags=None, source=None):
+    message = Dummy()
+    message.command = command
+    message.params = params
+    message.tags = tags or {}
+    message.source = source
+    return message
+
+
+class TestRegistry(unittest.TestCase):
+    def test_render(self):
+        registry = Registry()
+        counter = registry.counter('messages_total', 'Messages', ('channel',))
+        histogram = registry.histogram('latency_seconds', 'Latency', (), buckets=(0.1, 1.0))
+
+        counter.inc('#test-room')
+        counter.inc('#test-room', amount=2)
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5)
+
+        text = registry.render()
+
+        # Assertions
+        self.assertTrue('# TYPE messages_total counter' in text, "Expect type lines")
+        self.assertTrue('messages_total{channel="#test-room"} 3' in text, "Expect labelled counter")
+        self.assertTrue('latency_seconds_bucket{le="0.1"} 1' in text, "Expect cumulative buckets")
+        self.assertTrue('latency_seconds_bucket{le="1.0"} 2' in text, "Expect cumulative buckets")
+        self.assertTrue('latency_seconds_bucket{le="+Inf"} 3' in text, "Expect +Inf bucket")
+        self.assertTrue('latency_seconds_sum 5.55' in text, "Expect sum")
+        self.assertTrue('latency_seconds_count 3' in text, "Expect count")
+
+    def test_gauge_function(self):
+        registry = Registry()
+        registry.gauge('depth', 'Depth', ('queue',), lambda: {('outbound',): 4})
+
+        # Assertions
+        self.assertTrue('depth{queue="outbound"} 4' in registry.render(), "Expect gauge read on render")
+
+    def test_duplicate(self):
+        registry = Registry()
+        registry.counter('messages_total', 'Messages')
+
+        with self.assertRaises(ValueError):
+            registry.counter('messages_total', 'Messages')
+
+    def test_serve(self):
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+
+        registry = Registry()
+        registry.counter('messages_total', 'Messages').inc()
+
+        async def scrape():
+            server = await registry.serve(port=0)
+            port = server.sockets[0].getsockname()[1]
+
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b'GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n')
+            response = await reader.read()
+
+            writer.close()
+            server.close()
+            await server.wait_closed()
+            return response
+
+        response = loop.run_until_complete(asyncio.wait_for(scrape(), 5))
+
+        # Assertions
+        self.assertTrue(response.startswith(b'HTTP/1.1 200 OK'), "Expect HTTP response")
+        self.assertTrue(response.endswith(b'messages_total 1\n'), "Expect metrics body")
+
+
+class TestClientMetrics(unittest.TestCase):
+    def test_disabled(self):
+        # Assertions
+        self.assertTrue(TwitchIrc('dummy', 'dummy_token').metrics is None, "Expect metrics off by default")
+
+    def test_client_metrics(self):
+        class Bot(TwitchIrc):
+            METRICS = True
+
+            def on_message(self, timestamp, tags, channel, user, message):
+                pass
+
+        irc = Bot('dummy', 'dummy_token')
+        sent = str(int(time.time() * 1000) - 2000)
+
+        for _ in range(2):
+            irc._on_handle_twitch(make_message(
+                'PRIVMSG',
+                ['#test-room', 'hello'],
+                {'tmi-sent-ts': sent},
+                'a_user!a_user@a_user.tmi.twitch.tv',
+            ))
+        irc._on_handle_twitch(make_message('RECONNECT', []))
+
+        metrics = irc.metrics
+
+        # Assertions
+        self.assertTrue(metrics.messages.value('PRIVMSG', '#test-room') == 2, "Expect messages per channel")
+        self.assertTrue(metrics.messages.value('RECONNECT', '') == 1, "Expect messages without channel")
+        self.assertTrue(metrics.callback_seconds.count('on_message') == 2, "Expect callback timings")
+        self.assertTrue(metrics.lag_seconds.count() == 2, "Expect lag observed")
+        self.assertTrue(metrics.lag_seconds._values[()][1] >= 4, "Expect about two seconds lag each")
+        self.assertTrue(metrics.reconnects.value('reconnect_cmd') == 1, "Expect reconnect counted")
+        self.assertTrue(metrics.queue_depth.value('membership') == 0, "Expect queue depth")
+        self.assertTrue('twitch_irc_messages_total{command="PRIVMSG",channel="#test-room"} 2' in metrics.render())
+
+    def test_bytes_received(self):
+        class Bot(TwitchIrc):
+            METRICS = True
+
+        irc = Bot('dummy', 'dummy_token')
+        irc.encoding = 'utf-8'
+        irc._receive_buffer = b':tmi.twitch.tv RECONNECT\r\n'
+        irc._parse_message()
+
+        # Assertions
+        self.assertTrue(irc.metrics.bytes_received.value() == 26, "Expect bytes of the line counted")
+
+    def test_skipped_lines(self):
+        class Bot(TwitchIrc):
+            METRICS = True
+            SUBSCRIBE_COMMANDS = ['usernotice']
+
+        irc = Bot('dummy', 'dummy_token')
+        irc.encoding = 'utf-8'
+        irc._receive_buffer = b':a_user!a_user@a_user.tmi.twitch.tv PRIVMSG #test-room :hello\r\n'
+        irc._has_message()
+        text = irc.metrics.render()
+
+        # Assertions
+        self.assertTrue('# TYPE twitch_irc_skipped_lines_total counter' in text, "Expect skipped lines as a counter")
+        self.assertTrue('twitch_irc_skipped_lines_total{command="PRIVMSG"} 1' in text, "Expect skipped lines counted")
@@ -0,0 +1,190 @@
+import asyncio
+import re
+import time
+import unittest
+from unittest import mock
+
+from pydle.features.ircv3.tags import TaggedMessage
+
+from python_twitch_irc import ModerationBot
+from python_twitch_irc.moderation import BAN, AhoCorasick, CompiledRules, Moderator, Rule
+
+
+class Dummy:
+    pass
+
+
+def make_message(command, params, tags=None, source=None):
+    message = Dummy()
+    message.command = command
+    message.params = params
+    message.tags = tags or {}
+    message.source = source
+    return message
+
+
+def privmsg(text, user='a_user', channel='#test-room', tags=None):
+    return make_message('PRIVMSG', [channel, text], tags, f'{user}!{user}@{user}.tmi.twitch.tv')
+
+
+class TestAhoCorasick(unittest.TestCase):
+    def test_search(self):
+        automaton = AhoCorasick(['he', 'she', 'his', 'hers'])
+
+        # Assertions
+        self.assertTrue(sorted(automaton.search('ushers')) == [0, 1, 3], "Expect overlapping phrases found")
+        self.assertTrue(automaton.search('hi') == (), "Expect nothing found")
+        self.assertTrue(AhoCorasick([]).search('anything') == (), "Expect empty automaton to match nothing")
+
+
+class TestCompiledRules(unittest.TestCase):
+    def test_most_severe(self):
+        rules = CompiledRules([
+            Rule('buy followers', seconds=60),
+            Rule('followers', seconds=600),
+            Rule(r'bit\.ly/\w+', action=BAN, regex=True),
+            Rule(r'(.)\1{9,}', seconds=10, regex=True),
+        ])
+
+        # Assertions
+        self.assertTrue(rules.match('BUY FOLLOWERS now').seconds == 600, "Expect longest timeout")
+        self.assertTrue(rules.match('go to bit.ly/abc for followers').action == BAN, "Expect ban over timeout")
+        self.assertTrue(rules.match('aaaaaaaaaaaa').seconds == 10, "Expect regex rules")
+        self.assertTrue(rules.match('hello chat') is None, "Expect no match")
+
+    def test_not_combinable(self):
+        rules = CompiledRules([
+            Rule(r'(?i)free\s+nitro', regex=True),
+            Rule(r'(?P<word>\w+) (?P=word)', seconds=10, regex=True),
+            Rule(r'(?P<word>spam)+', seconds=20, regex=True),
+            Rule(r'bit\.ly/\w+', action=BAN, regex=True),
+        ])
+
+        # Assertions
+        self.assertTrue(rules.match('get FREE nitro').seconds == 600, "Expect global inline flags matched")
+        self.assertTrue(rules.match('hello hello').seconds == 10, "Expect backreference matched")
+        self.assertTrue(rules.match('spamspam').seconds == 20, "Expect reused group names matched")
+        self.assertTrue(rules.match('bit.ly/abc').action == BAN, "Expect combined rules matched")
+        self.assertTrue(rules.match('hello chat') is None, "Expect no match")
+
+    def test_combined_fallback(self):
+        with mock.patch('python_twitch_irc.moderation.NOT_COMBINABLE', re.compile('$^')):
+            rules = CompiledRules([Rule(r'(?P<word>a+)', regex=True), Rule(r'(?P<word>b+)', seconds=10, regex=True)])
+
+        # Assertions
+        self.assertTrue(rules._combined is None, "Expect the combined expression given up")
+        self.assertTrue(rules.match('bbb').seconds == 10, "Expect rules matched individually")
+
+
+class TestModerator(unittest.TestCase):
+    def test_channels(self):
+        moderator = Moderator({None: [Rule('spam')], '#test-room': [Rule('spoiler')]})
+
+        # Assertions
+        self.assertTrue(moderator.check('#test-room', 'spam') is not None, "Expect global rules everywhere")
+        self.assertTrue(moderator.check('#test-room', 'a spoiler') is not None, "Expect channel rules")
+        self.assertTrue(moderator.check('#other-room', 'a spoiler') is None, "Expect channel rules scoped")
+
+    def test_reload(self):
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+
+        moderator = Moderator({None: [Rule('spam')]})
+        loop.run_until_complete(moderator.reload({None: [Rule('scam')]}))
+
+        # Assertions
+        self.assertTrue(moderator.check('#test-room', 'spam') is None, "Expect old rules replaced")
+        self.assertTrue(moderator.check('#test-room', 'scam') is not None, "Expect new rules")
+
+
+class TestModerationBot(unittest.TestCase):
+    def test_enforce(self):
+        irc = ModerationBot('dummy', 'dummy_token', rules={None: [Rule('spam', seconds=30), Rule('scam', action=BAN)]})
+
+        with mock.patch.object(irc, 'timeout') as timeout, mock.patch.object(irc, 'ban') as ban, \
+                mock.patch.object(irc, 'on_moderation') as on_moderation:
+            irc._on_handle_twitch(privmsg('spam'))
+            irc._on_handle_twitch(privmsg('more spam'))
+            irc._on_handle_twitch(privmsg('spam', user='b_user'))
+            irc._on_handle_twitch(privmsg('a scam'))
+            irc._on_handle_twitch(privmsg('spam', user='a_mod', tags={'mod': '1'}))
+
+            # Assertions
+            self.assertTrue(
+                timeout.call_args_list == [mock.call('#test-room', 'a_user', 30, None),
+                                           mock.call('#test-room', 'b_user', 30, None)],
+                "Expect one timeout per chatter within the window",
+            )
+            ban.assert_called_once_with('#test-room', 'a_user', None)
+            self.assertTrue(on_moderation.call_count == 3, "Expect on_moderation per action")
+
+    def test_empty_badges(self):
+        class Bot(ModerationBot):
+            def on_message(self, timestamp, tags, channel, user, message):
+                self.received.append(message)
+
+        irc = Bot('dummy', 'dummy_token', rules={None: [Rule('spam', seconds=30)]})
+        irc.received = []
+
+        # Pydle parses the empty badges tag as True
+        message = TaggedMessage.parse(
+            b'@badges=;mod=0 :a_user!a_user@a_user.tmi.twitch.tv PRIVMSG #test-room :spam', encoding='utf-8',
+        )
+        broadcaster = privmsg('spam', user='the_streamer', tags={'badges': 'broadcaster/1', 'mod': '0'})
+
+        with mock.patch.object(irc, 'timeout') as timeout:
+            irc._on_handle_twitch(message)
+            irc._on_handle_twitch(broadcaster)
+
+            # Assertions
+            timeout.assert_called_once_with('#test-room', 'a_user', 30, None)
+            self.assertTrue(irc.received == ['spam', 'spam'], "Expect messages delivered to on_message")
+
+    def test_window(self):
+        class Bot(ModerationBot):
+            MODERATION_WINDOW = 0.05
+
+        irc = Bot('dummy', 'dummy_token', rules={None: [Rule('spam', seconds=30)]})
+
+        with mock.patch.object(irc, 'timeout') as timeout:
+            for user in ('a_user', 'b_user', 'a_user'):
+                irc._on_handle_twitch(privmsg('spam', user=user))
+
+            time.sleep(0.06)
+            irc._on_handle_twitch(privmsg('spam', user='c_user'))
+
+            # Assertions
+            self.assertTrue(timeout.call_count == 3, "Expect chatters actioned once within the window")
+            self.assertTrue(list(irc._actioned) == [('#test-room', 'c_user')], "Expect expired entries dropped")
+
+            irc._on_handle_twitch(privmsg('spam'))
+            self.assertTrue(timeout.call_count == 4, "Expect chatters actioned again after the window")
+
+    def test_offload(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self.addCleanup(asyncio.set_event_loop, None)
+        self.addCleanup(loop.close)
+
+        class Bot(ModerationBot):
+            MODERATION_OFFLOAD = True
+            EXECUTOR_WORKERS = 1
+
+        irc = Bot('dummy', 'dummy_token', rules={None: [Rule('spam')]})
+        self.addCleanup(irc.workers.shutdown)
+
+        with mock.patch.object(irc, 'timeout') as timeout:
+            irc._on_handle_twitch(privmsg('spam'))
+            irc._on_handle_twitch(privmsg('hello'))
+            loop.run_until_complete(asyncio.sleep(0.05))
+
+            # Assertions
+            timeout.assert_called_once_with('#test-room', 'a_user', 600, None)
+
+    def test_offload_requires_threads(self):
+        class Bot(ModerationBot):
+            MODERATION_OFFLOAD = True
+            EXECUTOR = 'process'
+
+        with self.assertRaises(ValueError):
+            Bot('dummy', 'dummy_token')
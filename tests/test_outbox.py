@@ -0,0 +1,127 @@
+import asyncio
+import threading
+import unittest
+from unittest import mock
+
+from python_twitch_irc import TwitchIrc
+from python_twitch_irc.outbox import Outbox
+
+
+async def wait(handles):
+    return [await handle for handle in handles]
+
+
+class TestOutbox(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.calls = []
+
+    def call(self, name, *args):
+        self.calls.append((name, args, threading.current_thread()))
+
+        if name == 'fail':
+            raise ValueError("failed")
+        if name == 'later':
+            future = self.loop.create_future()
+            self.loop.call_soon(future.set_result, 'written')
+            return future
+
+        return len(self.calls)
+
+    def test_threads(self):
+        outbox = Outbox(self.call, {'message'}, loop=self.loop)
+        handles = []
+
+        def produce(index):
+            handles.extend(outbox.submit([('message', index, i) for i in range(100)]))
+
+        threads = [threading.Thread(target=produce, args=(index,)) for index in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.loop.run_until_complete(asyncio.wait_for(wait(handles), 5))
+
+        # Assertions
+        self.assertTrue(len(self.calls) == 400, "Expect every command run")
+        self.assertTrue(all(thread is threading.current_thread() for _, _, thread in self.calls), "Expect loop thread")
+
+        for index in range(4):
+            order = [args[1] for _, args, _ in self.calls if args[0] == index]
+            self.assertTrue(order == list(range(100)), "Expect submissions run in order")
+
+    def test_single_wake_up(self):
+        outbox = Outbox(self.call, {'message'}, loop=self.loop)
+
+        with mock.patch.object(self.loop, 'call_soon_threadsafe', wraps=self.loop.call_soon_threadsafe) as wake:
+            outbox.submit([('message', 'a')])
+            outbox.submit([('message', 'b'), ('message', 'c')])
+            self.loop.run_until_complete(asyncio.sleep(0))
+            outbox.submit([('message', 'd')])
+
+            # Assertions
+            self.assertTrue(wake.call_count == 2, "Expect one wake-up per drained batch")
+
+    def test_drain_limit(self):
+        outbox = Outbox(self.call, {'message'}, loop=self.loop, drain_limit=2)
+        handles = outbox.submit([('message', i) for i in range(5)])
+
+        outbox._drain()
+        partial = len(self.calls)
+        self.loop.run_until_complete(wait(handles))
+
+        # Assertions
+        self.assertTrue(partial == 2, "Expect the loop to yield after drain_limit commands")
+        self.assertTrue(len(self.calls) == 5, "Expect the rest drained")
+
+    def test_handles(self):
+        outbox = Outbox(self.call, {'message', 'fail', 'later'}, loop=self.loop)
+        sent, failed, later, cancelled = outbox.submit([('message',), ('fail',), ('later',), ('message',)])
+        cancelled.cancel()
+
+        self.loop.run_until_complete(asyncio.sleep(0.01))
+
+        # Assertions
+        self.assertTrue(sent.done() and sent.result() == 1, "Expect handles pollable")
+        self.assertTrue(isinstance(failed.exception(), ValueError), "Expect exceptions on the handle")
+        self.assertTrue(self.loop.run_until_complete(later) == 'written', "Expect awaitable results resolved")
+        self.assertTrue(len(self.calls) == 3, "Expect cancelled commands skipped")
+
+    def test_validation(self):
+        outbox = Outbox(self.call, {'message'})
+
+        with self.assertRaises(ValueError):
+            outbox.submit([('disconnect',)])
+
+        with self.assertRaises(RuntimeError):
+            outbox.submit([('message', 'a')])
+
+
+class TestClientSendMany(unittest.TestCase):
+    def test_send_many(self):
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+
+        irc = TwitchIrc('dummy', 'dummy_token')
+        irc._outbox.bind(loop)
+
+        with mock.patch.object(irc, 'timeout', return_value=None) as timeout, \
+                mock.patch.object(irc, 'message', return_value=None) as message:
+            thread = threading.Thread(target=lambda: irc.send_many([
+                ('timeout', '#test-room', 'a_user', 600),
+                ('message', '#test-room', 'hello'),
+            ]))
+            thread.start()
+            thread.join()
+
+            handle = irc.send_threadsafe('message', '#test-room', 'again')
+            loop.run_until_complete(asyncio.wait_for(handle, 5))
+
+            # Assertions
+            timeout.assert_called_once_with('#test-room', 'a_user', 600)
+            self.assertTrue(
+                message.call_args_list == [mock.call('#test-room', 'hello'), mock.call('#test-room', 'again')],
+                "Expect commands run in order",
+            )
@@ -0,0 +1,68 @@
+import unittest
+
+from pydle.features.ircv3.tags import TaggedMessage
+
+from python_twitch_irc import TwitchIrc
+from python_twitch_irc.parser import parse_line
+
+LINES = [
+    b'@badge-info=subscriber/14;badges=subscriber/12,bits/1000;color=#1E90FF;display-name=Some_Viewer;'
+    b'emotes=25:0-4,12-16/1902:6-10;first-msg=0;flags=;id=b34ccfc7-4977-403a-8a94-33c6bac34fb8;mod=0;'
+    b'room-id=36026978;subscriber=1;tmi-sent-ts=1533676810932;turbo=0;user-id=244083199;user-type= '
+    b':some_viewer!some_viewer@some_viewer.tmi.twitch.tv PRIVMSG #test_room :Kappa Keepo Kappa\r\n',
+    b'@badges=;color=;display-name=\xec\x95\x88\xeb\x85\x95;emotes=;id=1f2b8e04;mod=0;user-id=5 '
+    b':viewer!viewer@viewer.tmi.twitch.tv PRIVMSG #test_room :\xf0\x9f\x8e\x89 :colons: in  text \r\n',
+    b':viewer!viewer@viewer.tmi.twitch.tv PRIVMSG #test_room :no tags\r\n',
+    b'@badge-info=subscriber/6;badges=subscriber/6;login=resub_fan;msg-id=resub;msg-param-months=0;'
+    b'msg-param-sub-plan-name=Channel\\sSubscription\\s(test_room);system-msg=Resub_Fan\\ssubscribed\\:'
+    b'\\sthanks!;tmi-sent-ts=1533676812001 :tmi.twitch.tv USERNOTICE #test_room :Great stream!\r\n',
+    b'@login=gifter;msg-id=subgift;system-msg=Gifter\\sgifted\\sa\\ssub! :tmi.twitch.tv USERNOTICE #test_room\n',
+    b'@ban-duration=600;room-id=36026978;target-user-id=244083199;tmi-sent-ts=1533676813100 '
+    b':tmi.twitch.tv CLEARCHAT #test_room :spammer_99\r\n',
+    b'@room-id=36026978;tmi-sent-ts=1533676813200 :tmi.twitch.tv CLEARCHAT #test_room\r\n',
+]
+
+
+class TestParser(unittest.TestCase):
+    def test_compatible_with_pydle(self):
+        for line in LINES:
+            expected = TaggedMessage.parse(line)
+            message = parse_line(line)
+
+            # Assertions
+            self.assertTrue(message is not None, f"Expect fast path for {line!r}")
+            self.assertEqual(message.command, expected.command)
+            self.assertEqual(message.source, expected.source)
+            self.assertEqual(message.params, expected.params)
+            self.assertEqual(dict(message.tags), expected.tags)
+
+    def test_line_endings(self):
+        line = b':viewer!viewer@viewer.tmi.twitch.tv PRIVMSG #test_room :no tags'
+
+        # Assertions
+        for ending in (b'', b'\r', b'\n', b'\r\n'):
+            message = parse_line(line + ending)
+            self.assertTrue(message.params[-1] == 'no tags', f"Expect {ending!r} stripped from the text")
+
+    def test_fallback(self):
+        line = b'@emote-only=0;room-id=36026978;slow=0 :tmi.twitch.tv ROOMSTATE #test_room\r\n'
+
+        self.assertTrue(parse_line(line) is None, "Expect other commands to fall back")
+
+    def test_client_fast_parser(self):
+        class Subclassed(TwitchIrc):
+            FAST_PARSER = True
+
+        irc = Subclassed('dummy', 'dummy_token')
+        irc._receive_buffer = LINES[0] + b':tmi.twitch.tv ROOMSTATE #test_room\r\n'
+
+        message = irc._parse_message()
+        fallback = irc._parse_message()
+
+        # Assertions
+        self.assertTrue(message.command == 'PRIVMSG', "Expect fast path message")
+        self.assertTrue(message.tags['display-name'] == 'Some_Viewer', "Expect lazy tags")
+        self.assertTrue(message.params[-1] == 'Kappa Keepo Kappa', "Expect message text without CR")
+        self.assertTrue(isinstance(fallback, TaggedMessage), "Expect Pydle message for other commands")
+        self.assertTrue(fallback.command == 'ROOMSTATE', "Expect Pydle to parse other commands")
+        self.assertTrue(irc._receive_buffer == b'', "Expect buffer to be consumed")
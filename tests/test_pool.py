@@ -0,0 +1,185 @@
+import asyncio
+import time
+import unittest
+from unittest import mock
+
+from python_twitch_irc import TwitchIrc, TwitchIrcPool
+from python_twitch_irc.pool import HashRing, ProcessShard
+
+
+class Dummy:
+    pass
+
+
+def make_message(command, params, tags):
+    message = Dummy()
+    message.command = command
+    message.params = params
+    message.tags = tags
+    message.source = None
+    return message
+
+
+class OfflineBot(TwitchIrc):
+    """
+    Shard answering its own JOINs as Twitch would, for running process
+    shards without a server
+    """
+    def start(self):
+        self._on_pool_connect()
+        return self
+
+    def _send_raw(self, line):
+        command, _, channels = line.partition(' ')
+
+        if command == 'JOIN':
+            asyncio.get_event_loop().call_soon(self._answer_join, channels.split(','))
+
+    def _answer_join(self, channels):
+        for channel in channels:
+            self._on_handle_twitch(make_message('USERSTATE', [channel], {'mod': '1', 'badges': 'moderator/1'}))
+            self._on_handle_twitch(make_message('ROOMSTATE', [channel], {
+                'room-id': '1', 'slow': '30', 'followers-only': '-1', 'subs-only': '0', 'emote-only': '0', 'r9k': '0',
+            }))
+
+
+class RoomPool(TwitchIrcPool):
+    def on_roomstate(self, timestamp, tags, channel):
+        self.rooms.append(channel)
+
+
+class TestHashRing(unittest.TestCase):
+    def test_minimal_movement(self):
+        ring = HashRing(range(4))
+        keys = [f"#channel_{i}" for i in range(1000)]
+        before = {key: ring.get(key) for key in keys}
+
+        ring.add(4)
+        moved = [key for key in keys if ring.get(key) != before[key]]
+
+        # Assertions
+        self.assertTrue(set(before.values()) == {0, 1, 2, 3}, "Expect keys spread over nodes")
+        self.assertTrue(all(ring.get(key) == 4 for key in moved), "Expect keys to only move to the new node")
+        self.assertTrue(len(moved) < 400, "Expect roughly a fifth of keys to move")
+
+
+class TestTwitchIrcPool(unittest.TestCase):
+    def test_join_spreads_channels(self):
+        pool = TwitchIrcPool('dummy', 'dummy_token', shards=3)
+
+        for i in range(60):
+            pool.join(f"#channel_{i}")
+
+        # Assertions
+        owners = {pool.shard_for(channel) for channel in pool.channels}
+        self.assertTrue(len(owners) == 3, "Expect every shard to own channels")
+        self.assertTrue(all(isinstance(shard, TwitchIrc) for shard in pool.shards), "Expect TwitchIrc shards")
+
+    def test_grow_and_shrink(self):
+        class SmallPool(TwitchIrcPool):
+            MAX_CHANNELS_PER_SHARD = 10
+
+        pool = SmallPool('dummy', 'dummy_token')
+
+        for i in range(25):
+            pool.join(f"#channel_{i}")
+
+        # Assertions
+        self.assertTrue(len(pool.shards) == 3, "Expect shards added as channels grow")
+        self.assertTrue(
+            all(pool._channels[channel] is pool.shard_for(channel) for channel in pool.channels),
+            "Expect channels owned by their ring shard",
+        )
+
+        for i in range(22):
+            pool.part(f"#channel_{i}")
+
+        self.assertTrue(len(pool.shards) == 1, "Expect shards removed as channels drop")
+        self.assertTrue(len(pool.channels) == 3, "Expect remaining channels")
+
+    def test_rebalance_when_started(self):
+        class SmallPool(TwitchIrcPool):
+            MAX_CHANNELS_PER_SHARD = 2
+
+        pool = SmallPool('dummy', 'dummy_token')
+        pool._started = True
+
+        with mock.patch.object(TwitchIrc, 'join_many', new_callable=mock.MagicMock) as joined, \
+                mock.patch.object(TwitchIrc, 'part_many', new_callable=mock.MagicMock) as parted, \
+                mock.patch.object(TwitchIrc, 'start', new_callable=mock.MagicMock):
+            for i in range(3):
+                pool.join(f"#channel_{i}")
+
+            joins = sum(len(call[0][0]) for call in joined.call_args_list)
+            parts = sum(len(call[0][0]) for call in parted.call_args_list)
+
+            # Assertions
+            self.assertTrue(len(pool.shards) == 2, "Expect a second shard")
+            self.assertTrue(joins == 3 + parts, "Expect moved channels rejoined through join_many")
+            self.assertTrue(
+                all(shard._membership._bucket is pool._join_bucket for shard in pool.shards),
+                "Expect shards to share the join limit",
+            )
+
+    def test_unified_callbacks(self):
+        class MyPool(TwitchIrcPool):
+            def on_message(self, timestamp, tags, channel, user, message):
+                self.received = (channel, user, message)
+
+        pool = MyPool('dummy', 'dummy_token', shards=2)
+        message = Dummy()
+        message.source = 'a_user!a_user@a_user.tmi.twitch.tv'
+        message.command = 'PRIVMSG'
+        message.params = ['#test-room', 'message']
+        message.tags = {}
+
+        pool.shards[1]._on_handle_twitch(message)
+
+        # Assertions
+        self.assertTrue(pool.received == ('#test-room', 'a_user', 'message'), "Expect callback on the pool")
+        self.assertTrue(pool.shards[0]._event_callbacks == frozenset(), "Expect no events built")
+
+    def test_helpers_routed(self):
+        pool = TwitchIrcPool('dummy', 'dummy_token', shards=4)
+        shard = pool.shard_for('#test-room')
+
+        with mock.patch.object(shard, 'timeout') as mocked:
+            pool.timeout('#test-room', 'a_user', 600)
+
+            # Assertions
+            self.assertTrue(mocked.called, "Expect helper called on the owning shard")
+            self.assertTrue(mocked.call_args[0] == ('#test-room', 'a_user', 600), "Expect arguments passed")
+
+
+class TestProcessShards(unittest.TestCase):
+    def test_processes(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self.addCleanup(asyncio.set_event_loop, None)
+        self.addCleanup(loop.close)
+
+        pool = RoomPool('dummy', 'dummy_token', shards=2, client_class=OfflineBot, processes=True)
+        pool.rooms = []
+        pool.join('#test-room')
+        pool.start()
+        self.addCleanup(pool.stop)
+
+        async def joined():
+            deadline = time.monotonic() + 30
+
+            while not (pool.is_mod('#test-room') and pool.rooms) and time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+
+        loop.run_until_complete(joined())
+        shard = pool.shard_for('#test-room')
+
+        # Assertions
+        self.assertTrue(all(isinstance(shard, ProcessShard) for shard in pool.shards), "Expect process shards")
+        self.assertTrue(pool.rooms == ['#test-room'], "Expect callbacks forwarded from the child")
+        self.assertTrue(pool.is_mod('#test-room'), "Expect the child's mod status")
+        self.assertTrue(pool.slow_seconds('#test-room') == 30, "Expect the child's slow mode")
+
+        process = shard._process
+        pool.stop()
+        process.join(10)
+        self.assertTrue(process.exitcode == 0, "Expect the child to stop cleanly")
@@ -0,0 +1,190 @@
+import asyncio
+import gc
+import unittest
+
+from python_twitch_irc.ratelimit import (
+    PRIORITY_MODERATION, RecipientWindow, SendScheduler, StaleMessage, TokenBucket, WhisperRecipientLimit,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_refill(self):
+        clock = Clock()
+        bucket = TokenBucket(20, 30, clock=clock)
+
+        for _ in range(20):
+            bucket.take()
+
+        # Assertions
+        self.assertTrue(bucket.delay() == 1.5, "Expect one token every 1.5 seconds")
+        clock.now = 1.5
+        self.assertTrue(bucket.delay() == 0, "Expect a token after refill")
+
+
+class TestRecipientWindow(unittest.TestCase):
+    def test_expiry(self):
+        clock = Clock()
+        window = RecipientWindow(2, 10, clock=clock)
+        window.add('a')
+        clock.now = 5
+        window.add('b')
+
+        # Assertions
+        self.assertTrue(not window.allowed('c') and window.allowed('a'), "Expect the limit per window")
+        clock.now = 10
+        self.assertTrue(window.allowed('c') and len(window._recipients) == 1, "Expect expired recipients popped")
+
+
+class TestSendScheduler(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.clock = Clock()
+        self.sent = []
+        self.mods = set()
+        self.slow = {}
+        self.scheduler = SendScheduler(
+            lambda target, text: self.sent.append((target, text)),
+            lambda channel: channel in self.mods,
+            lambda channel: self.slow.get(channel, 0),
+            loop=self.loop,
+            clock=self.clock,
+        )
+        self.scheduler._schedule = lambda delay: None
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_user_limit(self):
+        futures = [self.scheduler.submit('#test-room', f"message {i}") for i in range(25)]
+        self.scheduler._pump()
+
+        # Assertions
+        self.assertTrue(len(self.sent) == 20, "Expect 20 messages per 30 seconds")
+        self.assertTrue(all(future.done() for future in futures[:20]), "Expect sent futures resolved")
+        self.assertTrue(not futures[20].done(), "Expect remaining messages queued")
+
+        self.clock.now = 1.5
+        self.scheduler._pump()
+        self.assertTrue(len(self.sent) == 21, "Expect one more message after refill")
+
+    def test_moderator_limit(self):
+        self.mods.add('#test-room')
+
+        for i in range(120):
+            self.scheduler.submit('#test-room', f"message {i}")
+        self.scheduler._pump()
+
+        # Assertions
+        self.assertTrue(len(self.sent) == 100, "Expect 100 messages per 30 seconds as moderator")
+
+    def test_moderation_priority(self):
+        for i in range(25):
+            self.scheduler.submit('#test-room', f"message {i}")
+        self.scheduler.submit('#test-room', '.ban spammer', priority=PRIORITY_MODERATION)
+        self.scheduler._pump()
+
+        # Assertions
+        self.assertTrue(self.sent[0] == ('#test-room', '.ban spammer'), "Expect moderation first")
+
+    def test_priority_across_channels(self):
+        for i in range(25):
+            self.scheduler.submit('#test-room', f"message {i}")
+        self.scheduler._pump()
+        self.scheduler.submit('#other-room', 'normal')
+        self.scheduler.submit('#third-room', '.ban spammer', priority=PRIORITY_MODERATION)
+
+        self.clock.now = 1.5
+        self.scheduler._pump()
+
+        # Assertions
+        self.assertTrue(self.sent[-1] == ('#third-room', '.ban spammer'), "Expect moderation first in any channel")
+        self.assertTrue(len(self.scheduler) == 6, "Expect the rest queued")
+
+    def test_large_backlog(self):
+        for i in range(20000):
+            self.scheduler.submit(f"#room-{i % 100}", f"message {i}")
+
+        for second in range(10):
+            self.clock.now = second * 1.5
+            self.scheduler._pump()
+
+        # Assertions
+        self.assertTrue(len(self.sent) == 29 and len(self.scheduler) == 20000 - 29, "Expect the user limit")
+        self.assertTrue(self.sent[:2] == [('#room-0', 'message 0'), ('#room-1', 'message 1')], "Expect FIFO order")
+
+    def test_slow_mode(self):
+        self.slow['#test-room'] = 10
+        self.scheduler.submit('#test-room', 'first')
+        self.scheduler.submit('#test-room', 'second')
+        self.scheduler.submit('#other-room', 'other')
+        self.scheduler._pump()
+
+        # Assertions
+        self.assertTrue([text for _, text in self.sent] == ['first', 'other'], "Expect slow channel held")
+
+        self.clock.now = 10
+        self.scheduler._pump()
+        self.assertTrue(self.sent[-1] == ('#test-room', 'second'), "Expect message after slow delay")
+
+    def test_stale(self):
+        self.slow['#test-room'] = 60
+        self.scheduler.submit('#test-room', 'first')
+        future = self.scheduler.submit('#test-room', 'second')
+        self.scheduler._pump()
+
+        self.clock.now = 60
+        self.scheduler._pump()
+
+        # Assertions
+        self.assertTrue(isinstance(future.exception(), StaleMessage), "Expect stale message dropped")
+        self.assertTrue(len(self.sent) == 1, "Expect stale message not sent")
+
+    def test_dropped_unretrieved(self):
+        errors = []
+        self.loop.set_exception_handler(lambda loop, context: errors.append(context))
+        self.slow['#test-room'] = 60
+        self.scheduler.submit('#test-room', 'first')
+        self.scheduler.submit('#test-room', 'second')
+        self.scheduler._pump()
+
+        self.clock.now = 60
+        with self.assertLogs(level='WARNING') as logs:
+            self.scheduler._pump()
+        gc.collect()
+
+        # Assertions
+        self.assertTrue(len(logs.output) == 1, "Expect the dropped line logged once")
+        self.assertTrue(errors == [], "Expect no unretrieved exception logged for dropped futures")
+
+    def test_coalesce(self):
+        self.slow['#test-room'] = 60
+        self.scheduler.submit('#test-room', 'first')
+        first = self.scheduler.submit('#test-room', '.slow 10', key=('slow', '#test-room'))
+        second = self.scheduler.submit('#test-room', '.slowoff', key=('slow', '#test-room'))
+
+        # Assertions
+        self.assertTrue(first.cancelled(), "Expect replaced message cancelled")
+        self.assertTrue(len(self.scheduler) == 2, "Expect replaced message removed from queue")
+        self.assertTrue(not second.done(), "Expect replacement queued")
+
+    def test_whisper_limits(self):
+        for i in range(5):
+            self.scheduler.submit('#jtv', f".w user_{i} hi", whisper_to=f"user_{i}")
+        self.scheduler._pump()
+
+        # Assertions
+        self.assertTrue(len(self.sent) == 3, "Expect 3 whispers per second")
+
+        self.scheduler._recipients.limit = 5
+        self.clock.now = 1
+        future = self.scheduler.submit('#jtv', '.w user_9 hi', whisper_to='user_9')
+        self.scheduler._pump()
+        self.assertTrue(isinstance(future.exception(), WhisperRecipientLimit), "Expect recipient limit")
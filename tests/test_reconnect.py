@@ -0,0 +1,297 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from pydle.features.ircv3.tags import TaggedMessage
+
+from python_twitch_irc import TwitchIrc
+from python_twitch_irc.fake_server import FakeTwitchServer
+from python_twitch_irc.irc import ReconnectLink
+from python_twitch_irc.reconnect import MessageIdCache, ZeroGapReconnect
+
+
+class Dummy:
+    pass
+
+
+def make_message(command, params, tags=None, source=None):
+    message = Dummy()
+    message.command = command
+    message.params = params
+    message.tags = tags or {}
+    message.source = source
+    return message
+
+
+def privmsg(message_id, text):
+    return make_message(
+        'PRIVMSG',
+        ['#test-room', text],
+        {'id': message_id},
+        'a_user!a_user@a_user.tmi.twitch.tv',
+    )
+
+
+class TestMessageIdCache(unittest.TestCase):
+    def test_bounded(self):
+        cache = MessageIdCache(maxsize=2)
+
+        # Assertions
+        self.assertTrue(not cache.seen('a'), "Expect first sighting")
+        self.assertTrue(cache.seen('a'), "Expect duplicate")
+        cache.seen('b')
+        cache.seen('c')
+        self.assertTrue(len(cache) == 2 and 'a' not in cache, "Expect oldest id evicted")
+
+
+class Bot(TwitchIrc):
+    ZERO_GAP_RECONNECT = True
+
+    def on_message(self, timestamp, tags, channel, user, message):
+        self.received.append(message)
+
+
+class ServerSocket:
+    """
+    Talks to a FakeTwitchServer over a plain asyncio connection, feeding
+    lines straight into dispatch
+    """
+    writer = None
+
+    def _connect_socket(self):
+        self._disconnect_socket()
+        self._connecting = asyncio.ensure_future(self._serve())
+        return self._connecting
+
+    def _disconnect_socket(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+        self.channels = {}
+
+    def _send_raw(self, line):
+        self.writer.write(f"{line}\r\n".encode())
+
+    async def _serve(self):
+        reader, writer = await asyncio.open_connection(self._server, self._port)
+        self.writer = writer
+        writer.write(b'CAP REQ :twitch.tv/tags twitch.tv/commands twitch.tv/membership\r\n')
+        writer.write(f"PASS oauth:{self._token}\r\nNICK {self._username}\r\n".encode())
+
+        while self.writer is writer:
+            line = await reader.readline()
+            if not line:
+                break
+
+            message = TaggedMessage.parse(line, encoding='utf-8')
+            message.command = str(message.command).zfill(3)
+
+            if message.command == '376':
+                # Pydle's own registration handling needs its connection
+                self.on_raw_376(message).close()
+            elif message.command == 'JOIN':
+                self.channels[message.params[0]] = {}
+            elif message.command in self._twitch_dispatch:
+                self._on_handle_twitch(message)
+
+
+class ServerBot(ServerSocket, Bot):
+    def on_reconnect_cmd(self, timestamp):
+        self.reconnects.append(self._reconnect)
+
+
+class ServerLink(ServerSocket, ReconnectLink):
+    pass
+
+
+class TestZeroGapReconnect(unittest.TestCase):
+    """
+    Simulates Twitch's RECONNECT: both connections are driven by feeding
+    lines into their dispatch while start/stop/raw record what would have
+    gone over the sockets.
+    """
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.events = []
+
+        patches = [
+            mock.patch.object(TwitchIrc, '_connect_socket', new=lambda irc: self.events.append(('connect', irc))),
+            mock.patch.object(TwitchIrc, '_disconnect_socket', new=lambda irc: self.events.append(('disconnect', irc))),
+            mock.patch.object(TwitchIrc, 'stop', new=lambda irc: self.events.append(('stop', irc))),
+            mock.patch.object(TwitchIrc, 'raw', new=lambda irc, line: self.events.append((line.strip(), irc))),
+            mock.patch.object(TwitchIrc, 'in_channel', new=lambda irc, channel: False),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        self.client = Bot('dummy', 'dummy_token')
+        self.client.received = []
+        self.client.channels = {'#test-room': {}, '#other-room': {}}
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def run_loop(self):
+        self.loop.run_until_complete(asyncio.sleep(0.01))
+
+    def test_reconnect(self):
+        client = self.client
+        client._on_handle_twitch(privmsg('1', 'before'))
+        client._on_handle_twitch(make_message('RECONNECT', []))
+
+        reconnect = client._reconnect
+        link = reconnect.link
+
+        # Assertions
+        self.assertTrue(isinstance(reconnect, ZeroGapReconnect), "Expect reconnect in progress")
+        self.assertTrue(isinstance(link, ReconnectLink), "Expect a link connection")
+        self.assertTrue(('connect', link) in self.events, "Expect link connected first")
+        self.assertTrue(('connect', client) not in self.events, "Expect old socket kept open")
+
+        # Link registers and joins in batches
+        link._on_ready()
+        self.run_loop()
+        self.assertTrue(('JOIN #test-room,#other-room', link) in self.events, "Expect batched JOIN")
+
+        # Overlapping messages from both sockets are delivered once
+        link._on_handle_twitch(privmsg('1', 'before'))
+        link._on_handle_twitch(privmsg('2', 'overlap'))
+        client._on_handle_twitch(privmsg('2', 'overlap'))
+        self.assertTrue(client.received == ['before', 'overlap'], "Expect duplicates dropped")
+
+        # Link caught up, old socket replaced
+        link._on_handle_twitch(make_message('ROOMSTATE', ['#test-room']))
+        link._on_handle_twitch(make_message('ROOMSTATE', ['#other-room']))
+        self.run_loop()
+        self.assertTrue(self.events.count(('connect', client)) == 1, "Expect old socket replaced once link caught up")
+
+        # Gap covered by the link while the client rejoins
+        link._on_handle_twitch(privmsg('3', 'gap'))
+        reconnect.client_ready()
+        self.run_loop()
+        self.assertTrue(('JOIN #test-room,#other-room', client) in self.events, "Expect client rejoined")
+
+        client._on_handle_twitch(privmsg('3', 'gap'))
+        client._on_handle_twitch(make_message('ROOMSTATE', ['#test-room']))
+        client._on_handle_twitch(make_message('ROOMSTATE', ['#other-room']))
+        self.run_loop()
+
+        self.assertTrue(('disconnect', link) in self.events, "Expect link closed once client caught up")
+        self.assertTrue(client._reconnect is None, "Expect reconnect complete")
+        self.assertTrue(client.received == ['before', 'overlap', 'gap'], "Expect no gap and no duplicates")
+        self.assertTrue(not any(event == 'stop' for event, _ in self.events), "Expect no full shutdown")
+
+    def test_link_timeout(self):
+        client = self.client
+        client.ZERO_GAP_TIMEOUT = 0.01
+        client._on_handle_twitch(make_message('RECONNECT', []))
+        reconnect = client._reconnect
+
+        # The link never registers
+        self.loop.run_until_complete(asyncio.sleep(0.05))
+
+        # Assertions
+        self.assertTrue(reconnect.state == ZeroGapReconnect.ABANDONED, "Expect the attempt abandoned")
+        self.assertTrue(client._reconnect is None, "Expect later RECONNECTs handled again")
+        self.assertTrue(('disconnect', reconnect.link) in self.events, "Expect the link closed")
+        self.assertTrue(('connect', client) in self.events, "Expect the client reconnected directly")
+
+        # Registered again
+        errors = []
+        self.loop.set_exception_handler(lambda loop, context: errors.append(context))
+        request = client._rejoin_restored()
+        self.run_loop()
+        self.assertTrue(('JOIN #test-room,#other-room', client) in self.events, "Expect channels rejoined")
+
+        client._on_handle_twitch(make_message('ROOMSTATE', ['#test-room']))
+        client._on_handle_twitch(make_message('ROOMSTATE', ['#other-room']))
+        self.run_loop()
+        self.assertTrue(client.snapshots is None, "Expect snapshots disabled")
+        self.assertTrue(request.future.done() and not request.failed, "Expect the rejoin completed")
+        self.assertTrue(errors == [], "Expect no error once the rejoin completed")
+
+        # A late link registration is ignored
+        reconnect.link._on_ready()
+        self.run_loop()
+        self.assertTrue(
+            not any(irc is reconnect.link and line.startswith('JOIN') for line, irc in self.events),
+            "Expect the abandoned link not to join",
+        )
+
+    def test_disabled(self):
+        irc = TwitchIrc('dummy', 'dummy_token')
+        irc._on_handle_twitch(make_message('RECONNECT', []))
+
+        # Assertions
+        self.assertTrue(irc._reconnect is None, "Expect no reconnect handling by default")
+        self.assertTrue(irc._seen_ids is None, "Expect no id cache by default")
+
+
+class TestZeroGapReconnectServer(unittest.TestCase):
+    """
+    Runs a reconnect against FakeTwitchServer.  ServerSocket stands in for
+    pydle's connection handling, so the socket swap through pydle's
+    connect() is not exercised here.
+    """
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.addCleanup(asyncio.set_event_loop, None)
+        self.addCleanup(self.loop.close)
+
+        patch = mock.patch('python_twitch_irc.irc.ReconnectLink', ServerLink)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    async def wait_for(self, condition):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+    def test_inject_reconnect(self):
+        channels = ['#test-room', '#other-room']
+
+        async def scenario(server):
+            client = ServerBot('bot', 'dummy_token', server.host, server.port)
+            client.received = []
+            client.reconnects = []
+            client._connect_socket()
+
+            await self.wait_for(lambda: any(connection.registered for connection in server.connections))
+            await client.join_many(channels)
+
+            async def chat():
+                for index in range(1000):
+                    server.chat('#test-room', text=str(index))
+                    await asyncio.sleep(0.002)
+
+            chatter = asyncio.ensure_future(chat())
+            await asyncio.sleep(0.05)
+
+            server.inject_reconnect()
+            await self.wait_for(lambda: client.reconnects and client._reconnect is None)
+
+            chatter.cancel()
+            await asyncio.sleep(0.05)
+            client._disconnect_socket()
+            return client, client.reconnects[0], server.sent['#test-room']
+
+        async def run():
+            async with FakeTwitchServer(rate=0, token='dummy_token') as server:
+                result = await asyncio.wait_for(scenario(server), 10)
+                members = [server.members(channel) for channel in channels]
+                return result + (members,)
+
+        client, reconnect, sent, members = self.loop.run_until_complete(run())
+
+        # Assertions
+        self.assertTrue(reconnect.state == ZeroGapReconnect.DONE, "Expect the reconnect completed")
+        self.assertTrue(sent > 0 and len(client.received) == sent, "Expect every message delivered once")
+        self.assertTrue(
+            sorted(client.received, key=int) == [str(index) for index in range(sent)],
+            "Expect no gap while the client reconnected",
+        )
+        self.assertTrue(all(len(member) == 1 for member in members), "Expect only the new connection joined")
@@ -0,0 +1,201 @@
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from python_twitch_irc import TwitchIrc
+from python_twitch_irc.recorder import Recorder, Replayer, line_channel
+
+LINES = [
+    b'@id=1;tmi-sent-ts=1533676810932 :a_user!a_user@a_user.tmi.twitch.tv PRIVMSG #test-room :first',
+    b'@id=2;tmi-sent-ts=1533676810933 :b_user!b_user@b_user.tmi.twitch.tv PRIVMSG #other-room :second',
+    b'@ban-duration=600;room-id=1 :tmi.twitch.tv CLEARCHAT #test-room :a_user',
+    b':tmi.twitch.tv RECONNECT',
+]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        self.now += 1
+        return self.now
+
+
+class Bot(TwitchIrc):
+    def on_message(self, timestamp, tags, channel, user, message):
+        self.received.append((channel, message))
+
+    def on_channel_ban(self, timestamp, tags, channel, user):
+        self.received.append((channel, user))
+
+
+class TestLineChannel(unittest.TestCase):
+    def test_line_channel(self):
+        # Assertions
+        self.assertTrue(line_channel(LINES[0]) == '#test-room', "Expect channel after tags and source")
+        self.assertTrue(line_channel(LINES[2]) == '#test-room', "Expect channel with trailing param")
+        self.assertTrue(line_channel(LINES[3]) is None, "Expect no channel")
+        self.assertTrue(line_channel(b'PING :tmi.twitch.tv') is None, "Expect no channel without a source")
+
+
+class TestRecorder(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = self.directory.name
+
+    def record(self, lines, **kwargs):
+        recorder = Recorder(self.path, clock=Clock(), **kwargs)
+
+        for line in lines:
+            recorder.record(line)
+
+        recorder.close()
+
+    def test_round_trip(self):
+        self.record(LINES)
+        records = list(Replayer(self.path).records())
+
+        # Assertions
+        self.assertTrue([line for _, line in records] == LINES, "Expect lines replayed in order")
+        self.assertTrue([received for received, _ in records] == [1001, 1002, 1003, 1004], "Expect receive times")
+
+    def test_rotation_and_index(self):
+        self.record(LINES * 3, segment_seconds=4)
+        replayer = Replayer(self.path)
+        segments = replayer.segments()
+
+        # Assertions
+        self.assertTrue(len(segments) == 3, "Expect a segment per four seconds")
+        self.assertTrue(all(os.path.exists(segment[:-4] + '.idx') for segment in segments), "Expect sidecar indexes")
+        self.assertTrue(replayer.index(segments[0]).channels['#test-room'][0] == 2, "Expect per channel counts")
+        self.assertTrue(len(list(replayer.records())) == 12, "Expect every line across segments")
+
+    def test_filter(self):
+        self.record(LINES * 3, segment_seconds=4)
+        replayer = Replayer(self.path)
+
+        # Assertions
+        self.assertTrue(
+            list(replayer.lines(channel='#other-room')) == [LINES[1]] * 3,
+            "Expect only the channel's lines",
+        )
+        self.assertTrue(
+            [received for received, _ in replayer.records(start=1006, end=1009)] == [1006, 1007, 1008, 1009],
+            "Expect only lines in the time range",
+        )
+
+    def test_reopen_continues_sequence(self):
+        self.record(LINES[:1])
+        self.record(LINES[1:2])
+
+        # Assertions
+        self.assertTrue(len(Replayer(self.path).segments()) == 2, "Expect new segments after existing ones")
+        self.assertTrue(list(Replayer(self.path).lines()) == LINES[:2], "Expect lines in order")
+
+    def test_dropped(self):
+        recorder = Recorder(self.path, clock=Clock(), queue_size=2)
+        writing = threading.Event()
+        unblocked = threading.Event()
+
+        def write(received, line):
+            writing.set()
+            unblocked.wait()
+
+        with mock.patch.object(recorder, '_write', side_effect=write):
+            recorder.record(LINES[0])
+            writing.wait()
+
+            # The writer is stuck on the first line
+            for line in LINES + LINES[:1]:
+                recorder.record(line)
+
+            unblocked.set()
+            recorder.close()
+
+        # Assertions
+        self.assertTrue(recorder.dropped == 3, "Expect lines beyond the queue size dropped and counted")
+
+    def test_client_stop(self):
+        class Recording(Bot):
+            RECORD_DIRECTORY = self.path
+
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self.addCleanup(asyncio.set_event_loop, None)
+        self.addCleanup(loop.close)
+
+        irc = Recording('dummy', 'dummy_token')
+        recorder = irc.recorder
+        unblocked = threading.Event()
+        write = recorder._write
+
+        def slow_write(received, line):
+            unblocked.wait()
+            write(received, line)
+
+        with mock.patch.object(recorder, '_write', side_effect=slow_write):
+            irc._receive_buffer = LINES[0] + b'\r\n'
+            irc._parse_message()
+            loop.run_until_complete(irc.stop())
+
+            # Assertions
+            self.assertTrue(irc.recorder is None, "Expect the recorder detached")
+            self.assertTrue(recorder._thread.is_alive(), "Expect stop not to wait for the writer")
+
+            unblocked.set()
+            recorder._thread.join(5)
+
+        replayer = Replayer(self.path)
+
+        self.assertTrue(not recorder._thread.is_alive(), "Expect the recorder closed")
+        self.assertTrue(list(replayer.lines()) == LINES[:1], "Expect queued lines written")
+        self.assertTrue(replayer.index(replayer.segments()[0]).records == 1, "Expect the index written")
+
+    def test_client_records(self):
+        class Recording(Bot):
+            RECORD_DIRECTORY = self.path
+
+        for fast_parser in (False, True):
+            irc = type('Client', (Recording,), {'FAST_PARSER': fast_parser})('dummy', 'dummy_token')
+            irc._receive_buffer = LINES[0] + b'\r\n'
+            message = irc._parse_message()
+            irc.recorder.close()
+
+            # Assertions
+            self.assertTrue(message.params == ['#test-room', 'first'], "Expect CRLF stripped before parsing")
+
+        self.assertTrue(list(Replayer(self.path).lines()) == LINES[:1] * 2, "Expect raw lines recorded")
+
+    def test_replay(self):
+        self.record(LINES)
+
+        irc = Bot('dummy', 'dummy_token')
+        irc.received = []
+        count = Replayer(self.path).replay(irc)
+
+        # Assertions
+        self.assertTrue(count == 4, "Expect every line replayed")
+        self.assertTrue(
+            irc.received == [('#test-room', 'first'), ('#other-room', 'second'), ('#test-room', 'a_user')],
+            "Expect lines dispatched to callbacks",
+        )
+
+    def test_replay_realtime(self):
+        self.record(LINES[:2])
+
+        irc = Bot('dummy', 'dummy_token')
+        irc.received = []
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+
+        start = loop.time()
+        loop.run_until_complete(Replayer(self.path).replay_realtime(irc, speed=20))
+
+        # Assertions
+        self.assertTrue(len(irc.received) == 2, "Expect every line replayed")
+        self.assertTrue(loop.time() - start >= 0.04, "Expect the one second gap at 20x speed")
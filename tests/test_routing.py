@@ -0,0 +1,161 @@
+import asyncio
+import unittest
+
+from python_twitch_irc import TwitchIrc
+from python_twitch_irc.routing import CommandTrie, Router
+
+
+class Dummy:
+    pass
+
+
+def make_message(command, params, tags=None, source=None):
+    message = Dummy()
+    message.command = command
+    message.params = params
+    message.tags = tags or {}
+    message.source = source
+    return message
+
+
+def privmsg(text, channel='#test-room'):
+    return make_message('PRIVMSG', [channel, text], {}, 'a_user!a_user@a_user.tmi.twitch.tv')
+
+
+class TestCommandTrie(unittest.TestCase):
+    def test_match(self):
+        trie = CommandTrie()
+        trie.add('!song', 'song')
+        trie.add('!song request', 'request')
+        trie.add('!so', 'shoutout')
+
+        # Assertions
+        self.assertTrue(trie.match('!song') == (['song'], ''), "Expect exact command")
+        self.assertTrue(trie.match('!SONG now') == (['song'], 'now'), "Expect case insensitive with args")
+        self.assertTrue(trie.match('!song request  abc ') == (['request'], 'abc'), "Expect longest command")
+        self.assertTrue(trie.match('!so a_user') == (['shoutout'], 'a_user'), "Expect prefix commands apart")
+        self.assertTrue(trie.match('!songs') is None, "Expect whole words only")
+        self.assertTrue(trie.match('hello') is None, "Expect no command")
+
+    def test_remove(self):
+        trie = CommandTrie()
+        trie.add('!song', 'song')
+        trie.add('!so', 'shoutout')
+
+        # Assertions
+        self.assertTrue(trie.remove('!song', 'song'), "Expect removed")
+        self.assertTrue(not trie.remove('!song', 'song'), "Expect removed once")
+        self.assertTrue(trie.match('!song') is None, "Expect command gone")
+        self.assertTrue(trie.match('!so') == (['shoutout'], ''), "Expect other commands kept")
+
+        trie.remove('!so', 'shoutout')
+        self.assertTrue(not trie, "Expect empty nodes pruned")
+
+
+class TestRouter(unittest.TestCase):
+    def test_handlers(self):
+        router = Router()
+        everywhere = router.on('message', 'everywhere')
+        router.on('message', 'room', '#test-room')
+
+        # Assertions
+        self.assertTrue(router.handlers('message', '#test-room') == ('room', 'everywhere'), "Expect channel first")
+        self.assertTrue(router.handlers('message', '#other-room') == ('everywhere',), "Expect global handlers")
+        self.assertTrue(router.handlers('message', None) == ('everywhere',), "Expect no duplicates without channel")
+
+        router.detach(everywhere)
+        self.assertTrue(router.handlers('message', '#other-room') == (), "Expect cache invalidated on detach")
+        self.assertTrue(len(router) == 1, "Expect routes counted")
+
+    def test_unknown_event(self):
+        with self.assertRaises(ValueError):
+            Router().on('privmsg', print)
+
+    def test_channel_commands(self):
+        router = Router()
+        router.command('!song', 'global')
+        route = router.command('!song', 'room', '#test-room')
+
+        # Assertions
+        self.assertTrue(router.command_for('#test-room', '!song')[0] == ['room'], "Expect channel commands first")
+        self.assertTrue(router.command_for('#other-room', '!song')[0] == ['global'], "Expect global commands")
+
+        router.detach(route)
+        self.assertTrue(router.command_for('#test-room', '!song')[0] == ['global'], "Expect detached")
+
+
+class TestClientRouting(unittest.TestCase):
+    def test_routes(self):
+        irc = TwitchIrc('dummy', 'dummy_token')
+        received = []
+
+        irc.route('message', lambda event: received.append(('message', event.message)), channel='#test-room')
+        irc.route('usernotice', lambda event: received.append(('usernotice', event.message)))
+
+        @irc.command('!song')
+        def song(event, args):
+            received.append(('song', args))
+
+        irc._on_handle_twitch(privmsg('!song please'))
+        irc._on_handle_twitch(privmsg('hello', channel='#other-room'))
+        irc._on_handle_twitch(make_message('USERNOTICE', ['#other-room', 'resub']))
+
+        # Assertions
+        self.assertTrue(
+            received == [('message', '!song please'), ('song', 'please'), ('usernotice', 'resub')],
+            "Expect events routed by type, channel and command",
+        )
+
+    def test_whisper(self):
+        irc = TwitchIrc('dummy', 'dummy_token')
+        received = []
+
+        irc.route('whisper', lambda event: received.append(event.message))
+        irc.route('message', lambda event: received.append(event.message))
+        irc._on_handle_twitch(make_message('WHISPER', ['dummy', 'psst'], {}, 'a_user!a_user@a_user.tmi.twitch.tv'))
+
+        # Assertions
+        self.assertTrue(received == ['psst'], "Expect whisper handlers called once")
+
+    def test_batched(self):
+        class Bot(TwitchIrc):
+            def on_message_batch(self, batch):
+                self.batches.append(list(batch.message))
+
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+
+        irc = Bot('dummy', 'dummy_token')
+        irc._batcher._loop = loop
+        irc.batches = []
+        received = []
+
+        irc.route('message', lambda event: received.append(event.message))
+        irc.command('!song', lambda event, args: received.append(('song', args)))
+        irc._on_handle_twitch(privmsg('!song please'))
+        irc.flush_batches()
+
+        # Assertions
+        self.assertTrue(irc.batches == [['!song please']], "Expect the message batched")
+        self.assertTrue(received == ['!song please', ('song', 'please')], "Expect routes still called per message")
+
+    def test_shared_event(self):
+        class Bot(TwitchIrc):
+            def on_message_event(self, event):
+                self.events.append(event)
+
+        irc = Bot('dummy', 'dummy_token')
+        irc.events = []
+        irc.route('message', irc.events.append)
+        irc._on_handle_twitch(privmsg('hello'))
+
+        # Assertions
+        self.assertTrue(len(irc.events) == 2 and irc.events[0] is irc.events[1], "Expect one event built")
+
+    def test_no_routes(self):
+        irc = TwitchIrc('dummy', 'dummy_token')
+        route = irc.command('!song', print)
+
+        # Assertions
+        self.assertTrue(irc.detach(route), "Expect detached")
+        self.assertTrue(not irc.router, "Expect no events built without routes")
@@ -0,0 +1,141 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from python_twitch_irc import TwitchIrc
+from python_twitch_irc.snapshot import SNAPSHOT_VERSION, read_snapshot, write_snapshot
+
+
+class Dummy:
+    pass
+
+
+def make_message(command, params, tags=None, source=None):
+    message = Dummy()
+    message.command = command
+    message.params = params
+    message.tags = tags or {}
+    message.source = source
+    return message
+
+
+ROOMSTATE_TAGS = {
+    'room-id': '1234', 'slow': '30', 'followers-only': '-1', 'subs-only': '0', 'emote-only': '0', 'r9k': '0',
+}
+USERSTATE_TAGS = {'mod': '1', 'badges': 'moderator/1', 'color': '#FF0000', 'display-name': 'Dummy'}
+
+
+class TestSnapshotFile(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.path = os.path.join(self.directory, 'snapshot.json')
+
+    def test_round_trip(self):
+        write_snapshot(self.path, {'version': SNAPSHOT_VERSION, 'channels': ['#a']})
+        write_snapshot(self.path, {'version': SNAPSHOT_VERSION, 'channels': ['#b']})
+
+        # Assertions
+        self.assertTrue(read_snapshot(self.path)['channels'] == ['#b'], "Expect the latest snapshot")
+        self.assertTrue(os.listdir(self.directory) == ['snapshot.json'], "Expect no temporary files left")
+
+    def test_unusable(self):
+        # Assertions
+        self.assertTrue(read_snapshot(self.path) is None, "Expect None without a snapshot")
+
+        with open(self.path, 'w') as f:
+            f.write('{"version": 1, "chan')
+        self.assertTrue(read_snapshot(self.path) is None, "Expect truncated snapshots ignored")
+
+        with open(self.path, 'w') as f:
+            json.dump({'version': SNAPSHOT_VERSION + 1}, f)
+        self.assertTrue(read_snapshot(self.path) is None, "Expect other versions ignored")
+
+    def test_failed_write(self):
+        write_snapshot(self.path, {'version': SNAPSHOT_VERSION, 'channels': ['#a']})
+
+        with self.assertRaises(TypeError):
+            write_snapshot(self.path, {'version': SNAPSHOT_VERSION, 'channels': object()})
+
+        # Assertions
+        self.assertTrue(read_snapshot(self.path)['channels'] == ['#a'], "Expect the previous snapshot kept")
+        self.assertTrue(os.listdir(self.directory) == ['snapshot.json'], "Expect the temporary file removed")
+
+
+class TestClientSnapshot(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'snapshot.json')
+
+        class Bot(TwitchIrc):
+            SNAPSHOT_PATH = path
+
+        self.Bot = Bot
+
+    def test_restore(self):
+        irc = self.Bot('dummy', 'dummy_token')
+        irc._on_handle_twitch(make_message('ROOMSTATE', ['#test-room'], ROOMSTATE_TAGS))
+        irc._on_handle_twitch(make_message('USERSTATE', ['#test-room'], USERSTATE_TAGS))
+        irc._seen_ids.seen('abc')
+        irc.snapshots.save()
+
+        restored = self.Bot('dummy', 'dummy_token')
+        state = restored.state.get('#test-room')
+
+        # Assertions
+        self.assertTrue(restored._restored_channels == ['#test-room'], "Expect channels to rejoin")
+        self.assertTrue(state.mod and state.slow == 30 and state.room_id == '1234', "Expect state restored")
+        self.assertTrue(not state.known, "Expect restored state unconfirmed")
+        self.assertTrue('abc' in restored._seen_ids, "Expect seen message ids restored")
+        self.assertTrue(self.Bot('other', 'dummy_token')._restored_channels == [], "Expect other users ignored")
+
+    def test_reconcile(self):
+        irc = self.Bot('dummy', 'dummy_token')
+        irc.state.restore('#gone', {'mod': True})
+        irc.state.restore('#test-room', {'mod': True, 'slow': 30})
+        irc._restored_channels = ['#gone', '#test-room']
+        changes = []
+        irc.state.subscribe(lambda channel, state, changed: changes.append(changed))
+
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        irc._membership._loop = irc.snapshots._loop = loop
+        irc._send_raw = lambda line: None
+
+        request = irc._rejoin_restored()
+        irc._on_handle_twitch(make_message('ROOMSTATE', ['#test-room'], ROOMSTATE_TAGS))
+        irc._on_handle_twitch(make_message('NOTICE', ['#gone', 'banned'], {'msg-id': 'msg_channel_suspended'}))
+        loop.run_until_complete(asyncio.wait_for(request, 5))
+        loop.run_until_complete(asyncio.sleep(0.1))
+
+        # Assertions
+        self.assertTrue(list(irc.state) == ['#test-room'], "Expect failed channels dropped")
+        self.assertTrue(irc.state.get('#test-room').known, "Expect state confirmed by the server")
+        self.assertTrue(changes == [{'room_id': (None, '1234')}], "Expect only differences notified")
+        self.assertTrue(read_snapshot(irc.snapshots.path)['channels'] == ['#test-room'], "Expect a fresh snapshot")
+
+    def test_rejoin_cancelled(self):
+        irc = self.Bot('dummy', 'dummy_token')
+        irc._restored_channels = ['#test-room']
+        errors = []
+
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        loop.set_exception_handler(lambda loop, context: errors.append(context))
+        irc._membership._loop = irc.snapshots._loop = loop
+        irc._membership._send = lambda line: None
+
+        request = irc._rejoin_restored()
+        request.future.cancel()
+
+        with mock.patch.object(irc.snapshots, 'save_soon') as save_soon:
+            loop.run_until_complete(asyncio.sleep(0.01))
+
+        # Assertions
+        self.assertTrue(errors == [], "Expect no error in the done callback")
+        self.assertTrue(not save_soon.called, "Expect nothing reconciled for a cancelled rejoin")
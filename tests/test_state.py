@@ -0,0 +1,125 @@
+import unittest
+from unittest import mock
+
+import pydle
+
+from python_twitch_irc import TwitchIrc
+from python_twitch_irc.state import StateStore
+
+FULL_ROOMSTATE = {
+    'emote-only': '0',
+    'followers-only': '-1',
+    'r9k': '0',
+    'room-id': '36026978',
+    'slow': '0',
+    'subs-only': '0',
+}
+
+
+class Dummy:
+    pass
+
+
+def make_message(command, params, tags=None, source=None):
+    message = Dummy()
+    message.command = command
+    message.params = params
+    message.tags = tags or {}
+    message.source = source
+    return message
+
+
+class TestStateStore(unittest.TestCase):
+    def test_merge_roomstate(self):
+        store = StateStore()
+        store.update_room('#test-room', FULL_ROOMSTATE)
+        changes = store.update_room('#test-room', {'room-id': '36026978', 'slow': '10'})
+        state = store.get('#test-room')
+
+        # Assertions
+        self.assertTrue(state.known, "Expect state known after a full ROOMSTATE")
+        self.assertTrue(changes == {'slow': (0, 10)}, "Expect only slow to change")
+        self.assertTrue(store.slow_seconds('#test-room') == 10, "Expect slow seconds")
+        self.assertTrue(state.room_id == '36026978' and state.followers_only == -1, "Expect other fields kept")
+        self.assertTrue(store.slow_seconds('#other-room') == 0, "Expect 0 for unknown channels")
+
+    def test_partial_first(self):
+        store = StateStore()
+        store.update_room('#test-room', {'slow': '10'})
+
+        # Assertions
+        self.assertTrue(not store.get('#test-room').known, "Expect state unknown without a full ROOMSTATE")
+
+    def test_userstate(self):
+        store = StateStore()
+        store.update_user('#test-room', {'badges': 'vip/1', 'mod': '0', 'color': '#FF0000'})
+        changes = store.update_user('#test-room', {'badges': 'moderator/1', 'mod': '1', 'color': '#FF0000'})
+        state = store.get('#test-room')
+
+        # Assertions
+        self.assertTrue(store.is_mod('#test-room'), "Expect mod")
+        self.assertTrue(not state.vip, "Expect vip badge gone")
+        self.assertTrue(set(changes) == {'mod', 'vip', 'badges'}, "Expect only changed fields")
+        self.assertTrue(not store.is_mod('#other-room'), "Expect no mod in unknown channels")
+
+    def test_broadcaster_is_mod(self):
+        store = StateStore()
+        store.update_user('#test-room', {'badges': 'broadcaster/1', 'mod': '0'})
+
+        # Assertions
+        self.assertTrue(store.is_mod('#test-room'), "Expect broadcaster to count as mod")
+
+    def test_subscribe(self):
+        store = StateStore()
+        everything = []
+        room = []
+        store.subscribe(lambda *args: everything.append(args))
+        callback = store.subscribe(lambda *args: room.append(args), '#test-room')
+
+        store.update_room('#test-room', FULL_ROOMSTATE)
+        store.update_room('#test-room', {'slow': '0'})
+        store.update_room('#other-room', {'slow': '5'})
+        store.unsubscribe(callback)
+        store.update_room('#test-room', {'slow': '5'})
+
+        # Assertions
+        self.assertTrue(len(everything) == 3, "Expect a call per change in any channel")
+        self.assertTrue(len(room) == 1, "Expect calls for the channel until unsubscribed")
+        self.assertTrue(room[0][2] == {'room_id': (None, '36026978')}, "Expect changes from defaults")
+
+
+class TestClientState(unittest.TestCase):
+    def setUp(self):
+        self.irc = TwitchIrc('dummy', 'dummy_token')
+        self.irc._on_handle_twitch(make_message('ROOMSTATE', ['#test-room'], dict(FULL_ROOMSTATE)))
+        self.irc._on_handle_twitch(make_message('ROOMSTATE', ['#test-room'], {'room-id': '36026978', 'slow': '10'}))
+        self.irc._on_handle_twitch(make_message('USERSTATE', ['#test-room'], {'badges': 'moderator/1', 'mod': '1'}))
+
+    def test_lookups(self):
+        # Assertions
+        self.assertTrue(self.irc.is_mod('#test-room'), "Expect mod from USERSTATE")
+        self.assertTrue(self.irc.slow_seconds('#test-room') == 10, "Expect merged slow from ROOMSTATE")
+
+    def test_skip_redundant_moderation(self):
+        with mock.patch.object(TwitchIrc, 'message') as mocked:
+            self.irc.slow('#test-room', 10)
+            self.irc.emoteonly_off('#test-room')
+            self.irc.followers_off('#test-room')
+            self.irc.slow('#test-room', 30)
+            self.irc.emoteonly('#test-room')
+            self.irc.slow('#other-room', 0)
+
+        sent = [call.args[1] for call in mocked.call_args_list]
+
+        # Assertions
+        self.assertTrue(
+            sent == ['.slow 30', '.emoteonly', '.slow 0'],
+            "Expect commands which change nothing skipped, unknown channels always sent",
+        )
+
+    def test_part_forgets_channel(self):
+        with mock.patch.object(pydle.features.RFC1459Support, 'on_raw_part', new_callable=mock.MagicMock):
+            self.irc.on_raw_part(make_message('PART', ['#test-room'], source='dummy!dummy@dummy.tmi.twitch.tv'))
+
+        # Assertions
+        self.assertTrue('#test-room' not in self.irc.state, "Expect state dropped after parting")
@@ -0,0 +1,87 @@
+import unittest
+
+from python_twitch_irc import TwitchIrc
+from python_twitch_irc.subscription import Subscription
+
+PRIVMSG = b'@badges=;id=1 :a_user!a_user@a_user.tmi.twitch.tv PRIVMSG #test-room :hello @My_Bot'
+OTHER_CHANNEL = b'@badges=;id=2 :b_user!b_user@b_user.tmi.twitch.tv PRIVMSG #other-room :hello'
+USERNOTICE = b'@msg-id=sub :tmi.twitch.tv USERNOTICE #test-room :great stream'
+WHISPER = b'@badges= :a_user!a_user@a_user.tmi.twitch.tv WHISPER my_bot :psst'
+ROOMSTATE = b'@slow=0 :tmi.twitch.tv ROOMSTATE #other-room'
+PING = b'PING :tmi.twitch.tv'
+
+
+class TestSubscription(unittest.TestCase):
+    def test_commands(self):
+        subscription = Subscription(commands=['usernotice'])
+
+        # Assertions
+        self.assertTrue(subscription.match(USERNOTICE), "Expect subscribed command kept")
+        self.assertTrue(not subscription.match(PRIVMSG), "Expect other chat commands dropped")
+        self.assertTrue(subscription.match(ROOMSTATE), "Expect control traffic kept")
+        self.assertTrue(subscription.match(PING), "Expect PING kept")
+        self.assertTrue(subscription.skipped == {'PRIVMSG': 1}, "Expect skipped counted per command")
+        self.assertTrue(subscription.matched == 1, "Expect matched counted")
+
+    def test_channels(self):
+        subscription = Subscription(channels=['Test-Room'])
+
+        # Assertions
+        self.assertTrue(subscription.match(PRIVMSG), "Expect subscribed channel kept")
+        self.assertTrue(subscription.match(PRIVMSG + b'\r'), "Expect line endings tolerated")
+        self.assertTrue(not subscription.match(OTHER_CHANNEL), "Expect other channels dropped")
+        self.assertTrue(subscription.match(WHISPER), "Expect whispers kept")
+
+    def test_users_and_keywords(self):
+        users = Subscription(users=['b_user'])
+        mentions = Subscription(commands=['PRIVMSG'], keywords=['@my_bot'])
+
+        # Assertions
+        self.assertTrue(not users.match(PRIVMSG), "Expect other users dropped")
+        self.assertTrue(users.match(OTHER_CHANNEL), "Expect subscribed user kept")
+        self.assertTrue(users.match(USERNOTICE), "Expect users to only restrict PRIVMSG and WHISPER")
+        self.assertTrue(mentions.match(PRIVMSG), "Expect case insensitive keyword match")
+        self.assertTrue(not mentions.match(OTHER_CHANNEL), "Expect messages without keyword dropped")
+        self.assertTrue(mentions.skipped_total == 1, "Expect total skipped")
+
+
+class TestClientSubscription(unittest.TestCase):
+    def test_skip_before_parsing(self):
+        class Bot(TwitchIrc):
+            SUBSCRIBE_CHANNELS = ['#test-room']
+            METRICS = True
+
+        irc = Bot('dummy', 'dummy_token')
+        irc.encoding = 'utf-8'
+        irc._receive_buffer = b'\r\n'.join([OTHER_CHANNEL, OTHER_CHANNEL, PRIVMSG, OTHER_CHANNEL, b''])
+
+        commands = []
+        while irc._has_message():
+            message = irc._parse_message()
+            commands.append(message.params[0])
+
+        # Assertions
+        self.assertTrue(commands == ['#test-room'], "Expect only the subscribed channel parsed")
+        self.assertTrue(irc._receive_buffer == b'', "Expect buffer consumed")
+        self.assertTrue(irc.subscription.skipped['PRIVMSG'] == 3, "Expect skipped lines counted")
+        self.assertTrue(irc.metrics.skipped.value('PRIVMSG') == 3, "Expect skipped lines in metrics")
+        self.assertTrue(
+            irc.metrics.bytes_received.value() == len(OTHER_CHANNEL) * 3 + len(PRIVMSG) + 8,
+            "Expect skipped bytes counted",
+        )
+
+    def test_partial_line_kept(self):
+        class Bot(TwitchIrc):
+            SUBSCRIBE_COMMANDS = ['USERNOTICE']
+
+        irc = Bot('dummy', 'dummy_token')
+        irc.encoding = 'utf-8'
+        irc._receive_buffer = PRIVMSG + b'\r\n' + OTHER_CHANNEL[:20]
+
+        # Assertions
+        self.assertTrue(not irc._has_message(), "Expect no complete subscribed line")
+        self.assertTrue(irc._receive_buffer == OTHER_CHANNEL[:20], "Expect partial line kept")
+
+    def test_disabled(self):
+        # Assertions
+        self.assertTrue(TwitchIrc('dummy', 'dummy_token').subscription is None, "Expect no filter by default")
@@ -0,0 +1,38 @@
+import unittest
+
+from python_twitch_irc import Tags
+from python_twitch_irc.tags import parse_badges, parse_emotes, unescape_tag_value
+
+
+class TestTags(unittest.TestCase):
+    def test_lookup(self):
+        tags = Tags('badges=subscriber/12;display-name=Test_User;emotes=')
+
+        # Assertions
+        self.assertTrue(tags['display-name'] == 'Test_User', "Expect tag value")
+        self.assertTrue(tags['emotes'] is True, "Expect empty value to be True")
+        self.assertTrue('badges' in tags, "Expect tag to be present")
+        self.assertTrue(tags.get('bits') is None, "Expect missing tag to be None")
+        self.assertTrue(len(tags) == 3, "Expect three tags")
+
+    def test_unescape(self):
+        tags = Tags(r'system-msg=6\smonths\:\sthanks\\')
+
+        # Assertions
+        self.assertTrue(tags['system-msg'] == '6 months; thanks\\', "Expect value to be unescaped")
+        self.assertTrue(tags['system-msg'] == '6 months; thanks\\', "Expect value to be unescaped once")
+        self.assertTrue(unescape_tag_value(r'a\rb\nc\xd\\') == 'a\rb\ncxd\\', "Expect all escapes handled")
+
+    def test_equals_dict(self):
+        self.assertTrue(Tags('a=1;b=2') == {'a': '1', 'b': '2'}, "Expect tags to compare as a mapping")
+
+    def test_parse_badges(self):
+        self.assertTrue(parse_badges('subscriber/12,bits/100') == {'subscriber': '12', 'bits': '100'})
+        self.assertTrue(parse_badges(True) == {}, "Expect empty badges")
+
+    def test_parse_emotes(self):
+        emotes = parse_emotes('25:0-4,12-16/1902:6-10')
+
+        # Assertions
+        self.assertTrue(emotes == [('25', 0, 4), ('25', 12, 16), ('1902', 6, 10)], "Expect emote ranges")
+        self.assertTrue(parse_emotes('') == [], "Expect no emotes")
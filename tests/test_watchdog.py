@@ -0,0 +1,135 @@
+import asyncio
+import time
+import unittest
+
+from python_twitch_irc import TwitchIrc
+from python_twitch_irc.watchdog import Stall, Watchdog, format_samples
+
+
+class Dummy:
+    pass
+
+
+def privmsg(text, channel='#test-room'):
+    message = Dummy()
+    message.command = 'PRIVMSG'
+    message.params = [channel, text]
+    message.tags = {}
+    message.source = 'a_user!a_user@a_user.tmi.twitch.tv'
+    return message
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class TestWatchdog(unittest.TestCase):
+    def test_slowest(self):
+        watchdog = Watchdog(top=2)
+
+        watchdog.dispatching('PRIVMSG', '#a')
+        watchdog.observe(0.1, 'on_message', '#a')
+        watchdog.observe(0.3, 'on_message', '#a')
+        watchdog.observe(0.2, 'on_message', '#a')
+        watchdog.dispatching('USERNOTICE', '#b')
+        watchdog.observe(0.3, 'on_usernotice', '#b')
+        watchdog.dispatching(None, None)
+
+        # Assertions
+        self.assertTrue(
+            [slow.seconds for slow in watchdog.slowest('PRIVMSG')] == [0.3, 0.2],
+            "Expect the slowest callbacks per command",
+        )
+        self.assertTrue(len(watchdog.slowest()) == 2, "Expect top-N over every command")
+        self.assertTrue(watchdog.slowest('WHISPER') == [], "Expect nothing for other commands")
+
+
+class TestClientWatchdog(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.addCleanup(asyncio.set_event_loop, None)
+        self.addCleanup(self.loop.close)
+
+        class Bot(TwitchIrc):
+            WATCHDOG_THRESHOLD = 0.05
+
+            def on_message(self, timestamp, tags, channel, user, message):
+                if message == 'slow':
+                    time.sleep(0.3)
+                elif message == 'busy':
+                    busy(0.1)
+
+            def on_loop_stall(self, stall):
+                self.stalled.append(stall)
+
+        self.irc = Bot('dummy', 'dummy_token')
+        self.irc.stalled = []
+        self.addCleanup(self.irc.watchdog.stop)
+
+    async def dispatch(self, *texts):
+        for text in texts:
+            self.irc._on_handle_twitch(privmsg(text))
+            await asyncio.sleep(0.1)
+
+    def test_stall(self):
+        self.irc.watchdog.start()
+        self.loop.run_until_complete(self.dispatch('fast', 'slow', 'fast'))
+
+        # Assertions
+        self.assertTrue(len(self.irc.watchdog.stalls) == 1, "Expect one stall reported")
+
+        stall = self.irc.watchdog.stalls[0]
+        self.assertTrue(stall.command == 'PRIVMSG' and stall.channel == '#test-room', "Expect the message")
+        self.assertTrue(stall.callback == 'TestClientWatchdog.setUp.<locals>.Bot.on_message', "Expect the callback")
+        self.assertTrue('time.sleep(0.3)' in stall.stack[-1], "Expect the blocking line's stack")
+        self.assertTrue(0.2 < stall.seconds < 0.4, "Expect the stall's duration once resumed")
+        self.assertTrue(self.irc.stalled == [stall], "Expect on_loop_stall called")
+
+        slowest = self.irc.watchdog.slowest('PRIVMSG')[0]
+        self.assertTrue(slowest.seconds >= 0.3 and slowest.channel == '#test-room', "Expect callbacks timed")
+
+    def test_async_callbacks(self):
+        class Bot(TwitchIrc):
+            WATCHDOG_THRESHOLD = 0.05
+
+            async def on_message(self, timestamp, tags, channel, user, message):
+                await asyncio.sleep(0.01)
+                busy(0.05)
+
+        irc = Bot('dummy', 'dummy_token')
+        irc._on_handle_twitch(privmsg('fast'))
+        self.loop.run_until_complete(asyncio.sleep(0.2))
+
+        # Assertions
+        slowest = irc.watchdog.slowest('PRIVMSG')
+        self.assertTrue(len(slowest) == 1, "Expect the async callback timed once")
+        self.assertTrue(slowest[0].seconds >= 0.06, "Expect the coroutine timed until it completed")
+        self.assertTrue(slowest[0].callback.endswith('Bot.on_message'), "Expect the callback")
+        self.assertTrue(slowest[0].channel == '#test-room', "Expect the channel it was dispatched for")
+
+    def test_profiler(self):
+        self.irc.watchdog.start_profiling()
+        self.loop.run_until_complete(self.dispatch('busy'))
+        samples = self.irc.watchdog.stop_profiling()
+
+        # Assertions
+        self.assertTrue(samples, "Expect samples taken")
+        dispatch = sum(count for stack, count in samples.items() if '_on_handle_twitch' in stack)
+        self.assertTrue(dispatch >= 0.9 * sum(samples.values()), "Expect the dispatch path sampled")
+        self.assertTrue(any(stack.endswith(')') and 'busy' in stack for stack in samples), "Expect the hot spot")
+        self.assertTrue(format_samples(samples).count('\n') == len(samples) - 1, "Expect one line per stack")
+
+    def test_metrics(self):
+        class Bot(TwitchIrc):
+            METRICS = True
+            WATCHDOG_THRESHOLD = 0.05
+
+        irc = Bot('dummy', 'dummy_token')
+        irc._on_stall(Stall(time.time(), 0.2, 'PRIVMSG', '#test-room', 'on_message', [], 0.0))
+
+        # Assertions
+        self.assertTrue(irc.metrics.stalls.value('PRIVMSG') == 1, "Expect stalls counted per command")
+        self.assertTrue(irc.metrics.stall_seconds.count() == 1, "Expect stall durations observed")
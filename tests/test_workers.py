@@ -0,0 +1,128 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from python_twitch_irc import TwitchIrc
+from python_twitch_irc.workers import PROCESS, THREAD, WorkerPool, WorkEvent
+
+
+class Dummy:
+    pass
+
+
+def make_message(command, params, tags=None, source=None):
+    message = Dummy()
+    message.command = command
+    message.params = params
+    message.tags = tags or {}
+    message.source = source
+    return message
+
+
+def shout(event):
+    return event.message.upper()
+
+
+class TestWorkerPool(unittest.TestCase):
+    def test_channel_affinity(self):
+        pool = WorkerPool(THREAD, workers=4)
+        self.addCleanup(pool.shutdown)
+
+        # Assertions
+        self.assertTrue(len(pool) == 4, "Expect four workers")
+        self.assertTrue(
+            pool.worker_for('#test-room') == pool.worker_for('#test-room'),
+            "Expect a channel to always use the same worker",
+        )
+
+    def test_channel_order(self):
+        pool = WorkerPool(THREAD, workers=4)
+        self.addCleanup(pool.shutdown)
+        order = []
+
+        def work(i):
+            # Earlier work sleeps longer, so only a single worker keeps order
+            time.sleep((10 - i) / 1000)
+            order.append(i)
+
+        futures = [pool.submit('#test-room', work, i) for i in range(10)]
+        for future in futures:
+            future.result()
+
+        # Assertions
+        self.assertTrue(order == list(range(10)), "Expect work for a channel in arrival order")
+
+    def test_unknown_kind(self):
+        with self.assertRaises(ValueError):
+            WorkerPool('fibers')
+
+    def test_process(self):
+        pool = WorkerPool(PROCESS, workers=1)
+        self.addCleanup(pool.shutdown)
+
+        event = WorkEvent('PRIVMSG', 0, '#test-room', 'a_user', 'hello', {})
+
+        # Assertions
+        self.assertTrue(pool.submit('#test-room', shout, event).result() == 'HELLO', "Expect result from a process")
+
+
+class TestOffload(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def test_offload(self):
+        class Bot(TwitchIrc):
+            EXECUTOR_WORKERS = 2
+
+        irc = Bot('dummy', 'dummy_token')
+        results = []
+        threads = []
+
+        def work(event):
+            threads.append(threading.current_thread())
+            return shout(event)
+
+        irc.offload('PRIVMSG', work, lambda event, result: results.append((event, result)))
+        self.addCleanup(irc.workers.shutdown)
+
+        message = make_message(
+            'PRIVMSG',
+            ['#test-room', 'hello'],
+            {'tmi-sent-ts': '1507246572675'},
+            'a_user!a_user@a_user.tmi.twitch.tv',
+        )
+        irc._on_handle_twitch(message)
+        self.loop.run_until_complete(asyncio.sleep(0.05))
+
+        # Assertions
+        self.assertTrue(len(results) == 1, "Expect one offloaded result")
+        event, result = results[0]
+        self.assertTrue(result == 'HELLO', "Expect the result of the work")
+        self.assertTrue(event.channel == '#test-room', "Expect channel on the event")
+        self.assertTrue(event.user == 'a_user', "Expect user on the event")
+        self.assertTrue(event.tags == {'tmi-sent-ts': '1507246572675'}, "Expect tags copied onto the event")
+        self.assertTrue(threads[0] is not threading.main_thread(), "Expect work off the event loop thread")
+
+    def test_not_offloaded(self):
+        irc = TwitchIrc('dummy', 'dummy_token')
+
+        # Assertions
+        self.assertTrue(irc.workers is None, "Expect no worker pool until offload is used")
+
+    def test_stop(self):
+        irc = TwitchIrc('dummy', 'dummy_token')
+        irc.offload('PRIVMSG', shout)
+        workers = irc.workers
+
+        self.loop.run_until_complete(irc.stop())
+
+        # Assertions
+        self.assertTrue(irc.workers is None, "Expect the worker pool released")
+        with self.assertRaises(RuntimeError):
+            workers.submit('#test-room', shout, None)